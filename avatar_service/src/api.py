@@ -1,20 +1,35 @@
 # /home/ubuntu/podcast_workflow_mvp/avatar_service/src/api.py
+import os
+import hmac
+import json
 import logging
-from fastapi import FastAPI, HTTPException, Depends
+from fastapi import FastAPI, HTTPException, Depends, Body, Header
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import RedirectResponse
+from sqlalchemy import func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from pydantic import BaseModel
-from typing import Optional
+from pydantic import BaseModel, Field
+from typing import Any, Dict, List, Optional
 import asyncio
 
-from .database import get_db
-from .models import ScriptLineModel
-from .avatar_processor import process_avatar_generation, check_avatar_status
+from .database import get_db, get_async_db
+from .jobs import enqueue_job, job_status
+from .models import JobModel, ScriptLineModel
+from .completion_tracker import completion_tracker
+from .hedra_service import hedra_http
+from .worker import AVATAR_QUEUE
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
+# Shared secret Hedra callbacks must carry, in the X-Webhook-Secret header or
+# a token query parameter on HEDRA_CALLBACK_URL
+HEDRA_WEBHOOK_SECRET = os.getenv("HEDRA_WEBHOOK_SECRET")
+
+# Tasks started with the app and cancelled on shutdown
+background_tasks: List[asyncio.Task] = []
+
 # Create FastAPI app
 app = FastAPI(title="Avatar Service")
 
@@ -38,74 +53,304 @@ class AvatarResponse(BaseModel):
     status: str
     message: str
     job_id: Optional[str] = None
+    queue_job_id: Optional[int] = None
     progress: Optional[float] = None
     video_path: Optional[str] = None
 
 
+class AvatarBatchResponse(BaseModel):
+    script_id: int
+    status: str
+    message: str
+    batch_id: int  # The avatar job; poll /avatar/jobs/{batch_id} for progress
+    line_ids: List[int]
+
+
+class LineStatusBatchRequest(BaseModel):
+    # Exactly one of these
+    line_ids: Optional[List[int]] = Field(None, max_length=1000)
+    script_id: Optional[int] = None
+
+
+def batch_lines_filter(request: LineStatusBatchRequest):
+    """The WHERE clause selecting the lines of a batch status request."""
+    if (request.line_ids is None) == (request.script_id is None):
+        raise HTTPException(
+            status_code=400, detail="Provide either line_ids or script_id"
+        )
+    if request.script_id is not None:
+        return ScriptLineModel.script_id == request.script_id
+    return ScriptLineModel.id.in_(request.line_ids)
+
+
 @app.post("/avatar/generate/{line_id}", response_model=AvatarResponse)
 async def generate_avatar(line_id: int, db: Session = Depends(get_db)):
     """
-    Start the avatar generation process for a script line.
+    Queue the avatar generation process for a script line.
 
-    This endpoint will trigger the avatar generation process but will not
-    wait for completion. The job will run asynchronously.
+    An avatar worker uploads the line's assets to Hedra and starts the video
+    job; poll /avatar/status/{line_id} for progress.
     """
-    try:
-        result = await process_avatar_generation(db=db, line_id=line_id)
+    line = db.query(ScriptLineModel).filter(ScriptLineModel.id == line_id).first()
 
-        if result.get("status") == "error":
-            raise HTTPException(status_code=400, detail=result.get("message"))
+    if not line:
+        raise HTTPException(status_code=400, detail=f"Script line {line_id} not found")
 
-        return {
-            "status": result.get("status"),
-            "message": result.get("message"),
-            "job_id": result.get("job_id"),
-        }
+    if not line.audio_file_path:
+        raise HTTPException(status_code=400, detail="No audio file path available")
 
-    except Exception as e:
-        logger.error(f"Error in generate_avatar endpoint: {str(e)}")
-        raise HTTPException(status_code=500, detail=str(e))
+    if line.avatar_status == "processing" and line.avatar_job_id:
+        # Starting it again would pay Hedra for a second clip of the line
+        raise HTTPException(
+            status_code=409,
+            detail=f"Line {line_id} is already rendering on Hedra",
+        )
 
+    job = enqueue_job(
+        db,
+        AVATAR_QUEUE,
+        "avatar_line",
+        {"line_id": line_id},
+        dedupe_key=f"avatar_line:{line_id}",
+    )
+    if job.status == "queued":
+        db.execute(
+            update(ScriptLineModel)
+            .where(ScriptLineModel.id == line_id)
+            .values(avatar_status="queued")
+        )
+        db.commit()
 
-@app.get("/avatar/status/{line_id}", response_model=AvatarResponse)
-async def get_avatar_status(line_id: int, db: Session = Depends(get_db)):
+    return {
+        "status": job.status,
+        "message": f"Avatar generation {job.status}",
+        "queue_job_id": job.id,
+    }
+
+
+@app.post("/avatar/generate-script/{script_id}", response_model=AvatarBatchResponse)
+async def generate_script_avatars(script_id: int, db: Session = Depends(get_db)):
     """
-    Check the status of an avatar generation job.
+    Queue avatar generation for every ready line of a script.
 
-    This endpoint will check the current status of the avatar generation process
-    and return information about progress or completion.
+    A line is ready once its audio is complete and it has no video yet, nor
+    one on the way. One worker job starts the whole batch, AVATAR_CONCURRENCY
+    lines at a time within the Hedra rate limit; the job ID is the batch ID.
     """
-    try:
-        result = await check_avatar_status(db=db, line_id=line_id)
+    script_lines = (
+        db.query(ScriptLineModel.id, ScriptLineModel.avatar_status)
+        .filter(
+            ScriptLineModel.script_id == script_id,
+            ScriptLineModel.tts_status == "complete",
+            ScriptLineModel.audio_file_path.isnot(None),
+        )
+        .order_by(ScriptLineModel.line_order)
+        .all()
+    )
+    line_ids = [
+        line.id
+        for line in script_lines
+        if line.avatar_status not in ["complete", "queued", "processing"]
+    ]
+
+    if not line_ids:
+        raise HTTPException(
+            status_code=400,
+            detail=f"No lines of script {script_id} are ready for avatar generation",
+        )
 
-        if result.get("status") == "error":
-            raise HTTPException(status_code=400, detail=result.get("message"))
+    job = enqueue_job(
+        db,
+        AVATAR_QUEUE,
+        "avatar_script",
+        {"script_id": script_id, "line_ids": line_ids},
+        dedupe_key=f"avatar_script:{script_id}",
+    )
+    if job.status == "queued":
+        db.execute(
+            update(ScriptLineModel)
+            .where(ScriptLineModel.id.in_(line_ids))
+            .values(avatar_status="queued")
+        )
+        db.commit()
 
-        response = {
-            "status": result.get("status"),
-            "message": result.get("message"),
-        }
+    # A batch already running for the script is returned as is
+    line_ids = json.loads(job.payload)["line_ids"]
+    return AvatarBatchResponse(
+        script_id=script_id,
+        status=job.status,
+        message=f"Avatar generation {job.status} for {len(line_ids)} lines",
+        batch_id=job.id,
+        line_ids=line_ids,
+    )
+
+
+async def avatar_job_progress(db: AsyncSession, job: JobModel) -> Dict[str, Any]:
+    """
+    Count a batch's lines by where their video stands.
+
+    The job finishes once every line is submitted to Hedra; the videos keep
+    rendering after that, so the counts follow the lines, not the job.
+    """
+    line_ids = json.loads(job.payload or "{}").get("line_ids", [])
+    rows = (
+        await db.execute(
+            select(
+                ScriptLineModel.avatar_status,
+                ScriptLineModel.avatar_job_id.isnot(None),
+                func.count(),
+            )
+            .where(ScriptLineModel.id.in_(line_ids))
+            .group_by(
+                ScriptLineModel.avatar_status,
+                ScriptLineModel.avatar_job_id.isnot(None),
+            )
+        )
+    ).all()
 
-        if "job_id" in result:
-            response["job_id"] = result.get("job_id")
+    counts = {"complete": 0, "failed": 0, "rendering": 0, "waiting": 0}
+    for status, submitted, count in rows:
+        if status in ["complete", "failed"]:
+            counts[status] += count
+        elif status == "processing" and submitted:
+            counts["rendering"] += count
+        else:
+            counts["waiting"] += count
 
-        if "progress" in result:
-            response["progress"] = result.get("progress")
+    return {
+        "total_lines": len(line_ids),
+        "completed_lines": counts["complete"],
+        "failed_lines": counts["failed"],
+        "rendering_lines": counts["rendering"],  # Submitted, video on the way
+        "waiting_lines": counts["waiting"],  # Not yet submitted to Hedra
+    }
 
-        if "video_path" in result:
-            response["video_path"] = result.get("video_path")
 
-        return response
+@app.get("/avatar/jobs/{job_id}")
+async def get_avatar_job(job_id: int, db: AsyncSession = Depends(get_async_db)):
+    """Get the status of an avatar job, with line progress for script batches"""
+    job = await db.get(JobModel, job_id)
 
-    except Exception as e:
-        logger.error(f"Error in get_avatar_status endpoint: {str(e)}")
-        raise HTTPException(status_code=500, detail=str(e))
+    if not job or job.queue != AVATAR_QUEUE:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+
+    status = job_status(job)
+    if job.job_type == "avatar_script":
+        status["progress"] = await avatar_job_progress(db, job)
+    return status
+
+
+@app.get("/avatar/status/{line_id}", response_model=AvatarResponse)
+async def get_avatar_status(line_id: int, db: AsyncSession = Depends(get_async_db)):
+    """
+    Check the status of an avatar generation job.
+
+    Answered from the database alone, like /avatar/status:batch: lines
+    rendering on Hedra are checked and collected by the completion tracker,
+    so polling this never calls Hedra.
+    """
+    line = await db.get(ScriptLineModel, line_id)
+
+    if not line:
+        raise HTTPException(status_code=404, detail=f"Line {line_id} not found")
+
+    if line.avatar_status == "complete":
+        message = "Avatar generation completed"
+    elif line.avatar_status == "failed":
+        message = "Avatar generation failed"
+    elif line.avatar_status == "processing" and line.avatar_job_id:
+        message = "Avatar generation in progress"
+    elif line.avatar_status in ["queued", "processing"]:
+        message = "Avatar generation waiting for a worker"
+    else:
+        message = "Avatar generation not started"
+
+    return {
+        "status": line.avatar_status,
+        "message": message,
+        "job_id": line.avatar_job_id,
+        "video_path": line.video_file_path,
+    }
+
+
+@app.post("/avatar/status:batch")
+async def get_lines_avatar_status(
+    request: LineStatusBatchRequest, db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Get avatar status for many lines, by line IDs or for a whole script.
+
+    Answered from the database alone: Hedra is not asked, so polling this
+    is cheap. Lines still rendering on Hedra are brought up to date by the
+    completion tracker. Unknown line IDs are left out of the response.
+    """
+    lines = (
+        await db.execute(
+            select(
+                ScriptLineModel.id,
+                ScriptLineModel.avatar_status,
+                ScriptLineModel.avatar_job_id,
+                ScriptLineModel.video_file_path,
+            )
+            .where(batch_lines_filter(request))
+            .order_by(ScriptLineModel.line_order)
+        )
+    ).all()
+
+    return {
+        "lines": [
+            {
+                "line_id": line.id,
+                "status": line.avatar_status,
+                "job_id": line.avatar_job_id,
+                "video_path": line.video_file_path,
+            }
+            for line in lines
+        ]
+    }
+
+
+@app.post("/avatar/webhooks/hedra")
+async def hedra_webhook(
+    payload: Dict[str, Any] = Body(...),
+    token: Optional[str] = None,
+    x_webhook_secret: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    Collect a clip as soon as Hedra reports its generation finished.
+
+    The callback only says which generation to look at: its status is read
+    back from Hedra before anything is stored, so a forged or stale callback
+    costs one status check.
+    """
+    if HEDRA_WEBHOOK_SECRET and not hmac.compare_digest(
+        (x_webhook_secret or token or "").encode(), HEDRA_WEBHOOK_SECRET.encode()
+    ):
+        raise HTTPException(status_code=401, detail="Invalid webhook secret")
+
+    generation_id = payload.get("generation_id") or payload.get("id")
+    line_id = None
+    if generation_id:
+        line_id = (
+            await db.scalars(
+                select(ScriptLineModel.id).where(
+                    ScriptLineModel.avatar_job_id == str(generation_id)
+                )
+            )
+        ).first()
+    if line_id is None:
+        # Acknowledged anyway, so Hedra does not retry it
+        return {"status": "ignored", "generation_id": generation_id}
+
+    [result] = await completion_tracker.check_lines([line_id])
+    return {"status": result.get("status"), "line_id": line_id}
 
 
 @app.get("/avatar/video/{line_id}")
-async def get_line_video(line_id: int, db: Session = Depends(get_db)):
+async def get_line_video(line_id: int, db: AsyncSession = Depends(get_async_db)):
     """Redirect to video file URL in Supabase Storage"""
-    line = db.query(ScriptLineModel).filter(ScriptLineModel.id == line_id).first()
+    line = await db.get(ScriptLineModel, line_id)
 
     if not line:
         raise HTTPException(status_code=404, detail=f"Line {line_id} not found")
@@ -117,13 +362,30 @@ async def get_line_video(line_id: int, db: Session = Depends(get_db)):
     return RedirectResponse(url=line.video_file_path)
 
 
+@app.get("/metrics")
+async def get_metrics():
+    """Report Hedra request latency, pool settings and completion tracking"""
+    return {
+        "hedra": hedra_http.stats(),
+        "completion_tracker": completion_tracker.stats(),
+    }
+
+
 @app.get("/health")
 async def health_check():
     return {"status": "ok"}
 
 
+def stuck_lines_query():
+    """Select lines still waiting on a Hedra generation."""
+    return select(ScriptLineModel).where(
+        ScriptLineModel.avatar_status == "processing",
+        ScriptLineModel.avatar_job_id.isnot(None),
+    )
+
+
 @app.post("/avatar/sync-stuck-jobs")
-async def sync_stuck_jobs(db: Session = Depends(get_db)):
+async def sync_stuck_jobs(db: AsyncSession = Depends(get_async_db)):
     """
     Manually sync stuck jobs that are in 'processing' status.
 
@@ -132,14 +394,7 @@ async def sync_stuck_jobs(db: Session = Depends(get_db)):
     """
     try:
         # Find all lines stuck in processing
-        stuck_lines = (
-            db.query(ScriptLineModel)
-            .filter(
-                ScriptLineModel.avatar_status == "processing",
-                ScriptLineModel.avatar_job_id.isnot(None),
-            )
-            .all()
-        )
+        stuck_lines = (await db.scalars(stuck_lines_query())).all()
 
         if not stuck_lines:
             return {
@@ -149,25 +404,14 @@ async def sync_stuck_jobs(db: Session = Depends(get_db)):
                 "updated": 0,
             }
 
-        updated_count = 0
-        error_count = 0
-
-        for line in stuck_lines:
-            try:
-                logger.info(f"Checking stuck line {line.id}")
-                result = await check_avatar_status(db=db, line_id=line.id)
-
-                if result.get("status") in ["complete", "failed"]:
-                    updated_count += 1
-                    logger.info(
-                        f"Updated line {line.id} status to {result.get('status')}"
-                    )
-                else:
-                    logger.info(f"Line {line.id} still processing")
-
-            except Exception as e:
-                error_count += 1
-                logger.error(f"Error checking line {line.id}: {str(e)}")
+        # Checked concurrently, sharing any check the tracker has under way
+        results = await completion_tracker.check_lines(
+            [line.id for line in stuck_lines]
+        )
+        updated_count = sum(
+            1 for result in results if result.get("status") in ["complete", "failed"]
+        )
+        error_count = sum(1 for result in results if result.get("status") == "error")
 
         return {
             "status": "success",
@@ -182,54 +426,16 @@ async def sync_stuck_jobs(db: Session = Depends(get_db)):
         raise HTTPException(status_code=500, detail=str(e))
 
 
-# Background task to sync stuck jobs
-async def background_sync_task():
-    """Background task that periodically checks and syncs stuck jobs."""
-    while True:
-        try:
-            await asyncio.sleep(300)  # Wait 5 minutes between checks
-
-            # Import here to avoid circular imports
-            from .database import SessionLocal
-
-            db = SessionLocal()
-            try:
-                # Find stuck lines
-                stuck_lines = (
-                    db.query(ScriptLineModel)
-                    .filter(
-                        ScriptLineModel.avatar_status == "processing",
-                        ScriptLineModel.avatar_job_id.isnot(None),
-                    )
-                    .all()
-                )
-
-                if stuck_lines:
-                    logger.info(
-                        f"Background sync: Found {len(stuck_lines)} stuck jobs, checking..."
-                    )
-
-                    for line in stuck_lines:
-                        try:
-                            result = await check_avatar_status(db=db, line_id=line.id)
-                            if result.get("status") in ["complete", "failed"]:
-                                logger.info(
-                                    f"Background sync: Updated line {line.id} to {result.get('status')}"
-                                )
-                        except Exception as e:
-                            logger.error(
-                                f"Background sync: Error checking line {line.id}: {str(e)}"
-                            )
-
-            finally:
-                db.close()
-
-        except Exception as e:
-            logger.error(f"Background sync task error: {str(e)}")
-
-
 @app.on_event("startup")
 async def startup_event():
     """Start background tasks on app startup."""
-    logger.info("Starting background sync task...")
-    asyncio.create_task(background_sync_task())
+    logger.info("Starting avatar completion tracker...")
+    background_tasks.append(asyncio.create_task(completion_tracker.run()))
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop the completion tracker and close pooled Hedra connections."""
+    for task in background_tasks:
+        task.cancel()
+    await hedra_http.aclose()
@@ -1,13 +1,33 @@
 # /home/ubuntu/podcast_workflow_mvp/avatar_service/src/avatar_processor.py
 import os
+import asyncio
 import logging
 import tempfile
+from contextlib import aclosing, nullcontext
+from typing import Dict, List, Optional, Sequence
 from sqlalchemy import update
-from sqlalchemy.orm import Session
-
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .database import AsyncSessionLocal
+from .line_leases import (
+    lease_available,
+    lease_held,
+    new_lease_owner,
+    release_lease_values,
+    renew_line_lease,
+    take_lease_values,
+)
 from .models import ScriptLineModel
 from .hedra_service import HedraService
-from .storage import get_storage
+from .image_assets import (
+    HEDRA_IMAGE_REUSE_ENABLED,
+    forget_image_asset,
+    image_content_hash,
+    lookup_image_asset,
+    lookup_voice_image_asset,
+    store_image_asset,
+)
+from .storage import VIDEO_TRANSFER_CHUNK_BYTES, buffered_chunks, get_storage
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -16,6 +36,9 @@ logger = logging.getLogger(__name__)
 HEDRA_API_KEY = os.getenv("HEDRA_API_KEY")
 MEDIA_AUDIO_DIR = os.getenv("MEDIA_AUDIO_DIR", "/data/podcast-audio")
 MEDIA_VIDEO_DIR = os.getenv("MEDIA_VIDEO_DIR", "/data/podcast-video")
+# Lines of a script batch being uploaded and submitted to Hedra at once, per
+# worker process; request starts are further paced by the Hedra rate limit
+AVATAR_CONCURRENCY = int(os.getenv("AVATAR_CONCURRENCY", "4"))
 
 # Ensure media directory exists
 if not os.path.exists(MEDIA_VIDEO_DIR):
@@ -25,8 +48,139 @@ if not os.path.exists(MEDIA_VIDEO_DIR):
     except OSError as e:
         logger.error(f"Could not create directory {MEDIA_VIDEO_DIR}: {e}")
 
+# One speaker image upload per voice at a time in this process, so the lines
+# of a voice waiting on it reuse its asset instead of uploading it again
+_image_upload_locks: Dict[str, asyncio.Lock] = {}
+
+
+async def upload_speaker_image(
+    db: AsyncSession,
+    hedra_service: HedraService,
+    line_id: int,
+    voice_id: Optional[str],
+    image_data: bytes,
+) -> dict:
+    """
+    Get a Hedra image asset for a line's speaker image.
+
+    The image is uploaded once per voice and content; later lines reuse the
+    asset. Returns the asset ID and whether it was reused.
+    """
+    content_hash = image_content_hash(image_data)
+    reuse = HEDRA_IMAGE_REUSE_ENABLED and voice_id is not None
+    if reuse:
+        image_id = await lookup_image_asset(db, voice_id, content_hash)
+        if image_id:
+            logger.info(f"Reusing Hedra image asset {image_id} for voice {voice_id}")
+            return {"id": image_id, "reused": True, "content_hash": content_hash}
+
+    # Create temporary file for Hedra upload
+    with tempfile.NamedTemporaryFile(suffix=".jpg", delete=False) as temp_image:
+        temp_image.write(image_data)
+        temp_image_path = temp_image.name
+
+    try:
+        image_filename = f"{voice_id or line_id}_speaker.jpg"
+        image_asset = await hedra_service.create_and_upload_asset(
+            temp_image_path, "image", image_filename
+        )
+        image_id = image_asset["id"]
+        logger.info(f"Image uploaded successfully with ID: {image_id}")
+    finally:
+        # Clean up temp file
+        os.unlink(temp_image_path)
+
+    if reuse:
+        await store_image_asset(db, voice_id, content_hash, image_id)
+    return {"id": image_id, "reused": False, "content_hash": content_hash}
+
+
+async def upload_line_audio(
+    hedra_service: HedraService, storage, script_line: ScriptLineModel
+) -> str:
+    """Download a line's audio from Supabase and upload it to Hedra."""
+    line_id = script_line.id
+    logger.info(f"Downloading audio for line {line_id}")
+    audio_data = await asyncio.to_thread(
+        storage.download_file, "podcast-audio", script_line.audio_file_path
+    )
+
+    if not audio_data:
+        raise Exception("Failed to download audio file from Supabase")
+
+    # Create temporary file for Hedra upload
+    with tempfile.NamedTemporaryFile(suffix=".mp3", delete=False) as temp_audio:
+        temp_audio.write(audio_data)
+        temp_audio_path = temp_audio.name
+
+    try:
+        audio_filename = f"{line_id}.mp3"
+        audio_asset = await hedra_service.create_and_upload_asset(
+            temp_audio_path, "audio", audio_filename
+        )
+        return audio_asset["id"]
+    finally:
+        # Clean up temp file
+        os.unlink(temp_audio_path)
+
+
+async def upload_line_image(
+    db: AsyncSession,
+    hedra_service: HedraService,
+    storage,
+    script_line: ScriptLineModel,
+) -> Optional[dict]:
+    """
+    Get the Hedra image asset for a line's speaker, or None without one.
+
+    A voice whose current image is already at Hedra reuses that asset
+    without downloading the image again.
+    """
+    line_id = script_line.id
+    voice_id = script_line.voice_id
+    logger.info(f"Checking speaker image for line {line_id}")
+    logger.info(f"speaker_image_path: {script_line.speaker_image_path}")
+
+    if not script_line.speaker_image_path:
+        logger.warning(f"No speaker_image_path set for line {line_id}")
+        return None
+
+    logger.info(f"Speaker image URL exists: {script_line.speaker_image_path}")
+
+    reuse = HEDRA_IMAGE_REUSE_ENABLED and voice_id is not None
+    lock = (
+        _image_upload_locks.setdefault(voice_id, asyncio.Lock())
+        if reuse
+        else nullcontext()
+    )
+    async with lock:
+        if reuse:
+            asset = await lookup_voice_image_asset(db, voice_id)
+            if asset:
+                image_id, content_hash = asset
+                logger.info(
+                    f"Reusing Hedra image asset {image_id} for voice {voice_id}"
+                )
+                return {"id": image_id, "reused": True, "content_hash": content_hash}
+
+        # Download image from Supabase
+        image_data = await asyncio.to_thread(
+            storage.download_file, "speaker-images", script_line.speaker_image_path
+        )
 
-async def process_avatar_generation(db: Session, line_id: int) -> dict:
+        if not image_data:
+            logger.error(
+                "Failed to download speaker image from URL: "
+                f"{script_line.speaker_image_path}"
+            )
+            return None
+
+        return await upload_speaker_image(
+            db, hedra_service, line_id, voice_id, image_data
+        )
+
+
+async def process_avatar_generation(db: AsyncSession, line_id: int) -> dict:
     """
     Start the avatar generation process for a script line.
     Returns a dictionary with job_id and status.
@@ -34,13 +188,14 @@ async def process_avatar_generation(db: Session, line_id: int) -> dict:
     logger.info(f"Starting avatar generation for line_id: {line_id}")
 
     # Get the script line
-    script_line = (
-        db.query(ScriptLineModel).filter(ScriptLineModel.id == line_id).first()
-    )
+    script_line = await db.get(ScriptLineModel, line_id)
 
     if not script_line:
         logger.error(f"Script line with id {line_id} not found")
         return {"status": "error", "message": f"Script line {line_id} not found"}
+    # Detached, so a rollback in the image asset bookkeeping cannot expire it
+    # while the uploads below still read it
+    db.expunge(script_line)
 
     if not script_line.audio_file_path:
         logger.error(f"No audio file path for line {line_id}")
@@ -50,97 +205,68 @@ async def process_avatar_generation(db: Session, line_id: int) -> dict:
         logger.error("HEDRA_API_KEY not configured")
         return {"status": "error", "message": "HEDRA_API_KEY not configured"}
 
-    # Update status to processing
-    db.execute(
+    # Move the line to processing under a lease, renewed until Hedra has the
+    # job; a line another worker holds the lease on is left to that worker
+    lease_owner = new_lease_owner()
+    result = await db.execute(
         update(ScriptLineModel)
-        .where(ScriptLineModel.id == line_id)
-        .values(avatar_status="processing")
+        .where(ScriptLineModel.id == line_id, lease_available("avatar"))
+        .values(take_lease_values("avatar", lease_owner))
     )
-    db.commit()
+    await db.commit()
+    if result.rowcount == 0:
+        logger.info(f"Line {line_id} is leased to another worker, skipping")
+        return {"status": "skipped", "message": "Line is leased to another worker"}
+    heartbeat = asyncio.create_task(renew_line_lease("avatar", line_id, lease_owner))
 
     try:
         # Initialize services
         hedra_service = HedraService(api_key=HEDRA_API_KEY)
         storage = get_storage()
 
-        # Step 1: Download audio file from Supabase and upload to Hedra
-        logger.info(f"Downloading audio for line {line_id}")
-        audio_data = storage.download_file("podcast-audio", script_line.audio_file_path)
-
-        if not audio_data:
-            raise Exception("Failed to download audio file from Supabase")
-
-        # Create temporary file for Hedra upload
-        with tempfile.NamedTemporaryFile(suffix=".mp3", delete=False) as temp_audio:
-            temp_audio.write(audio_data)
-            temp_audio_path = temp_audio.name
-
-        try:
-            audio_filename = f"{line_id}.mp3"
-            audio_asset = await hedra_service.create_and_upload_asset(
-                temp_audio_path, "audio", audio_filename
-            )
-            audio_id = audio_asset["id"]
-        finally:
-            # Clean up temp file
-            os.unlink(temp_audio_path)
-
-        # Step 2: Handle speaker image if available
-        image_id = None
-        logger.info(f"Checking speaker image for line {line_id}")
-        logger.info(f"speaker_image_path: {script_line.speaker_image_path}")
-
-        if script_line.speaker_image_path:
-            logger.info(f"Speaker image URL exists: {script_line.speaker_image_path}")
-
-            # Download image from Supabase
-            image_data = storage.download_file(
-                "speaker-images", script_line.speaker_image_path
-            )
-
-            if image_data:
-                # Create temporary file for Hedra upload
-                with tempfile.NamedTemporaryFile(
-                    suffix=".jpg", delete=False
-                ) as temp_image:
-                    temp_image.write(image_data)
-                    temp_image_path = temp_image.name
-
-                try:
-                    image_filename = f"{line_id}_speaker.jpg"
-                    image_asset = await hedra_service.create_and_upload_asset(
-                        temp_image_path, "image", image_filename
-                    )
-                    image_id = image_asset["id"]
-                    logger.info(f"Image uploaded successfully with ID: {image_id}")
-                finally:
-                    # Clean up temp file
-                    os.unlink(temp_image_path)
-            else:
-                logger.error(
-                    f"Failed to download speaker image from URL: {script_line.speaker_image_path}"
-                )
-        else:
-            logger.warning(f"No speaker_image_path set for line {line_id}")
+        # Steps 1 and 2: upload the audio and the speaker image side by side
+        audio_id, image_asset = await asyncio.gather(
+            upload_line_audio(hedra_service, storage, script_line),
+            upload_line_image(db, hedra_service, storage, script_line),
+        )
+        image_id = image_asset["id"] if image_asset else None
 
         logger.info(f"Final image_id for video generation: {image_id}")
 
         # Step 3: Generate video
         logger.info(f"Creating video generation for line {line_id}")
-        generation_response = await hedra_service.generate_video(
-            audio_id=audio_id, image_id=image_id
-        )
+        try:
+            generation_response = await hedra_service.generate_video(
+                audio_id=audio_id, image_id=image_id
+            )
+        except Exception:
+            if image_asset and image_asset["reused"]:
+                # The asset may have expired at Hedra; the retry uploads afresh
+                await forget_image_asset(
+                    db, script_line.voice_id, image_asset["content_hash"]
+                )
+            raise
 
         generation_id = generation_response["id"]
         asset_id = generation_response["asset_id"]
 
-        # Store generation ID in database
-        db.execute(
+        # Store generation ID in database, unless the lease was lost meanwhile
+        # (the line was edited or requeued)
+        result = await db.execute(
             update(ScriptLineModel)
-            .where(ScriptLineModel.id == line_id)
-            .values(avatar_job_id=generation_id, avatar_asset_id=asset_id)
+            .where(ScriptLineModel.id == line_id, lease_held("avatar", lease_owner))
+            .values(
+                avatar_job_id=generation_id,
+                avatar_asset_id=asset_id,
+                # Hedra renders from here on; the status checks collect it
+                **release_lease_values("avatar"),
+            )
         )
-        db.commit()
+        await db.commit()
+        if result.rowcount == 0:
+            # The retry picks the line up again if it still needs a video
+            logger.warning(f"Lost the avatar lease on line {line_id}, job dropped")
+            return {"status": "error", "message": "Lost the avatar lease"}
 
         logger.info(
             f"Avatar generation job started with generation_id: {generation_id}"
@@ -154,16 +280,36 @@ async def process_avatar_generation(db: Session, line_id: int) -> dict:
 
     except Exception as e:
         logger.error(f"Error starting avatar generation: {str(e)}")
-        db.execute(
+        await db.rollback()
+        await db.execute(
             update(ScriptLineModel)
-            .where(ScriptLineModel.id == line_id)
-            .values(avatar_status="failed")
+            .where(ScriptLineModel.id == line_id, lease_held("avatar", lease_owner))
+            .values(avatar_status="failed", **release_lease_values("avatar"))
         )
-        db.commit()
+        await db.commit()
         return {"status": "error", "message": str(e)}
+    finally:
+        heartbeat.cancel()
 
 
-async def check_avatar_status(db: Session, line_id: int) -> dict:
+async def process_avatar_lines(line_ids: Sequence[int]) -> List[dict]:
+    """
+    Start avatar generation for many lines at once.
+
+    Up to AVATAR_CONCURRENCY lines upload and submit at a time, each with its
+    own session. Results are returned in the order of the lines.
+    """
+    semaphore = asyncio.Semaphore(AVATAR_CONCURRENCY)
+
+    async def process(line_id: int) -> dict:
+        async with semaphore:
+            async with AsyncSessionLocal() as db:
+                return await process_avatar_generation(db=db, line_id=line_id)
+
+    return await asyncio.gather(*(process(line_id) for line_id in line_ids))
+
+
+async def check_avatar_status(db: AsyncSession, line_id: int) -> dict:
     """
     Check the status of an avatar generation job and update the database
     if completed.
@@ -171,14 +317,21 @@ async def check_avatar_status(db: Session, line_id: int) -> dict:
     logger.info(f"Checking status for line_id: {line_id}")
 
     # Get the script line
-    script_line = (
-        db.query(ScriptLineModel).filter(ScriptLineModel.id == line_id).first()
-    )
+    script_line = await db.get(ScriptLineModel, line_id)
 
     if not script_line:
         logger.error(f"Script line with id {line_id} not found")
         return {"status": "error", "message": f"Script line {line_id} not found"}
 
+    if script_line.avatar_status == "queued" or (
+        script_line.avatar_status == "processing" and not script_line.avatar_job_id
+    ):
+        # A worker has not submitted the job to Hedra yet
+        return {
+            "status": script_line.avatar_status,
+            "message": "Avatar generation waiting for a worker",
+        }
+
     if not script_line.avatar_job_id:
         logger.error(f"No generation ID for line {line_id}")
         return {"status": "error", "message": "No avatar generation ID"}
@@ -207,29 +360,34 @@ async def check_avatar_status(db: Session, line_id: int) -> dict:
         progress = status_response["progress"]
 
         if status == "complete":
-            # Download the video from Hedra
+            # Stream the video from Hedra into Supabase Storage, with a few
+            # chunks buffered between them; a re-rendered line replaces its clip
             video_url = status_response["url"]
-            video_data = await hedra_service.download_video_data(video_url)
-
-            if not video_data:
-                raise Exception("Failed to download video from Hedra")
-
-            # Upload to Supabase Storage
             filename = f"{line_id}.mp4"
-            public_url = storage.upload_file(
-                video_data, filename, "podcast-video", "video/mp4"
-            )
+            async with (
+                hedra_service.stream_video(
+                    video_url, VIDEO_TRANSFER_CHUNK_BYTES
+                ) as chunks,
+                aclosing(buffered_chunks(chunks)) as buffered,
+            ):
+                public_url = await storage.upload_stream(
+                    buffered,
+                    filename,
+                    "podcast-video",
+                    "video/mp4",
+                    upsert=True,
+                )
 
             if not public_url:
                 raise Exception("Failed to upload video to Supabase Storage")
 
             # Update database
-            db.execute(
+            await db.execute(
                 update(ScriptLineModel)
                 .where(ScriptLineModel.id == line_id)
                 .values(avatar_status="complete", video_file_path=public_url)
             )
-            db.commit()
+            await db.commit()
 
             logger.info(f"Avatar generation completed for line {line_id}")
             return {
@@ -242,12 +400,12 @@ async def check_avatar_status(db: Session, line_id: int) -> dict:
             error_message = status_response.get("error_message", "Unknown error")
 
             # Update database
-            db.execute(
+            await db.execute(
                 update(ScriptLineModel)
                 .where(ScriptLineModel.id == line_id)
                 .values(avatar_status="failed")
             )
-            db.commit()
+            await db.commit()
 
             logger.error(
                 f"Avatar generation failed for line {line_id}: {error_message}"
@@ -0,0 +1,176 @@
+import os
+import time
+import asyncio
+import logging
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence
+
+from sqlalchemy import select
+
+from .database import AsyncSessionLocal
+from .models import ScriptLineModel
+from .avatar_processor import check_avatar_status
+from .hedra_service import HEDRA_CALLBACK_URL
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Bounds on the wait between checks of one generation. Checks are spread
+# out as a clip ages and bunched up as it nears completion.
+AVATAR_POLL_MIN_SECONDS = float(os.getenv("AVATAR_POLL_MIN_SECONDS", "5"))
+AVATAR_POLL_MAX_SECONDS = float(os.getenv("AVATAR_POLL_MAX_SECONDS", "60"))
+# Generations checked with Hedra at once
+AVATAR_POLL_CONCURRENCY = int(os.getenv("AVATAR_POLL_CONCURRENCY", "8"))
+# With Hedra calling back, each generation is still checked this often in
+# case a callback is lost
+AVATAR_CALLBACK_POLL_SECONDS = float(os.getenv("AVATAR_CALLBACK_POLL_SECONDS", "120"))
+
+
+def next_poll_delay(progress: Optional[float], age: float) -> float:
+    """
+    Seconds until a generation is checked again.
+
+    With progress reported, the time left is extrapolated from the age and
+    the check lands halfway there; without it the wait grows with the age.
+    """
+    if HEDRA_CALLBACK_URL:
+        return AVATAR_CALLBACK_POLL_SECONDS
+    if progress and 0 < progress < 1:
+        delay = age * (1 - progress) / progress / 2
+    else:
+        delay = age / 4
+    return min(max(delay, AVATAR_POLL_MIN_SECONDS), AVATAR_POLL_MAX_SECONDS)
+
+
+@dataclass
+class TrackedGeneration:
+    first_seen: float  # When this process first saw the line rendering
+    next_check: float
+
+
+class CompletionTracker:
+    """
+    Follows every generation still rendering on Hedra and collects its clip.
+
+    Lines in processing with a generation ID are picked up from the database,
+    so generations started by any worker are covered. Due lines are checked
+    concurrently, each on its own schedule from next_poll_delay; a webhook
+    callback checks its line straight away.
+    """
+
+    def __init__(self, concurrency: int = AVATAR_POLL_CONCURRENCY):
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._tracked: Dict[int, TrackedGeneration] = {}
+        self._running: Dict[int, asyncio.Future] = {}
+        self.checks = 0
+        self.collected = 0
+        self.failed = 0
+
+    async def check_lines(self, line_ids: Sequence[int]) -> List[Dict[str, Any]]:
+        """Check lines with Hedra now; results in the order of the lines."""
+        return await asyncio.gather(
+            *(asyncio.shield(self._shared_check(line_id)) for line_id in line_ids)
+        )
+
+    def _shared_check(self, line_id: int) -> asyncio.Future:
+        # A callback and a scheduled check of one line share one Hedra call,
+        # so a finished clip is never collected twice by this process
+        check = self._running.get(line_id)
+        if check is None:
+            check = asyncio.ensure_future(self._check(line_id))
+            self._running[line_id] = check
+            check.add_done_callback(lambda _: self._running.pop(line_id, None))
+        return check
+
+    async def _check(self, line_id: int) -> Dict[str, Any]:
+        async with self._semaphore:
+            self.checks += 1
+            try:
+                async with AsyncSessionLocal() as db:
+                    result = await check_avatar_status(db=db, line_id=line_id)
+            except Exception as e:
+                result = {"status": "error", "message": str(e)}
+
+        status = result.get("status")
+        if status in ["complete", "failed"]:
+            if line_id in self._tracked:
+                if status == "complete":
+                    self.collected += 1
+                else:
+                    self.failed += 1
+                del self._tracked[line_id]
+                logger.info(f"Completion tracker: line {line_id} is {status}")
+        else:
+            now = time.monotonic()
+            tracked = self._tracked.setdefault(line_id, TrackedGeneration(now, now))
+            tracked.next_check = now + next_poll_delay(
+                result.get("progress"), now - tracked.first_seen
+            )
+            if status == "error":
+                logger.error(
+                    f"Completion tracker: error checking line {line_id}: "
+                    f"{result.get('message')}"
+                )
+        return result
+
+    async def _refresh(self) -> None:
+        """Track newly submitted generations and forget settled ones."""
+        async with AsyncSessionLocal() as db:
+            in_flight = set(
+                (
+                    await db.scalars(
+                        select(ScriptLineModel.id).where(
+                            ScriptLineModel.avatar_status == "processing",
+                            ScriptLineModel.avatar_job_id.isnot(None),
+                        )
+                    )
+                ).all()
+            )
+
+        now = time.monotonic()
+        for line_id in set(self._tracked) - in_flight:
+            del self._tracked[line_id]
+        for line_id in in_flight - set(self._tracked):
+            # Hedra takes minutes per clip; no use asking straight away
+            self._tracked[line_id] = TrackedGeneration(
+                now, now + AVATAR_POLL_MIN_SECONDS
+            )
+
+    async def run(self) -> None:
+        """Check due generations until cancelled."""
+        while True:
+            try:
+                await self._refresh()
+                now = time.monotonic()
+                due = [
+                    line_id
+                    for line_id, tracked in self._tracked.items()
+                    if tracked.next_check <= now
+                ]
+                if due:
+                    await self.check_lines(due)
+            except Exception as e:
+                logger.error(f"Completion tracker error: {str(e)}")
+
+            # New submissions are picked up within AVATAR_POLL_MIN_SECONDS
+            now = time.monotonic()
+            next_check = min(
+                (tracked.next_check for tracked in self._tracked.values()),
+                default=now + AVATAR_POLL_MIN_SECONDS,
+            )
+            await asyncio.sleep(
+                min(max(next_check - now, 0.5), AVATAR_POLL_MIN_SECONDS)
+            )
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "tracked_generations": len(self._tracked),
+            "callbacks_enabled": bool(HEDRA_CALLBACK_URL),
+            "hedra_checks": self.checks,
+            "collected": self.collected,
+            "failed": self.failed,
+        }
+
+
+# Global completion tracker, run by the API process
+completion_tracker = CompletionTracker()
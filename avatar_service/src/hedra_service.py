@@ -1,12 +1,233 @@
 import os
+import time
+import bisect
+import asyncio
 import logging
+import importlib.util
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, Optional
+
 import httpx
-from typing import Dict, Any
 
 logger = logging.getLogger(__name__)
 
 HEDRA_API_KEY = os.getenv("HEDRA_API_KEY")
 HEDRA_BASE_URL = "https://api.hedra.com/web-app"
+# Public URL of POST /avatar/webhooks/hedra, for accounts where Hedra calls
+# back when a generation finishes; polling then only covers missed callbacks
+HEDRA_CALLBACK_URL = os.getenv("HEDRA_CALLBACK_URL")
+
+# One pooled client per process serves every Hedra call, so requests reuse
+# kept-alive TLS connections instead of handshaking for each one
+HEDRA_MAX_CONNECTIONS = int(os.getenv("HEDRA_MAX_CONNECTIONS", "20"))
+HEDRA_MAX_KEEPALIVE_CONNECTIONS = int(
+    os.getenv("HEDRA_MAX_KEEPALIVE_CONNECTIONS", "10")
+)
+HEDRA_KEEPALIVE_EXPIRY = float(os.getenv("HEDRA_KEEPALIVE_EXPIRY", "30"))
+# HTTP/2 multiplexes concurrent requests over one connection; needs the h2
+# package (httpx[http2]) and falls back to HTTP/1.1 without it
+HEDRA_HTTP2 = os.getenv("HEDRA_HTTP2", "true").lower() == "true"
+
+# Token bucket for request starts across the process: a sustained rate plus
+# a burst allowance. The limit is account-wide, so give each worker its share.
+HEDRA_REQUESTS_PER_SECOND = float(os.getenv("HEDRA_REQUESTS_PER_SECOND", "2"))
+HEDRA_BURST = int(os.getenv("HEDRA_BURST", "4"))
+# How long a 429 without Retry-After holds every request back
+HEDRA_RATE_LIMIT_PAUSE = float(os.getenv("HEDRA_RATE_LIMIT_PAUSE", "10"))
+
+# Upper bounds of the latency histogram buckets, in seconds
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+
+class TokenBucket:
+    """
+    Async token bucket: acquire() waits until a request may start.
+
+    Tokens refill at `rate` per second up to `capacity`. pause() empties the
+    bucket for a while, which is how a 429 slows every caller down at once
+    rather than just the request that hit it.
+    """
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = asyncio.Lock()
+
+    def pause(self, seconds: float) -> None:
+        self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+        self._tokens = 0.0
+
+    async def acquire(self) -> None:
+        # Waiters queue on the lock, so tokens are handed out in arrival order
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self._paused_until:
+                    await asyncio.sleep(self._paused_until - now)
+                    continue
+
+                self._tokens = min(
+                    self.capacity, self._tokens + (now - self._updated) * self.rate
+                )
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+def retry_after_seconds(response: httpx.Response) -> Optional[float]:
+    """Read a Retry-After header given in seconds or as an HTTP date."""
+    value = response.headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+class LatencyHistogram:
+    """Request durations counted into fixed buckets, plus totals."""
+
+    def __init__(self):
+        self.counts = [0] * (len(LATENCY_BUCKETS) + 1)  # Last is +Inf
+        self.count = 0
+        self.errors = 0
+        self.total_seconds = 0.0
+
+    def observe(self, seconds: float, error: bool = False) -> None:
+        self.counts[bisect.bisect_left(LATENCY_BUCKETS, seconds)] += 1
+        self.count += 1
+        self.total_seconds += seconds
+        if error:
+            self.errors += 1
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Upper bound of the bucket holding the q-th quantile (None if +Inf)."""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(LATENCY_BUCKETS, self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return None
+
+    def snapshot(self) -> Dict[str, Any]:
+        cumulative = 0
+        buckets = {}
+        for bound, count in zip(LATENCY_BUCKETS + ("+Inf",), self.counts):
+            cumulative += count
+            buckets[str(bound)] = cumulative
+        return {
+            "count": self.count,
+            "errors": self.errors,
+            "mean_seconds": self.total_seconds / self.count if self.count else None,
+            "p50_seconds": self.quantile(0.5),
+            "p95_seconds": self.quantile(0.95),
+            "buckets": buckets,  # Cumulative counts by upper bound, as in Prometheus
+        }
+
+
+class HedraHTTPClient:
+    """
+    The process-wide HTTP client for Hedra, with latency per endpoint.
+
+    The httpx client is created on first use and lives until aclose(), which
+    the API and the worker call on shutdown. Every request waits for the
+    shared token bucket, and a 429 pauses the bucket for all of them.
+    """
+
+    def __init__(
+        self,
+        max_connections: int,
+        max_keepalive_connections: int,
+        keepalive_expiry: float,
+        http2: bool,
+        requests_per_second: float = HEDRA_REQUESTS_PER_SECOND,
+        burst: int = HEDRA_BURST,
+    ):
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self.http2 = http2 and importlib.util.find_spec("h2") is not None
+        if http2 and not self.http2:
+            logger.warning("HEDRA_HTTP2 is on but h2 is not installed; using HTTP/1.1")
+        self._client: Optional[httpx.AsyncClient] = None
+        self.rate_limit = TokenBucket(requests_per_second, burst)
+        self.latency: Dict[str, LatencyHistogram] = {}
+
+    def client(self) -> httpx.AsyncClient:
+        """Get or create the shared keep-alive client."""
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                limits=self.limits, http2=self.http2, timeout=30.0
+            )
+        return self._client
+
+    @asynccontextmanager
+    async def timed(self, endpoint: str) -> AsyncIterator[httpx.AsyncClient]:
+        """
+        Yield the client once the rate limit allows a request, recording how
+        long the block took under endpoint.
+        """
+        histogram = self.latency.setdefault(endpoint, LatencyHistogram())
+        await self.rate_limit.acquire()
+        start = time.perf_counter()
+        error = True
+        try:
+            yield self.client()
+            error = False
+        except httpx.HTTPStatusError as e:
+            if e.response.status_code == 429:
+                delay = retry_after_seconds(e.response) or HEDRA_RATE_LIMIT_PAUSE
+                logger.warning(f"Hedra rate limit hit; pausing requests {delay:.1f}s")
+                self.rate_limit.pause(delay)
+            raise
+        finally:
+            histogram.observe(time.perf_counter() - start, error=error)
+
+    async def aclose(self) -> None:
+        """Close pooled connections; a new client is created on next use."""
+        if self._client is not None:
+            await self._client.aclose()
+        self._client = None
+
+    def stats(self) -> Dict[str, Any]:
+        """Latency histograms for this process, by Hedra endpoint."""
+        return {
+            "http2": self.http2,
+            "requests_per_second": self.rate_limit.rate,
+            "max_connections": self.limits.max_connections,
+            "max_keepalive_connections": self.limits.max_keepalive_connections,
+            "endpoints": {
+                endpoint: histogram.snapshot()
+                for endpoint, histogram in sorted(self.latency.items())
+            },
+        }
+
+
+# Global Hedra HTTP client
+hedra_http = HedraHTTPClient(
+    HEDRA_MAX_CONNECTIONS,
+    HEDRA_MAX_KEEPALIVE_CONNECTIONS,
+    HEDRA_KEEPALIVE_EXPIRY,
+    HEDRA_HTTP2,
+)
 
 
 class HedraService:
@@ -44,7 +265,7 @@ class HedraService:
         logger.info(f"Creating asset - Payload: {payload}")
         logger.info(f"Creating asset - Headers: {self.headers}")
 
-        async with httpx.AsyncClient() as client:
+        async with hedra_http.timed("create_asset") as client:
             try:
                 response = await client.post(
                     url, headers=self.headers, json=payload, timeout=30.0
@@ -96,7 +317,7 @@ class HedraService:
         with open(file_path, "rb") as file:
             files = {"file": file}
 
-            async with httpx.AsyncClient() as client:
+            async with hedra_http.timed("upload_asset") as client:
                 try:
                     response = await client.post(
                         url, headers=upload_headers, files=files, timeout=300.0
@@ -194,12 +415,15 @@ class HedraService:
         if image_id:
             payload["start_keyframe_id"] = image_id
 
+        if HEDRA_CALLBACK_URL:
+            payload["callback_url"] = HEDRA_CALLBACK_URL
+
         # Log request details
         logger.info(f"Generate video - URL: {url}")
         logger.info(f"Generate video - Payload: {payload}")
         logger.info(f"Generate video - Headers: {self.headers}")
 
-        async with httpx.AsyncClient() as client:
+        async with hedra_http.timed("generate_video") as client:
             try:
                 response = await client.post(
                     url, headers=self.headers, json=payload, timeout=30.0
@@ -236,7 +460,7 @@ class HedraService:
         """
         url = f"{self.base_url}/public/generations/{generation_id}/status"
 
-        async with httpx.AsyncClient() as client:
+        async with hedra_http.timed("get_generation_status") as client:
             response = await client.get(url, headers=self.headers, timeout=30.0)
             response.raise_for_status()
             return response.json()
@@ -252,7 +476,7 @@ class HedraService:
         Returns:
             Path to the downloaded file
         """
-        async with httpx.AsyncClient() as client:
+        async with hedra_http.timed("download_video") as client:
             response = await client.get(video_url, timeout=300.0)
             response.raise_for_status()
 
@@ -261,6 +485,25 @@ class HedraService:
 
             return output_path
 
+    @asynccontextmanager
+    async def stream_video(
+        self, video_url: str, chunk_size: int = 262144
+    ) -> AsyncIterator[AsyncIterator[bytes]]:
+        """
+        Download a video, yielding its bytes in chunks as they arrive.
+
+        Args:
+            video_url: URL of the video to download
+            chunk_size: Bytes per chunk
+
+        Raises:
+            httpx.HTTPStatusError: If the download is refused
+        """
+        async with hedra_http.timed("download_video") as client:
+            async with client.stream("GET", video_url, timeout=300.0) as response:
+                response.raise_for_status()
+                yield response.aiter_bytes(chunk_size)
+
     async def download_video_data(self, video_url: str) -> bytes:
         """
         Download a video from a URL and return as bytes.
@@ -271,7 +514,7 @@ class HedraService:
         Returns:
             Video data as bytes
         """
-        async with httpx.AsyncClient() as client:
+        async with hedra_http.timed("download_video") as client:
             response = await client.get(video_url, timeout=300.0)
             response.raise_for_status()
             return response.content
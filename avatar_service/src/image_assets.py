@@ -0,0 +1,132 @@
+import os
+import hashlib
+import logging
+from datetime import datetime, timezone
+from typing import Optional, Tuple
+
+from sqlalchemy import delete, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .models import HedraImageAssetModel
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Every line of a speaker uses the same portrait; it is uploaded to Hedra once
+# per voice and image content, and the asset is reused by the later lines
+HEDRA_IMAGE_REUSE_ENABLED = (
+    os.getenv("HEDRA_IMAGE_REUSE_ENABLED", "true").lower() == "true"
+)
+
+
+def image_content_hash(image_data: bytes) -> str:
+    return hashlib.sha256(image_data).hexdigest()
+
+
+async def lookup_image_asset(
+    db: AsyncSession, voice_id: str, content_hash: str
+) -> Optional[str]:
+    """Return the Hedra asset ID already uploaded for this image, or None."""
+    try:
+        asset_id = (
+            await db.execute(
+                update(HedraImageAssetModel)
+                .where(
+                    HedraImageAssetModel.voice_id == voice_id,
+                    HedraImageAssetModel.content_hash == content_hash,
+                )
+                .values(
+                    use_count=HedraImageAssetModel.use_count + 1,
+                    last_used_at=datetime.now(timezone.utc),
+                )
+                .returning(HedraImageAssetModel.hedra_asset_id)
+            )
+        ).scalar_one_or_none()
+        await db.commit()
+        return asset_id
+    except Exception as e:
+        # A broken mapping must never block generation; the image is uploaded
+        await db.rollback()
+        logger.error(f"Hedra image asset lookup failed: {e}")
+        return None
+
+
+async def lookup_voice_image_asset(
+    db: AsyncSession, voice_id: str
+) -> Optional[Tuple[str, str]]:
+    """
+    Return the Hedra asset ID and content hash of a voice's current image.
+
+    voice_service drops a voice's mappings when its image is replaced, so a
+    mapping left for the voice is for the image its lines point at, and the
+    image need not be downloaded to find it. The newest mapping wins.
+    """
+    newest = (
+        select(HedraImageAssetModel.id)
+        .where(HedraImageAssetModel.voice_id == voice_id)
+        .order_by(HedraImageAssetModel.created_at.desc())
+        .limit(1)
+        .scalar_subquery()
+    )
+    try:
+        asset = (
+            await db.execute(
+                update(HedraImageAssetModel)
+                .where(HedraImageAssetModel.id == newest)
+                .values(
+                    use_count=HedraImageAssetModel.use_count + 1,
+                    last_used_at=datetime.now(timezone.utc),
+                )
+                .returning(
+                    HedraImageAssetModel.hedra_asset_id,
+                    HedraImageAssetModel.content_hash,
+                )
+            )
+        ).one_or_none()
+        await db.commit()
+        return tuple(asset) if asset else None
+    except Exception as e:
+        await db.rollback()
+        logger.error(f"Hedra image asset lookup failed: {e}")
+        return None
+
+
+async def store_image_asset(
+    db: AsyncSession, voice_id: str, content_hash: str, hedra_asset_id: str
+) -> None:
+    """Remember the Hedra asset uploaded for a voice's image."""
+    try:
+        db.add(
+            HedraImageAssetModel(
+                voice_id=voice_id,
+                content_hash=content_hash,
+                hedra_asset_id=hedra_asset_id,
+                use_count=0,
+                created_at=datetime.now(timezone.utc),
+            )
+        )
+        await db.commit()
+    except IntegrityError:
+        # Another worker uploaded the same image first; its asset is kept
+        await db.rollback()
+    except Exception as e:
+        await db.rollback()
+        logger.error(f"Hedra image asset store failed: {e}")
+
+
+async def forget_image_asset(
+    db: AsyncSession, voice_id: str, content_hash: str
+) -> None:
+    """Drop a mapping whose asset Hedra no longer accepts."""
+    try:
+        await db.execute(
+            delete(HedraImageAssetModel).where(
+                HedraImageAssetModel.voice_id == voice_id,
+                HedraImageAssetModel.content_hash == content_hash,
+            )
+        )
+        await db.commit()
+    except Exception as e:
+        await db.rollback()
+        logger.error(f"Hedra image asset delete failed: {e}")
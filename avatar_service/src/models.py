@@ -1,5 +1,15 @@
 # /home/ubuntu/podcast_workflow_mvp/avatar_service/src/models.py
-from sqlalchemy import Column, String, Integer, Text, ForeignKey
+from sqlalchemy import (
+    Column,
+    String,
+    Integer,
+    Text,
+    ForeignKey,
+    DateTime,
+    Index,
+    UniqueConstraint,
+    text,
+)
 from .database import Base
 
 
@@ -14,6 +24,7 @@ class ScriptLineModel(Base):
     speaker_name = Column(String, nullable=True)  # Added for reference
     text = Column(Text, nullable=True)  # Added for reference
     line_order = Column(Integer, nullable=True)  # Added for reference
+    voice_id = Column(String, nullable=True)  # Keys the reused speaker image asset
     # Fields used by avatar service
     tts_status = Column(String, nullable=True)  # Status from previous step
     audio_file_path = Column(String, nullable=True)  # Path to the audio
@@ -25,6 +36,67 @@ class ScriptLineModel(Base):
     # For tracking job status
     avatar_job_id = Column(String, nullable=True)  # ID of the Hedra generation job
     avatar_asset_id = Column(String, nullable=True)  # ID of the Hedra video asset
+    # Held by the worker processing the line; expired leases are requeued
+    tts_lease_owner = Column(String, nullable=True)
+    tts_lease_expires_at = Column(DateTime(timezone=True), nullable=True)
+    avatar_lease_owner = Column(String, nullable=True)
+    avatar_lease_expires_at = Column(DateTime(timezone=True), nullable=True)
+
+
+class JobModel(Base):
+    __tablename__ = "jobs"
+    # Durable work queue shared by the TTS, avatar and stitch services
+    # Mirrored from tts_service.src.models.py
+    id = Column(Integer, primary_key=True, index=True)
+    queue = Column(String, nullable=False)  # tts, avatar, stitch
+    job_type = Column(String, nullable=False)  # Handler name within the queue
+    payload = Column(Text, nullable=False, default="{}")  # JSON arguments
+    # queued, running, complete, failed
+    status = Column(String, nullable=False, default="queued")
+    priority = Column(Integer, nullable=False, default=0)  # Higher runs first
+    attempts = Column(Integer, nullable=False, default=0)
+    max_attempts = Column(Integer, nullable=False, default=5)
+    run_at = Column(DateTime(timezone=True), nullable=False)  # Not claimed before
+    locked_by = Column(String, nullable=True)  # Worker holding the lease
+    locked_until = Column(DateTime(timezone=True), nullable=True)  # Lease expiry
+    dedupe_key = Column(String, nullable=True)  # At most one live job per key
+    last_error = Column(Text, nullable=True)
+    result = Column(Text, nullable=True)  # JSON returned by the handler
+    created_at = Column(DateTime(timezone=True), nullable=False)
+    started_at = Column(DateTime(timezone=True), nullable=True)  # First claimed
+    updated_at = Column(DateTime(timezone=True), nullable=False)
+
+    __table_args__ = (
+        # Serves the claim query: next due job of a queue by priority
+        Index("ix_jobs_claim", "queue", "status", "priority", "run_at"),
+        Index(
+            "ux_jobs_live_dedupe_key",
+            "dedupe_key",
+            unique=True,
+            postgresql_where=text("status IN ('queued', 'running')"),
+            sqlite_where=text("status IN ('queued', 'running')"),
+        ),
+    )
+
+
+class HedraImageAssetModel(Base):
+    __tablename__ = "hedra_image_assets"
+    # A speaker image already uploaded to Hedra, reused by every line of the
+    # voice while the image stays the same. Mirrored in voice_service, which
+    # drops a voice's rows when its image is replaced.
+    id = Column(Integer, primary_key=True, index=True)
+    voice_id = Column(String, nullable=False, index=True)
+    content_hash = Column(String(64), nullable=False)  # sha256 of the image bytes
+    hedra_asset_id = Column(String, nullable=False)
+    use_count = Column(Integer, nullable=False, default=0)  # Lines that reused it
+    created_at = Column(DateTime(timezone=True), nullable=False)
+    last_used_at = Column(DateTime(timezone=True), nullable=True)
+
+    __table_args__ = (
+        UniqueConstraint(
+            "voice_id", "content_hash", name="ux_hedra_image_assets_voice_hash"
+        ),
+    )
 
 
 # We might need to access ScriptModel to check when all lines of a script are done for stitching,
@@ -1,7 +1,8 @@
 import os
+import asyncio
 import logging
 import httpx
-from typing import Optional
+from typing import AsyncIterator, Optional
 from supabase import create_client, Client
 
 logger = logging.getLogger(__name__)
@@ -10,6 +11,48 @@ logger = logging.getLogger(__name__)
 SUPABASE_URL = os.getenv("SUPABASE_URL")
 SUPABASE_KEY = os.getenv("SUPABASE_KEY")
 
+# Streamed uploads wait this long for the next chunk or the server's reply
+STORAGE_UPLOAD_TIMEOUT = float(os.getenv("STORAGE_UPLOAD_TIMEOUT", "120"))
+
+# A clip moving from Hedra to storage holds at most this many chunks between
+# the download and the upload, whatever the size of the video
+VIDEO_TRANSFER_CHUNK_BYTES = int(os.getenv("VIDEO_TRANSFER_CHUNK_BYTES", "262144"))
+VIDEO_TRANSFER_BUFFER_CHUNKS = int(os.getenv("VIDEO_TRANSFER_BUFFER_CHUNKS", "4"))
+
+
+async def buffered_chunks(
+    chunks: AsyncIterator[bytes], max_chunks: int = VIDEO_TRANSFER_BUFFER_CHUNKS
+) -> AsyncIterator[bytes]:
+    """
+    Read chunks ahead of the consumer through a bounded queue.
+
+    The source keeps downloading while the consumer is busy sending, until
+    max_chunks are waiting; then it waits in turn. An error reading the
+    source is raised to the consumer.
+    """
+    queue: asyncio.Queue = asyncio.Queue(maxsize=max_chunks)
+    done = object()
+
+    async def read_ahead():
+        try:
+            async for chunk in chunks:
+                await queue.put(chunk)
+            await queue.put(done)
+        except Exception as e:
+            await queue.put(e)
+
+    reader = asyncio.create_task(read_ahead())
+    try:
+        while True:
+            item = await queue.get()
+            if item is done:
+                return
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        reader.cancel()
+
 
 class SupabaseStorage:
     def __init__(self):
@@ -19,6 +62,7 @@ class SupabaseStorage:
         self.supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
         self.audio_bucket = "podcast-audio"
         self.video_bucket = "podcast-video"
+        self._http: Optional[httpx.AsyncClient] = None
 
     def download_file(self, bucket_name: str, public_url: str) -> Optional[bytes]:
         """Download a file from Supabase Storage URL"""
@@ -67,6 +111,56 @@ class SupabaseStorage:
             logger.error(f"Error uploading {file_name} to Supabase: {str(e)}")
             return None
 
+    async def upload_stream(
+        self,
+        chunks: AsyncIterator[bytes],
+        file_name: str,
+        bucket_name: str = "podcast-video",
+        content_type: str = "video/mp4",
+        upsert: bool = False,
+    ) -> Optional[str]:
+        """
+        Upload a file to Supabase Storage while its content is still arriving.
+
+        The chunks are sent as a chunked request body straight to the storage
+        REST API, so the upload overlaps with whatever produces them and
+        memory stays at one chunk however long the file is.
+        Returns the public URL if successful, None if storage refuses the
+        upload. Errors producing the chunks or reaching storage are raised,
+        so the caller's retry sees the real cause.
+        """
+        if self._http is None:
+            self._http = httpx.AsyncClient(
+                base_url=f"{SUPABASE_URL.rstrip('/')}/storage/v1",
+                headers={
+                    "Authorization": f"Bearer {SUPABASE_KEY}",
+                    "apikey": SUPABASE_KEY,
+                },
+                timeout=STORAGE_UPLOAD_TIMEOUT,
+            )
+
+        response = await self._http.post(
+            f"/object/{bucket_name}/{file_name}",
+            content=chunks,
+            headers={
+                "Content-Type": content_type,
+                "x-upsert": "true" if upsert else "false",
+            },
+        )
+
+        if response.status_code == 200:
+            public_url = self.supabase.storage.from_(bucket_name).get_public_url(
+                file_name
+            )
+            logger.info(f"Successfully streamed {file_name} to Supabase Storage")
+            return public_url
+        else:
+            logger.error(
+                f"Failed to upload {file_name}: "
+                f"{response.status_code} {response.text[:200]}"
+            )
+            return None
+
     def delete_file(self, file_name: str, bucket_name: str = "podcast-video") -> bool:
         """
         Delete a file from Supabase Storage
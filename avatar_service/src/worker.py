@@ -0,0 +1,91 @@
+import logging
+from typing import Any, Dict
+
+from sqlalchemy import select
+
+from .database import AsyncSessionLocal
+from .jobs import JobError, PermanentJobError, run_worker
+from .line_leases import run_line_reaper
+from .models import ScriptLineModel
+from .avatar_processor import process_avatar_generation, process_avatar_lines
+from .hedra_service import hedra_http
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+AVATAR_QUEUE = "avatar"
+
+
+async def run_avatar_line(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """Upload a line's audio and image to Hedra and start its video job."""
+    line_id = payload["line_id"]
+    async with AsyncSessionLocal() as db:
+        if await db.get(ScriptLineModel, line_id) is None:
+            raise PermanentJobError(f"Script line {line_id} not found")
+
+        result = await process_avatar_generation(db=db, line_id=line_id)
+
+    if result.get("status") == "error":
+        raise JobError(result.get("message"))
+
+    # The clip itself is collected once Hedra finishes, by the status checks
+    return {
+        "generation_id": result.get("generation_id"),
+        "asset_id": result.get("asset_id"),
+    }
+
+
+async def run_avatar_script(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """Start avatar generation for the lines a script batch was queued for."""
+    script_id = payload["script_id"]
+    async with AsyncSessionLocal() as db:
+        lines = (
+            await db.execute(
+                select(
+                    ScriptLineModel.id,
+                    ScriptLineModel.avatar_status,
+                    ScriptLineModel.avatar_job_id,
+                )
+                .where(ScriptLineModel.id.in_(payload["line_ids"]))
+                .order_by(ScriptLineModel.line_order)
+            )
+        ).all()
+    # A retry skips lines already complete or already rendering on Hedra
+    line_ids = [
+        line.id
+        for line in lines
+        if line.avatar_status != "complete"
+        and not (line.avatar_status == "processing" and line.avatar_job_id)
+    ]
+
+    results = await process_avatar_lines(line_ids)
+
+    failed_count = sum(1 for result in results if result.get("status") == "error")
+    if failed_count:
+        raise JobError(
+            f"{failed_count} of {len(line_ids)} lines failed to start for "
+            f"script {script_id}"
+        )
+    return {"started_lines": len(line_ids)}
+
+
+JOB_HANDLERS = {
+    "avatar_line": run_avatar_line,
+    "avatar_script": run_avatar_script,
+}
+
+
+async def close_hedra_client() -> None:
+    """Log this worker's Hedra latencies and close its pooled connections."""
+    logger.info(f"Hedra latency: {hedra_http.stats()}")
+    await hedra_http.aclose()
+
+
+if __name__ == "__main__":
+    # Command: python -m src.worker
+    run_worker(
+        AVATAR_QUEUE,
+        JOB_HANDLERS,
+        background=[run_line_reaper],
+        on_shutdown=[close_hedra_client],
+    )
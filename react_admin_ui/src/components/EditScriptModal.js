@@ -44,14 +44,26 @@ function EditScriptModal({ script, onClose, onSuccess }) {
   const handleSaveEdit = async (lineId, newText) => {
     try {
       // Call the API to update the script line
-      await scriptService.updateScriptLine(lineId, newText);
+      const result = await scriptService.updateScriptLines(script.script_id, [
+        { lineId, text: newText }
+      ]);
+      const regenerate = new Set(result.regenerate_line_ids);
       
-      // Update local state after successful API call
+      // Update local state after successful API call; changed lines lose their audio and video
       setScriptDetails(prev => ({
         ...prev,
-        lines: prev.lines.map(line => 
-          line.line_id === lineId ? { ...line, text: newText } : line
-        )
+        lines: prev.lines.map(line => {
+          if (line.line_id !== lineId) return line;
+          if (!regenerate.has(lineId)) return { ...line, text: newText };
+          return {
+            ...line,
+            text: newText,
+            tts_status: 'pending',
+            audio_file_path: null,
+            avatar_status: 'pending',
+            video_file_path: null
+          };
+        })
       }));
       setEditingLine(null);
       
@@ -115,42 +127,17 @@ function EditScriptModal({ script, onClose, onSuccess }) {
 
     setFrameGenerationStatus({ isProcessing: true, failedLines: [] });
 
-    const results = {
-      successful: [],
-      failed: []
-    };
-
-    // Process each line individually with error handling
-    for (const line of readyLines) {
-      try {
-        await scriptService.processSingleLineFrame(line.line_id);
-        results.successful.push(line.line_id);
-        console.log(`Frame generation started for line ${line.line_id}`);
-      } catch (error) {
-        console.error(`Failed to start frame generation for line ${line.line_id}:`, error);
-        results.failed.push({ lineId: line.line_id, error: error.message });
-      }
-    }
-
-    // Update state with results
-    setFrameGenerationStatus({ 
-      isProcessing: results.successful.length > 0, 
-      failedLines: results.failed 
-    });
-
-    // Show results to user
-    if (results.successful.length > 0 && results.failed.length === 0) {
-      alert(`Frame generation started for all ${results.successful.length} lines!`);
-    } else if (results.successful.length > 0 && results.failed.length > 0) {
-      alert(`Frame generation started for ${results.successful.length} lines. ${results.failed.length} lines failed to start.`);
-    } else {
-      alert(`Failed to start frame generation for all lines. Please try again.`);
-      setFrameGenerationStatus({ isProcessing: false, failedLines: results.failed });
-    }
-
-    // Set up polling for successfully submitted lines
-    if (results.successful.length > 0) {
-      startBulkFramePolling(results.successful);
+    // One request queues the whole script; the avatar worker starts the lines
+    // concurrently within Hedra's rate limits
+    try {
+      const batch = await scriptService.generateScriptFrames(script.script_id);
+      console.log(`Frame generation batch ${batch.batch_id} ${batch.status} for ${batch.line_ids.length} lines`);
+      alert(`Frame generation started for all ${batch.line_ids.length} lines!`);
+      startBulkFramePolling(batch.line_ids);
+    } catch (error) {
+      console.error('Failed to start frame generation:', error);
+      alert(`Failed to start frame generation: ${error.message}`);
+      setFrameGenerationStatus({ isProcessing: false, failedLines: [] });
     }
 
     // Refresh script details regardless of results
@@ -201,50 +188,29 @@ function EditScriptModal({ script, onClose, onSuccess }) {
     fetchScriptDetails(true);
   };
 
-  // Bulk polling function for frame generation
+  // Bulk polling for frame generation, through the shared batched poll
   const startBulkFramePolling = (lineIds) => {
-    const pollInterval = 5000; // 5 seconds
     let activePollCount = lineIds.length;
 
-    const pollLineStatus = async (lineId) => {
-      try {
-        const status = await scriptService.getLineFrameStatus(lineId);
-        
-        // Check if line is still processing
-        if (status.status === 'processing') {
-          // Continue polling this line
-          setTimeout(() => pollLineStatus(lineId), pollInterval);
-        } else {
-          // Line completed (success or failure)
-          activePollCount--;
-          console.log(`Line ${lineId} frame generation completed with status: ${status.status}`);
-          
-          // Refresh script details when any line completes
-          fetchScriptDetails(true);
-          
-          // If all lines are done, update processing status
-          if (activePollCount === 0) {
-            console.log('All bulk frame generation jobs completed');
-            setFrameGenerationStatus(prev => ({ ...prev, isProcessing: false }));
-          }
-        }
-      } catch (error) {
-        console.error(`Error polling frame status for line ${lineId}:`, error);
+    lineIds.forEach(lineId => {
+      const stopWatching = scriptService.watchLineStatus('avatar', lineId, (status) => {
+        // Keep watching while the line is still queued or processing
+        if (status.status === 'queued' || status.status === 'processing') return;
+
+        // Line completed (success or failure)
+        stopWatching();
         activePollCount--;
-        
-        // Still refresh on error in case other services updated the status
+        console.log(`Line ${lineId} frame generation completed with status: ${status.status}`);
+
+        // Refresh script details when any line completes
         fetchScriptDetails(true);
-        
-        // Update processing status if all polling is done
+
+        // If all lines are done, update processing status
         if (activePollCount === 0) {
+          console.log('All bulk frame generation jobs completed');
           setFrameGenerationStatus(prev => ({ ...prev, isProcessing: false }));
         }
-      }
-    };
-
-    // Start polling for each line
-    lineIds.forEach(lineId => {
-      setTimeout(() => pollLineStatus(lineId), pollInterval);
+      });
     });
   };
 
@@ -287,9 +253,13 @@ function EditScriptModal({ script, onClose, onSuccess }) {
   const handleStitchVideo = async () => {
     setIsStitching(true);
     try {
-      const result = await scriptService.processStitch(script.script_id);
+      const queued = await scriptService.processStitch(script.script_id);
+      setStitchStatus(queued);
+
+      // Stitching runs on a worker; wait for its job to finish
+      const result = await scriptService.waitForStitchJob(queued.job_id);
       setStitchStatus(result);
-      
+
       if (result.status === 'complete') {
         alert('Final video created successfully!');
         // Refresh script details to update status
@@ -5,6 +5,8 @@ import { API_CONFIG } from '../config';
 
 function EpisodesPanel() {
   const [episodes, setEpisodes] = useState([]);
+  const [nextCursor, setNextCursor] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [loading, setLoading] = useState(false);
   const [error, setError] = useState(null);
   
@@ -19,8 +21,9 @@ function EpisodesPanel() {
     
     try {
       // Fetch scripts with status "complete"
-      const data = await scriptService.getScripts('complete');
-      setEpisodes(data);
+      const page = await scriptService.getScripts('complete', { includeCounts: true });
+      setEpisodes(page.scripts);
+      setNextCursor(page.nextCursor);
     } catch (err) {
       console.error('Failed to fetch episodes:', err);
       setError('Failed to load episodes. Please check if the script service is running.');
@@ -29,6 +32,24 @@ function EpisodesPanel() {
     }
   };
 
+  const fetchMoreEpisodes = async () => {
+    setLoadingMore(true);
+
+    try {
+      const page = await scriptService.getScripts('complete', {
+        includeCounts: true,
+        afterId: nextCursor
+      });
+      setEpisodes(prev => [...prev, ...page.scripts]);
+      setNextCursor(page.nextCursor);
+    } catch (err) {
+      console.error('Failed to fetch more episodes:', err);
+      setError('Failed to load more episodes. Please check if the script service is running.');
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   const handleDownload = (scriptId, title) => {
     const downloadUrl = `${API_CONFIG.STITCH_SERVICE}/stitch/download/${scriptId}`;
     const link = document.createElement('a');
@@ -144,6 +165,14 @@ function EpisodesPanel() {
             })}
           </div>
         )}
+
+        {!loading && !error && nextCursor && (
+          <div className="load-more">
+            <button onClick={fetchMoreEpisodes} className="btn-secondary" disabled={loadingMore}>
+              {loadingMore ? <Loader className="spin" size={16} /> : 'Load more'}
+            </button>
+          </div>
+        )}
       </div>
     </div>
   );
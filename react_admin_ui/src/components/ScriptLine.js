@@ -12,12 +12,33 @@ function ScriptLine({ line, index, isEditing, onEdit, onSave, onCancel, onStatus
   const [isRegeneratingFrame, setIsRegeneratingFrame] = useState(false);
   const [frameStatus, setFrameStatus] = useState(line.avatar_status || 'pending');
   const audioRef = useRef(null);
+  // Stop functions for this line's status watches, cleared on unmount
+  const stopWatchingRef = useRef({});
 
   useEffect(() => {
     setTtsStatus(line.tts_status || 'pending');
     setFrameStatus(line.avatar_status || 'pending');
   }, [line.tts_status, line.avatar_status]);
 
+  useEffect(() => {
+    const stopWatching = stopWatchingRef.current;
+    return () => Object.values(stopWatching).forEach(stop => stop());
+  }, []);
+
+  // Follow a status through the shared batched poll; one watch per kind
+  const watchStatus = (kind, onStatus) => {
+    if (stopWatchingRef.current[kind]) stopWatchingRef.current[kind]();
+    const stop = scriptService.watchLineStatus(kind, line.line_id, onStatus);
+    const stopWatching = () => {
+      stop();
+      if (stopWatchingRef.current[kind] === stopWatching) {
+        delete stopWatchingRef.current[kind];
+      }
+    };
+    stopWatchingRef.current[kind] = stopWatching;
+    return stopWatching;
+  };
+
   const handleSave = () => {
     if (editText.trim() !== line.text) {
       onSave(editText);
@@ -70,27 +91,22 @@ function ScriptLine({ line, index, isEditing, onEdit, onSave, onCancel, onStatus
   const handleRegenerateTTS = async () => {
     setIsRegenerating(true);
     try {
-      await scriptService.processSingleLineTTS(line.line_id);
-      setTtsStatus('processing');
+      // Regenerating finished audio asks for a new take rather than the cached one
+      const job = await scriptService.processSingleLineTTS(line.line_id, {
+        bypassCache: ttsStatus === 'complete',
+      });
+      setTtsStatus(job.status === 'running' ? 'processing' : 'queued');
       
-      // Poll for completion
-      const pollStatus = async () => {
-        try {
-          const status = await scriptService.getLineTTSStatus(line.line_id);
-          setTtsStatus(status.tts_status);
-          
-          if (status.tts_status === 'processing') {
-            setTimeout(pollStatus, 2000); // Poll every 2 seconds
-          } else {
-            // Notify parent to refresh data
-            if (onStatusUpdate) onStatusUpdate();
-          }
-        } catch (error) {
-          console.error('Error polling TTS status:', error);
+      // Watch for completion
+      const stopWatching = watchStatus('tts', (status) => {
+        setTtsStatus(status.tts_status);
+
+        if (status.tts_status !== 'queued' && status.tts_status !== 'processing') {
+          stopWatching();
+          // Notify parent to refresh data
+          if (onStatusUpdate) onStatusUpdate();
         }
-      };
-      
-      setTimeout(pollStatus, 2000);
+      });
     } catch (error) {
       console.error('Error regenerating TTS:', error);
       alert(`Failed to regenerate TTS: ${error.message}`);
@@ -102,8 +118,8 @@ function ScriptLine({ line, index, isEditing, onEdit, onSave, onCancel, onStatus
   const handleRegenerateFrame = async () => {
     setIsRegeneratingFrame(true);
     try {
-      await scriptService.processSingleLineFrame(line.line_id);
-      setFrameStatus('processing');
+      const job = await scriptService.processSingleLineFrame(line.line_id);
+      setFrameStatus(job.status === 'running' ? 'processing' : 'queued');
       
       // Start polling for completion with better error handling
       startFrameStatusPolling();
@@ -116,59 +132,28 @@ function ScriptLine({ line, index, isEditing, onEdit, onSave, onCancel, onStatus
     }
   };
 
-  // Separate polling function with better error handling
+  // Watch frame generation until it finishes or polling times out
   const startFrameStatusPolling = () => {
-    const pollInterval = 5000; // 5 seconds
     let pollAttempts = 0;
     const maxPollAttempts = 60; // Max 5 minutes of polling
-    let consecutiveErrors = 0;
-    const maxConsecutiveErrors = 3;
 
-    const pollFrameStatus = async () => {
-      try {
-        const status = await scriptService.getLineFrameStatus(line.line_id);
-        consecutiveErrors = 0; // Reset error count on success
-        setFrameStatus(status.status);
-        
-        if (status.status === 'processing' && pollAttempts < maxPollAttempts) {
-          pollAttempts++;
-          setTimeout(pollFrameStatus, pollInterval);
-        } else {
-          // Notify parent to refresh data when complete or max attempts reached
-          if (onStatusUpdate) onStatusUpdate();
-          
-          if (pollAttempts >= maxPollAttempts && status.status === 'processing') {
-            console.warn(`Polling timeout for line ${line.line_id} after ${maxPollAttempts} attempts`);
-            // Try to sync stuck job
-            tryToSyncStuckJob();
-          }
-        }
-      } catch (error) {
-        console.error('Error polling frame status:', error);
-        pollAttempts++;
-        consecutiveErrors++;
-        
-        // If too many consecutive errors, stop polling
-        if (consecutiveErrors >= maxConsecutiveErrors) {
-          console.error(`Too many consecutive errors for line ${line.line_id}, stopping polling`);
-          // Try to sync stuck job as a fallback
-          tryToSyncStuckJob();
-          return;
-        }
-        
-        // Continue polling on error up to max attempts (network issues might be temporary)
-        if (pollAttempts < maxPollAttempts) {
-          setTimeout(pollFrameStatus, pollInterval * Math.pow(2, consecutiveErrors)); // Exponential backoff
-        } else {
-          console.error(`Max polling attempts reached for line ${line.line_id}`);
-          // Try to sync stuck job as a fallback
-          tryToSyncStuckJob();
-        }
-      }
-    };
+    const stopWatching = watchStatus('avatar', (status) => {
+      setFrameStatus(status.status);
+      pollAttempts++;
 
-    // Start polling after initial delay
-    setTimeout(pollFrameStatus, pollInterval);
+      const inProgress = status.status === 'queued' || status.status === 'processing';
+      if (inProgress && pollAttempts < maxPollAttempts) return;
+
+      stopWatching();
+      // Notify parent to refresh data when complete or max attempts reached
+      if (onStatusUpdate) onStatusUpdate();
+
+      if (inProgress) {
+        console.warn(`Polling timeout for line ${line.line_id} after ${maxPollAttempts} attempts`);
+        // Try to sync stuck job
+        tryToSyncStuckJob();
+      }
+    });
   };
 
   // Helper function to try syncing stuck jobs
@@ -221,6 +206,13 @@ function ScriptLine({ line, index, isEditing, onEdit, onSave, onCancel, onStatus
             <span className="status-label">TTS Complete</span>
           </div>
         );
+      case 'queued':
+        return (
+          <div className="status-indicator status-processing" title="Waiting for a TTS worker">
+            <div className="spinner" />
+            <span className="status-label">TTS Queued</span>
+          </div>
+        );
       case 'processing':
         return (
           <div className="status-indicator status-processing" title="Processing TTS">
@@ -265,6 +257,13 @@ function ScriptLine({ line, index, isEditing, onEdit, onSave, onCancel, onStatus
             <span className="status-label">Frame Ready</span>
           </div>
         );
+      case 'queued':
+        return (
+          <div className="status-indicator status-processing" title="Waiting for an avatar worker">
+            <div className="spinner" />
+            <span className="status-label">Frame Queued</span>
+          </div>
+        );
       case 'processing':
         return (
           <div className="status-indicator status-processing" title="Processing Frame">
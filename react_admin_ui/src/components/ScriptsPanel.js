@@ -9,6 +9,8 @@ import EditScriptModal from './EditScriptModal';
 function ScriptsPanel() {
   const [characters, setCharacters] = useState([]);
   const [scripts, setScripts] = useState([]);
+  const [nextCursor, setNextCursor] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [selectedScript, setSelectedScript] = useState(null);
   const [loading, setLoading] = useState(false);
   const [error, setError] = useState(null);
@@ -36,8 +38,9 @@ function ScriptsPanel() {
     setError(null);
     
     try {
-      const data = await scriptService.getScripts();
-      setScripts(data);
+      const page = await scriptService.getScripts();
+      setScripts(page.scripts);
+      setNextCursor(page.nextCursor);
     } catch (err) {
       console.error('Failed to fetch scripts:', err);
       setError('Failed to load scripts. Please check if the script service is running.');
@@ -45,6 +48,21 @@ function ScriptsPanel() {
       setLoading(false);
     }
   };
+
+  const fetchMoreScripts = async () => {
+    setLoadingMore(true);
+
+    try {
+      const page = await scriptService.getScripts(null, { afterId: nextCursor });
+      setScripts(prev => [...prev, ...page.scripts]);
+      setNextCursor(page.nextCursor);
+    } catch (err) {
+      console.error('Failed to fetch more scripts:', err);
+      setError('Failed to load more scripts. Please check if the script service is running.');
+    } finally {
+      setLoadingMore(false);
+    }
+  };
   
   const handleViewScript = (script) => {
     setSelectedScript(script);
@@ -126,6 +144,14 @@ function ScriptsPanel() {
         </div>
       )}
 
+      {!loading && nextCursor && (
+        <div className="load-more">
+          <button onClick={fetchMoreScripts} className="btn-secondary" disabled={loadingMore}>
+            {loadingMore ? <Loader className="spin" size={16} /> : 'Load more'}
+          </button>
+        </div>
+      )}
+
       {/* Create Script Modal */}
       {showCreateModal && (
         <CreateScriptModal
@@ -5,24 +5,101 @@ const TTS_BASE_URL = API_CONFIG.TTS_SERVICE;
 const AVATAR_BASE_URL = API_CONFIG.AVATAR_SERVICE;
 const STITCH_BASE_URL = API_CONFIG.STITCH_SERVICE;
 
+// Last script details and ETag per script, for conditional polling
+const scriptDetailsCache = new Map();
+
+// Lines being watched for status changes, per service. Every watched line
+// shares one batched request per interval, however many lines are open.
+const lineStatusWatchers = {
+  tts: {
+    url: `${TTS_BASE_URL}/tts/line-status:batch`,
+    interval: 2000,
+    callbacks: new Map(),
+    timer: null,
+  },
+  avatar: {
+    url: `${AVATAR_BASE_URL}/avatar/status:batch`,
+    interval: 5000,
+    callbacks: new Map(),
+    timer: null,
+  },
+};
+
+// Fetch statuses for many lines at once, by line IDs or for a whole script
+const fetchLineStatuses = async (url, { lineIds, scriptId }) => {
+  const response = await fetch(url, {
+    method: 'POST',
+    headers: {
+      'Content-Type': 'application/json',
+    },
+    body: JSON.stringify(scriptId != null ? { script_id: scriptId } : { line_ids: lineIds }),
+  });
+
+  if (!response.ok) {
+    const errorData = await response.json();
+    throw new Error(errorData.detail || `HTTP error! status: ${response.status}`);
+  }
+
+  return (await response.json()).lines;
+};
+
+const pollWatchedLines = async (watcher) => {
+  watcher.timer = null;
+  if (watcher.callbacks.size === 0) return;
+
+  try {
+    const lines = await fetchLineStatuses(watcher.url, {
+      lineIds: [...watcher.callbacks.keys()],
+    });
+    lines.forEach(status => {
+      const callbacks = watcher.callbacks.get(status.line_id);
+      if (callbacks) [...callbacks].forEach(callback => callback(status));
+    });
+  } catch (error) {
+    // Keep watching; the next poll may well succeed
+    console.error('Error polling line statuses:', error);
+  }
+
+  if (watcher.callbacks.size > 0 && !watcher.timer) {
+    watcher.timer = setTimeout(() => pollWatchedLines(watcher), watcher.interval);
+  }
+};
+
 export const scriptService = {
-  // Fetch all scripts
-  async getScripts(status = null) {
-    const url = status ? `${BASE_URL}/scripts?status=${status}` : `${BASE_URL}/scripts`;
-    const response = await fetch(url);
+  // Fetch one page of scripts; pass the returned nextCursor as afterId for the next page
+  async getScripts(status = null, { includeCounts = false, afterId = null } = {}) {
+    const params = new URLSearchParams();
+    if (status) params.set('status', status);
+    if (includeCounts) params.set('include_counts', 'true');
+    if (afterId) params.set('after_id', afterId);
+
+    const response = await fetch(`${BASE_URL}/scripts?${params.toString()}`);
     if (!response.ok) {
       throw new Error(`Error fetching scripts: ${response.statusText}`);
     }
-    return response.json();
+    const scripts = await response.json();
+    return { scripts, nextCursor: response.headers.get('X-Next-Cursor') };
   },
 
-  // Fetch a specific script with details
+  // Fetch a specific script with details, revalidating with its ETag
   async getScript(scriptId) {
-    const response = await fetch(`${BASE_URL}/scripts/${scriptId}`);
+    const cached = scriptDetailsCache.get(scriptId);
+    const headers = cached ? { 'If-None-Match': cached.etag } : {};
+    const response = await fetch(`${BASE_URL}/scripts/${scriptId}`, { headers });
+
+    if (response.status === 304 && cached) {
+      return cached.data;
+    }
     if (!response.ok) {
       throw new Error(`Error fetching script details: ${response.statusText}`);
     }
-    return response.json();
+
+    const data = await response.json();
+    const etag = response.headers.get('ETag');
+    if (etag) {
+      scriptDetailsCache.set(scriptId, { etag, data });
+    }
+    return data;
   },
 
   // Create a new script
@@ -61,6 +138,26 @@ export const scriptService = {
     return response.json();
   },
 
+  // Apply several line edits at once; returns the lines that need new audio/video
+  async updateScriptLines(scriptId, edits) {
+    const response = await fetch(`${BASE_URL}/scripts/${scriptId}/lines`, {
+      method: 'PATCH',
+      headers: {
+        'Content-Type': 'application/json',
+      },
+      body: JSON.stringify({
+        edits: edits.map(({ lineId, text }) => ({ line_id: lineId, text })),
+      }),
+    });
+
+    if (!response.ok) {
+      const errorData = await response.json();
+      throw new Error(errorData.detail || `HTTP error! status: ${response.status}`);
+    }
+
+    return response.json();
+  },
+
   // Update a script line (placeholder for future implementation)
   async updateScriptLine(lineId, newText) {
     try {
@@ -107,10 +204,11 @@ export const scriptService = {
 
   // TTS Service Functions
   
-  // Process TTS for a single line
-  async processSingleLineTTS(lineId) {
+  // Process TTS for a single line; bypassCache renders a fresh take of unchanged text
+  async processSingleLineTTS(lineId, { bypassCache = false } = {}) {
     try {
-      const response = await fetch(`${TTS_BASE_URL}/tts/process-line/${lineId}`, {
+      const query = bypassCache ? '?bypass_cache=true' : '';
+      const response = await fetch(`${TTS_BASE_URL}/tts/process-line/${lineId}${query}`, {
         method: 'POST',
         headers: {
           'Content-Type': 'application/json',
@@ -146,6 +244,11 @@ export const scriptService = {
     }
   },
 
+  // Get TTS status for many lines: { lineIds } or { scriptId }
+  async getLinesTTSStatus(selection) {
+    return fetchLineStatuses(lineStatusWatchers.tts.url, selection);
+  },
+
   // Get audio URL for a line
   getAudioUrl(lineId) {
     return `${TTS_BASE_URL}/tts/audio/${lineId}`;
@@ -175,6 +278,28 @@ export const scriptService = {
     }
   },
 
+  // Queue frame generation for every ready line of a script; returns the batch
+  async generateScriptFrames(scriptId) {
+    try {
+      const response = await fetch(`${AVATAR_BASE_URL}/avatar/generate-script/${scriptId}`, {
+        method: 'POST',
+        headers: {
+          'Content-Type': 'application/json',
+        },
+      });
+
+      if (!response.ok) {
+        const errorData = await response.json();
+        throw new Error(errorData.detail || `HTTP error! status: ${response.status}`);
+      }
+
+      return await response.json();
+    } catch (error) {
+      console.error('Error processing script frame generation:', error);
+      throw error;
+    }
+  },
+
   // Get frame generation status for a line
   async getLineFrameStatus(lineId) {
     try {
@@ -192,6 +317,29 @@ export const scriptService = {
     }
   },
 
+  // Get frame generation status for many lines: { lineIds } or { scriptId }
+  async getLinesFrameStatus(selection) {
+    return fetchLineStatuses(lineStatusWatchers.avatar.url, selection);
+  },
+
+  // Call onStatus with a line's 'tts' or 'avatar' status on every poll until
+  // the returned function is called
+  watchLineStatus(kind, lineId, onStatus) {
+    const watcher = lineStatusWatchers[kind];
+    if (!watcher.callbacks.has(lineId)) watcher.callbacks.set(lineId, new Set());
+    watcher.callbacks.get(lineId).add(onStatus);
+    if (!watcher.timer) {
+      watcher.timer = setTimeout(() => pollWatchedLines(watcher), watcher.interval);
+    }
+
+    return () => {
+      const callbacks = watcher.callbacks.get(lineId);
+      if (!callbacks) return;
+      callbacks.delete(onStatus);
+      if (callbacks.size === 0) watcher.callbacks.delete(lineId);
+    };
+  },
+
   // Get video URL for a line
   getVideoUrl(lineId) {
     return `${AVATAR_BASE_URL}/avatar/video/${lineId}`;
@@ -243,6 +391,32 @@ export const scriptService = {
     }
   },
 
+  // Poll a stitch job until its worker finishes it
+  async waitForStitchJob(jobId, pollInterval = 5000) {
+    for (;;) {
+      const response = await fetch(`${STITCH_BASE_URL}/stitch/jobs/${jobId}`);
+
+      if (!response.ok) {
+        const errorData = await response.json();
+        throw new Error(errorData.detail || `HTTP error! status: ${response.status}`);
+      }
+
+      const job = await response.json();
+      if (job.status === 'complete') {
+        return {
+          status: 'complete',
+          message: 'Final video created',
+          final_video_path: job.result && job.result.final_video_path,
+        };
+      }
+      if (job.status === 'failed') {
+        return { status: 'error', message: job.last_error || 'Stitching failed' };
+      }
+
+      await new Promise(resolve => setTimeout(resolve, pollInterval));
+    }
+  },
+
   // Get final video URL for download
   getFinalVideoUrl(scriptId) {
     return `${STITCH_BASE_URL}/stitch/download/${scriptId}`;
@@ -35,6 +35,8 @@ export const getStatusColor = (status) => {
     case 'complete': return '#2e7d32';
     case 'processing': return '#f57c00';
     case 'tts_processing': return '#1976d2';
+    case 'tts_complete': return '#2e7d32';
+    case 'tts_failed': return '#d32f2f';
     case 'failed': return '#d32f2f';
     default: return '#7f8c8d';
   }
@@ -0,0 +1,163 @@
+"""
+Benchmark GET /scripts/{id} throughput with sync and async database sessions.
+
+Fires concurrent requests at the script service app in-process and compares
+the old handler (an async endpoint querying through the synchronous
+SessionLocal, which blocks the event loop) with the current one on the async
+engine. Point it at the same database the service uses to see real
+round-trip costs:
+
+    cd script_service
+    DATABASE_URL=postgresql://... python -m benchmarks.bench_async_db
+
+--query-delay adds a server-side pg_sleep to every query (Postgres only) to
+emulate a slow Supabase round trip. Rows created by the benchmark are deleted
+when it finishes.
+"""
+
+import argparse
+import asyncio
+import os
+import time
+
+import httpx
+from fastapi import Depends, HTTPException
+from sqlalchemy import insert, text
+
+
+def make_script(db, ScriptModel, ScriptLineModel, line_count):
+    script = ScriptModel(
+        title="benchmark-async-db",
+        length_minutes=1,
+        format_type="interview",
+        raw_script_json="[]",
+        status="benchmark",
+    )
+    db.add(script)
+    db.flush()
+    db.execute(
+        insert(ScriptLineModel),
+        [
+            {
+                "script_id": script.id,
+                "speaker_role": "host",
+                "speaker_name": "Host",
+                "text": f"Benchmark line {i}",
+                "voice_id": "benchmark-voice",
+                "line_order": i,
+            }
+            for i in range(line_count)
+        ],
+    )
+    db.commit()
+    return script.id
+
+
+async def run_load(client, path, requests, concurrency):
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with semaphore:
+            response = await client.get(path)
+            response.raise_for_status()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(requests)))
+    return requests / (time.perf_counter() - start)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        "--database-url",
+        default=os.getenv("DATABASE_URL", "sqlite:///benchmark_scripts.db"),
+    )
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 10, 50])
+    parser.add_argument("--lines", type=int, default=50)
+    parser.add_argument("--query-delay", type=float, default=0.0)
+    args = parser.parse_args()
+
+    # The app reads DATABASE_URL at import time
+    os.environ["DATABASE_URL"] = args.database_url
+    from src.database import SessionLocal, async_engine
+    from src.main import app, get_script_status
+    from src.models import ScriptModel, ScriptLineModel
+
+    delay = args.query_delay if args.database_url.startswith("postgres") else 0.0
+
+    @app.get("/benchmark/sync-scripts/{script_id}")
+    async def sync_script_status(script_id: int):
+        """The original handler: sync session queries inside an async endpoint."""
+        # Closed here rather than by get_db, whose teardown runs in the
+        # threadpool and would starve the pool at high concurrency
+        db = SessionLocal()
+        try:
+            if delay:
+                db.execute(text("SELECT pg_sleep(:delay)"), {"delay": delay})
+            db_script = (
+                db.query(ScriptModel).filter(ScriptModel.id == script_id).first()
+            )
+            if not db_script:
+                raise HTTPException(status_code=404, detail="Script not found")
+            lines = (
+                db.query(ScriptLineModel)
+                .filter(ScriptLineModel.script_id == script_id)
+                .order_by(ScriptLineModel.line_order)
+                .all()
+            )
+            return {"script_id": db_script.id, "lines": len(lines)}
+        finally:
+            db.close()
+
+    if delay:
+        from src.database import get_async_db
+
+        @app.get("/benchmark/async-scripts/{script_id}")
+        async def async_script_status(script_id: int, db=Depends(get_async_db)):
+            """The current handler plus the same emulated latency."""
+            await db.execute(text("SELECT pg_sleep(:delay)"), {"delay": delay})
+            return await get_script_status(script_id, db)
+
+    db = SessionLocal()
+    script_id = make_script(db, ScriptModel, ScriptLineModel, args.lines)
+    async_path = (
+        f"/benchmark/async-scripts/{script_id}" if delay else f"/scripts/{script_id}"
+    )
+
+    print(
+        f"{'concurrency':>11} {'sync (req/s)':>13} {'async (req/s)':>14} {'speedup':>8}"
+    )
+    try:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://benchmark"
+        ) as client:
+            for concurrency in args.concurrency:
+                sync_rps = await run_load(
+                    client,
+                    f"/benchmark/sync-scripts/{script_id}",
+                    args.requests,
+                    concurrency,
+                )
+                async_rps = await run_load(
+                    client, async_path, args.requests, concurrency
+                )
+                print(
+                    f"{concurrency:>11} {sync_rps:>13.1f} {async_rps:>14.1f} "
+                    f"{async_rps / sync_rps:>7.1f}x"
+                )
+    finally:
+        db.query(ScriptLineModel).filter(ScriptLineModel.script_id == script_id).delete(
+            synchronize_session=False
+        )
+        db.query(ScriptModel).filter(ScriptModel.id == script_id).delete(
+            synchronize_session=False
+        )
+        db.commit()
+        db.close()
+        await async_engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
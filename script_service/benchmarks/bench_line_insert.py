@@ -0,0 +1,127 @@
+"""
+Benchmark per-script insert latency against line count.
+
+Compares the old per-line add/commit/refresh loop with the single-transaction
+bulk insert used by POST /scripts. Point it at the same database the service
+uses to see real round-trip costs:
+
+    cd script_service
+    DATABASE_URL=postgresql://... python -m benchmarks.bench_line_insert
+
+Rows created by the benchmark are deleted when it finishes.
+"""
+
+import argparse
+import os
+import time
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+
+from src.models import Base, ScriptModel, ScriptLineModel
+
+
+def make_rows(line_count):
+    return [
+        {
+            "speaker_role": "host" if i % 2 == 0 else "guest1",
+            "speaker_name": "Host" if i % 2 == 0 else "Guest",
+            "text": f"Benchmark line {i} with a typical amount of dialogue text.",
+            "voice_id": "benchmark-voice",
+            "line_order": i,
+        }
+        for i in range(line_count)
+    ]
+
+
+def new_script(line_count):
+    return ScriptModel(
+        title=f"benchmark-{line_count}",
+        length_minutes=1,
+        format_type="interview",
+        raw_script_json="[]",
+        status="benchmark",
+    )
+
+
+def insert_per_line(db, rows):
+    """The original create_script behaviour: commit and refresh every line."""
+    db_script = new_script(len(rows))
+    db.add(db_script)
+    db.commit()
+    db.refresh(db_script)
+
+    for row in rows:
+        db_line = ScriptLineModel(script_id=db_script.id, **row)
+        db.add(db_line)
+        db.commit()
+        db.refresh(db_line)
+
+    return db_script.id
+
+
+def insert_bulk(db, rows):
+    """The current create_script behaviour: one transaction, one executemany."""
+    db_script = new_script(len(rows))
+    db.add(db_script)
+    db.flush()
+    db.execute(
+        insert(ScriptLineModel), [{**row, "script_id": db_script.id} for row in rows]
+    )
+    db.commit()
+    return db_script.id
+
+
+def cleanup(db, script_ids):
+    db.query(ScriptLineModel).filter(ScriptLineModel.script_id.in_(script_ids)).delete(
+        synchronize_session=False
+    )
+    db.query(ScriptModel).filter(ScriptModel.id.in_(script_ids)).delete(
+        synchronize_session=False
+    )
+    db.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        "--database-url",
+        default=os.getenv("DATABASE_URL", "sqlite:///benchmark_scripts.db"),
+    )
+    parser.add_argument("--lines", type=int, nargs="+", default=[25, 50, 100, 200, 400])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    engine = create_engine(args.database_url)
+    Base.metadata.create_all(bind=engine)
+    SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+    script_ids = []
+    print(f"{'lines':>6} {'per-line (ms)':>14} {'bulk (ms)':>10} {'speedup':>8}")
+
+    db = SessionLocal()
+    try:
+        for line_count in args.lines:
+            rows = make_rows(line_count)
+            timings = {}
+            for name, fn in (("per_line", insert_per_line), ("bulk", insert_bulk)):
+                best = None
+                for _ in range(args.repeat):
+                    start = time.perf_counter()
+                    script_ids.append(fn(db, rows))
+                    elapsed = (time.perf_counter() - start) * 1000
+                    best = elapsed if best is None else min(best, elapsed)
+                timings[name] = best
+
+            print(
+                f"{line_count:>6} {timings['per_line']:>14.1f} "
+                f"{timings['bulk']:>10.1f} "
+                f"{timings['per_line'] / timings['bulk']:>7.1f}x"
+            )
+    finally:
+        cleanup(db, script_ids)
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
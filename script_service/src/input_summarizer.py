@@ -0,0 +1,243 @@
+import os
+import re
+import socket
+import asyncio
+import logging
+import ipaddress
+from html.parser import HTMLParser
+from typing import Awaitable, Callable, Dict, List
+from urllib.parse import urljoin, urlsplit
+
+import httpx
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Rough size of a token in characters for English text
+CHARS_PER_TOKEN = 4
+
+# Tags whose text never belongs in an article body
+SKIPPED_TAGS = {"script", "style", "noscript", "nav", "header", "footer", "aside"}
+
+# Tags that start a new line of text
+BLOCK_TAGS = {"p", "div", "br", "li", "h1", "h2", "h3", "h4", "h5", "h6", "tr"}
+
+# Article URLs come from users, so fetches are limited to public web pages of
+# a bounded size
+ARTICLE_MAX_BYTES = int(os.getenv("ARTICLE_MAX_BYTES", str(5 * 1024 * 1024)))
+ARTICLE_MAX_REDIRECTS = int(os.getenv("ARTICLE_MAX_REDIRECTS", "5"))
+ARTICLE_CONTENT_TYPES = ("text/html", "application/xhtml+xml", "text/plain")
+
+
+class ArticleFetchError(Exception):
+    """An article URL was refused or its response was not a usable page."""
+
+
+def estimate_tokens(text: str) -> int:
+    """Approximate the token count of a text."""
+    return len(text) // CHARS_PER_TOKEN
+
+
+def cap_to_token_budget(text: str, max_tokens: int) -> str:
+    """Trim a text to at most max_tokens, cutting at a paragraph or line if possible."""
+    max_chars = max_tokens * CHARS_PER_TOKEN
+    if len(text) <= max_chars:
+        return text
+
+    capped = text[:max_chars]
+    cut = max(capped.rfind("\n\n"), capped.rfind("\n"))
+    if cut > max_chars // 2:
+        capped = capped[:cut]
+    return capped.rstrip() + "\n[truncated]"
+
+
+def combine_questionnaire_answers(questionnaire_answers: List[Dict[str, str]]) -> str:
+    """Join every questionnaire answer into one text, keeping the questions."""
+    parts = []
+    for item in questionnaire_answers or []:
+        answer = (item.get("answer") or "").strip()
+        if not answer:
+            continue
+        question = (item.get("question") or "").strip()
+        parts.append(f"Q: {question}\nA: {answer}" if question else answer)
+    return "\n\n".join(parts)
+
+
+class _ArticleTextExtractor(HTMLParser):
+    """Collects the visible text of an HTML page, one block per line."""
+
+    def __init__(self):
+        super().__init__()
+        self._parts: List[str] = []
+        self._skip_depth = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in SKIPPED_TAGS:
+            self._skip_depth += 1
+        elif tag in BLOCK_TAGS:
+            self._parts.append("\n")
+
+    def handle_endtag(self, tag):
+        if tag in SKIPPED_TAGS and self._skip_depth:
+            self._skip_depth -= 1
+        elif tag in BLOCK_TAGS:
+            self._parts.append("\n")
+
+    def handle_data(self, data):
+        if not self._skip_depth:
+            self._parts.append(data)
+
+    def text(self) -> str:
+        lines = (
+            re.sub(r"\s+", " ", line).strip()
+            for line in "".join(self._parts).split("\n")
+        )
+        return "\n".join(line for line in lines if line)
+
+
+def html_to_text(html: str) -> str:
+    """Strip markup, scripts and page chrome from an HTML document."""
+    extractor = _ArticleTextExtractor()
+    extractor.feed(html)
+    extractor.close()
+    return extractor.text()
+
+
+async def check_article_url(url: str) -> None:
+    """
+    Refuse URLs that are not http(s) or whose host resolves to a private,
+    loopback, link-local or otherwise non-public address.
+
+    Raises:
+        ArticleFetchError: If the URL may not be fetched
+    """
+    parts = urlsplit(url)
+    if parts.scheme not in ("http", "https") or not parts.hostname:
+        raise ArticleFetchError(f"Only http and https article URLs are allowed: {url}")
+
+    try:
+        port = parts.port or (443 if parts.scheme == "https" else 80)
+        addresses = await asyncio.get_running_loop().getaddrinfo(
+            parts.hostname, port, type=socket.SOCK_STREAM
+        )
+    except (OSError, ValueError) as e:
+        raise ArticleFetchError(f"Cannot resolve article host {parts.hostname}: {e}")
+
+    for *_, sockaddr in addresses:
+        address = ipaddress.ip_address(sockaddr[0].split("%")[0])
+        if not address.is_global:
+            raise ArticleFetchError(
+                f"Article host {parts.hostname} resolves to a non-public address"
+            )
+
+
+async def fetch_article_text(article_url: str, timeout: float = 15.0) -> str:
+    """
+    Download an article and return its readable text.
+
+    Redirects are followed by hand so every hop is checked with
+    check_article_url, and the body is read as a stream up to
+    ARTICLE_MAX_BYTES.
+
+    Raises:
+        httpx.HTTPError: If the article cannot be fetched
+        ArticleFetchError: If the URL is refused, or the response is too large
+            or not a web page
+    """
+    url = article_url
+    async with httpx.AsyncClient(timeout=timeout, follow_redirects=False) as client:
+        for _ in range(ARTICLE_MAX_REDIRECTS + 1):
+            await check_article_url(url)
+            async with client.stream("GET", url) as response:
+                if response.is_redirect:
+                    url = urljoin(url, response.headers["location"])
+                    continue
+                response.raise_for_status()
+
+                content_type = response.headers.get("content-type", "text/html")
+                if (
+                    not content_type.split(";")[0]
+                    .strip()
+                    .lower()
+                    .startswith(ARTICLE_CONTENT_TYPES)
+                ):
+                    raise ArticleFetchError(
+                        f"Article is not a web page: {content_type}"
+                    )
+                if int(response.headers.get("content-length") or 0) > ARTICLE_MAX_BYTES:
+                    raise ArticleFetchError("Article is larger than ARTICLE_MAX_BYTES")
+
+                body = bytearray()
+                async for chunk in response.aiter_bytes():
+                    body += chunk
+                    if len(body) > ARTICLE_MAX_BYTES:
+                        raise ArticleFetchError(
+                            "Article is larger than ARTICLE_MAX_BYTES"
+                        )
+                text = bytes(body).decode(
+                    response.encoding or "utf-8", errors="replace"
+                )
+            break
+        else:
+            raise ArticleFetchError(f"Too many redirects fetching {article_url}")
+
+    if "html" in content_type:
+        return html_to_text(text)
+    return text
+
+
+async def map_reduce_summarize(
+    text: str,
+    summarize: Callable[[str, int], Awaitable[str]],
+    chunk_tokens: int,
+    max_tokens: int,
+    concurrency: int,
+    max_rounds: int = 3,
+) -> str:
+    """
+    Shrink a text to a token budget by summarizing its chunks in parallel.
+
+    The text is split into chunks of about chunk_tokens, every chunk is
+    summarized concurrently (at most `concurrency` calls at a time) and the
+    partial summaries are joined in order. If the joined result is still over
+    budget it is summarized again, up to max_rounds, and finally hard-capped.
+
+    Args:
+        text: The source text
+        summarize: Async callable taking (text, max_words) and returning a summary
+        chunk_tokens: Target chunk size in tokens
+        max_tokens: Token budget for the result
+        concurrency: Maximum number of summarize calls in flight
+
+    Returns:
+        A text of at most max_tokens tokens
+    """
+    splitter = RecursiveCharacterTextSplitter(
+        chunk_size=chunk_tokens * CHARS_PER_TOKEN,
+        chunk_overlap=0,
+    )
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def summarize_chunk(chunk: str, max_words: int) -> str:
+        async with semaphore:
+            return await summarize(chunk, max_words)
+
+    for round_number in range(max_rounds):
+        if estimate_tokens(text) <= max_tokens:
+            return text
+
+        chunks = splitter.split_text(text)
+        # Share the budget between chunks (roughly 0.75 words per token)
+        max_words = max(50, int(max_tokens * 0.75 / len(chunks)))
+
+        logger.info(
+            f"Summarizing {estimate_tokens(text)} tokens in {len(chunks)} chunks "
+            f"(round {round_number + 1}, budget {max_tokens} tokens)"
+        )
+        summaries = await asyncio.gather(
+            *(summarize_chunk(chunk, max_words) for chunk in chunks)
+        )
+        text = "\n\n".join(summary.strip() for summary in summaries)
+
+    return cap_to_token_budget(text, max_tokens)
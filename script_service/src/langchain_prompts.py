@@ -29,16 +29,16 @@ Key guidelines:
 - Write in a way that real people would actually speak, not how they write
 - Include appropriate transitions between topics
 
-The output must be a JSON array, where each object has these keys:
+The output must be a JSON object with a 'lines' array, where each object in the array has these keys:
 - 'speaker_role': The role of the speaker (host, guest1, guest2, etc.)
 - 'speaker_name': The actual name of the speaker
 - 'text': The dialogue line for that speaker
 
 Example format:
-[
+{{"lines": [
   {{"speaker_role": "host", "speaker_name": "Michael Chen", "text": "Welcome to the show! Today we're talking about..."}},
   {{"speaker_role": "guest1", "speaker_name": "Sarah Johnson", "text": "Thanks for having me, Michael! I'm excited to discuss..."}}
-]
+]}}
 """
 
 
@@ -163,3 +163,116 @@ of the article's key points, implications, and connections to their expertise.
     return ChatPromptTemplate.from_messages(
         [system_message_prompt, human_message_prompt]
     )
+
+
+# Segment Outline for long-format scripts
+def get_outline_prompt_template():
+    """Returns a LangChain prompt template for planning a long episode's segments"""
+    system_template = """
+You are an expert podcast producer planning a {format_label} podcast episode that should last approximately {length_minutes} minutes.
+Split the episode into exactly {segment_count} consecutive segments that together cover the material with a clear arc:
+an opening segment, middle segments that each explore a distinct topic, and a closing segment.
+
+Participants: {participants}
+
+Source material for the discussion:
+{questionnaire_summary}
+
+Article being discussed (if any): {article_summary}
+
+The output must be a JSON object with a 'segments' array holding one object per segment, in order, where each object has these keys:
+- 'title': A short title for the segment
+- 'summary': Two or three sentences describing what is discussed and who leads it
+"""
+
+    human_template = """
+Plan the {segment_count} segments for the episode "{title}".
+Return only the JSON object.
+"""
+
+    system_message_prompt = SystemMessagePromptTemplate.from_template(system_template)
+    human_message_prompt = HumanMessagePromptTemplate.from_template(human_template)
+
+    return ChatPromptTemplate.from_messages(
+        [system_message_prompt, human_message_prompt]
+    )
+
+
+def get_summary_prompt_template():
+    """Returns a LangChain prompt template for condensing long source material"""
+    system_template = """
+You condense source material that will be used to write a podcast episode.
+Keep the concrete facts, names, numbers, opinions and memorable quotes; drop repetition and filler.
+Write plain prose or short bullet points, never more than {max_words} words.
+"""
+
+    human_template = """
+Summarize the following {source_label}:
+
+{text}
+"""
+
+    system_message_prompt = SystemMessagePromptTemplate.from_template(system_template)
+    human_message_prompt = HumanMessagePromptTemplate.from_template(human_template)
+
+    return ChatPromptTemplate.from_messages(
+        [system_message_prompt, human_message_prompt]
+    )
+
+
+def get_segment_instructions(title, outline, segment_index, segment_minutes):
+    """
+    Returns the continuity instructions appended to the base prompt when a
+    long script is generated one segment at a time.
+
+    Args:
+        title: The title of the episode
+        outline: List of segment dictionaries with 'title' and 'summary'
+        segment_index: Zero-based index of the segment being written
+        segment_minutes: The desired length of this segment in minutes
+
+    Returns:
+        Segment instruction string
+    """
+    segment = outline[segment_index]
+    is_first = segment_index == 0
+    is_last = segment_index == len(outline) - 1
+
+    outline_text = "\n".join(
+        f"{i + 1}. {s['title']} - {s['summary']}" for i, s in enumerate(outline)
+    )
+
+    continuity = []
+    if is_first:
+        continuity.append(
+            "- Open the show: the host welcomes listeners and introduces everyone."
+        )
+    else:
+        previous = outline[segment_index - 1]
+        continuity.append(
+            f"- Pick up directly after the previous segment (\"{previous['title']}\"). "
+            "Do not greet the audience or re-introduce anyone."
+        )
+    if is_last:
+        continuity.append("- Close the show with a short wrap-up and sign-off.")
+    else:
+        following = outline[segment_index + 1]
+        continuity.append(
+            f"- End with a natural transition toward the next segment "
+            f"(\"{following['title']}\"). Do not wrap up the show."
+        )
+    continuity.append("- Do not repeat points that belong to other segments.")
+    continuity_text = "\n".join(continuity)
+
+    return f"""
+This is SEGMENT {segment_index + 1} of {len(outline)} of the episode "{title}".
+Write ONLY this segment. It should last approximately {segment_minutes} minutes.
+
+Full episode outline:
+{outline_text}
+
+This segment: {segment['title']} - {segment['summary']}
+
+Continuity rules:
+{continuity_text}
+"""
@@ -3,8 +3,11 @@ import os
 import json
 from typing import List, Optional
 
-from fastapi import FastAPI, HTTPException, Depends
+from fastapi import FastAPI, HTTPException, Depends, Header, Query, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
+from sqlalchemy import insert, select, update, func, case
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 import logging
 import httpx
@@ -16,10 +19,23 @@ from .models import (
     ScriptLineModel,
     ScriptCreateRequest,
     ScriptCreateResponse,
+    ScriptListItem,
     ScriptDetailsResponse,
+    ScriptLinesPatchRequest,
+    ScriptLinesPatchResponse,
 )
-from .database import engine, get_db
-from .script_generator import generate_script
+from .database import engine, get_db, get_async_db, AsyncSessionLocal
+from .script_generator import (
+    generate_script,
+    split_speakers,
+    stream_script,
+    llm_cache,
+    llm_clients,
+)
+from .script_parser import script_response_parser, outline_response_parser
+from .schema import upgrade_schema
+from .versioning import install_versioning
+from .orchestrator import pipeline_orchestrator
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -34,6 +50,10 @@ if not OPENAI_API_KEY:
 
 # Ensure database tables exist
 Base.metadata.create_all(bind=engine)
+upgrade_schema(engine)
+
+# Keep scripts.version / script_lines.row_version current for conditional GETs
+VERSIONING_ENABLED = install_versioning(engine)
 
 # Create FastAPI app
 app = FastAPI(title="Script Service")
@@ -48,22 +68,244 @@ app.add_middleware(
         "https://*.vercel.app",  # All Vercel deployments
     ],
     allow_credentials=True,
-    allow_methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"],
+    allow_methods=["GET", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag"],
 )
 
 
+def build_speaker_map(request: ScriptCreateRequest) -> dict:
+    """
+    Create speaker role to voice_id and name mapping.
+
+    Handles both frontend roles (guest) and OpenAI generated roles
+    (guest1, guest2, etc.)
+    """
+    speaker_map = {}
+
+    # Add exact role matches
+    for speaker in request.speakers:
+        speaker_map[speaker.role] = {"voice_id": speaker.voice_id, "name": speaker.name}
+
+    # Add numbered guest mappings for OpenAI compatibility
+    guest_speakers = [s for s in request.speakers if s.role == "guest"]
+    for i, guest in enumerate(guest_speakers, 1):
+        speaker_map[f"guest{i}"] = {"voice_id": guest.voice_id, "name": guest.name}
+
+    logger.info(f"Speaker mapping created: {list(speaker_map.keys())}")
+    return speaker_map
+
+
+def build_line_row(line_data, line_order: int, speaker_map: dict) -> Optional[dict]:
+    """
+    Validate one generated line and convert it to a script_lines insert row.
+
+    Returns None, with a warning, for a line with a missing speaker, missing
+    text or an unmapped speaker role.
+
+    Raises:
+        ValueError: If the line is not an object
+    """
+    if not isinstance(line_data, dict):
+        raise ValueError(f"Generated line {line_order} is not an object: {line_data}")
+
+    speaker_role = line_data.get("speaker_role")
+    text = line_data.get("text")
+
+    # Get voice_id from our speaker mapping
+    speaker_info = speaker_map.get(speaker_role)
+    voice_id = speaker_info["voice_id"] if speaker_info else None
+
+    if not speaker_role or not text:
+        logger.warning(f"Skipping line with missing speaker or text: {line_data}")
+        return None
+    if not voice_id:
+        logger.warning(f"Skipping line for speaker '{speaker_role}' - no voice_id")
+        return None
+
+    return {
+        "speaker_role": speaker_role,
+        "speaker_name": line_data.get("speaker_name") or speaker_info["name"],
+        "text": text,
+        "voice_id": voice_id,
+        "line_order": line_order,
+    }
+
+
+def build_line_rows(generated_lines, speaker_map: dict) -> List[dict]:
+    """
+    Validate generated lines and convert them to script_lines insert rows.
+
+    Skipped lines keep their position in line_order (see build_line_row).
+
+    Raises:
+        ValueError: If the generator output is malformed or has no usable lines
+    """
+    if not isinstance(generated_lines, list):
+        raise ValueError("Generated script is not a list of lines")
+
+    line_rows = []
+    for i, line_data in enumerate(generated_lines):
+        line_row = build_line_row(line_data, i, speaker_map)
+        if line_row:
+            line_rows.append(line_row)
+
+    if not line_rows:
+        raise ValueError("Generated script contains no usable lines.")
+
+    return line_rows
+
+
+def sse_event(event: str, data: dict) -> str:
+    """Format a server-sent event frame."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+async def stream_script_events(request: ScriptCreateRequest):
+    """
+    Generate a script while streaming it to the client as server-sent events.
+
+    The script row is created up front so the client receives its id first.
+    Each line is written to script_lines as soon as the model finishes it and
+    then pushed to the client, so the first line arrives long before the
+    full script is done.
+    """
+    speaker_map = build_speaker_map(request)
+    generated_lines = []
+    saved_lines = 0
+
+    # The request-scoped session is not guaranteed to outlive the handler,
+    # so the stream manages its own session.
+    async with AsyncSessionLocal() as db:
+        db_script = ScriptModel(
+            title=request.title,
+            length_minutes=request.length_minutes,
+            format_type=request.format_type,
+            raw_script_json=json.dumps([]),
+            questionnaire_json=json.dumps(
+                [qa.dict() for qa in request.questionnaire_answers]
+            ),
+            status="generating",
+        )
+        db.add(db_script)
+        await db.commit()
+        script_id = db_script.id
+        logger.info(f"Script {script_id} created in DB for streaming.")
+
+        yield sse_event(
+            "script",
+            {
+                "script_id": script_id,
+                "title": request.title,
+                "status": "generating",
+            },
+        )
+
+        try:
+            async for line_data in stream_script(
+                format_type=request.format_type,
+                title=request.title,
+                speakers=[speaker.dict() for speaker in request.speakers],
+                questionnaire_answers=[
+                    qa.dict() for qa in request.questionnaire_answers
+                ],
+                length_minutes=request.length_minutes,
+                article_url=request.article_url,
+                bypass_cache=request.bypass_cache,
+            ):
+                line_order = len(generated_lines)
+                generated_lines.append(line_data)
+
+                # Validated and filled in the same way as non-streamed lines
+                line_row = build_line_row(line_data, line_order, speaker_map)
+                if not line_row:
+                    continue
+
+                db_line = ScriptLineModel(script_id=script_id, **line_row)
+                db.add(db_line)
+                await db.commit()
+                saved_lines += 1
+
+                yield sse_event(
+                    "line",
+                    {
+                        "line_id": db_line.id,
+                        "line_order": line_order,
+                        "speaker_role": line_row["speaker_role"],
+                        "speaker_name": line_row["speaker_name"],
+                        "text": line_row["text"],
+                        "voice_id": line_row["voice_id"],
+                    },
+                )
+
+            if not saved_lines:
+                raise ValueError("Generated script contains no usable lines.")
+        except Exception as e:
+            logger.error(f"Streaming generation failed for script {script_id}: {e}")
+            await db.rollback()
+            await db.execute(
+                update(ScriptModel)
+                .where(ScriptModel.id == script_id)
+                .values(status="failed", raw_script_json=json.dumps(generated_lines))
+            )
+            await db.commit()
+            yield sse_event("error", {"script_id": script_id, "detail": str(e)})
+            return
+
+        await db.execute(
+            update(ScriptModel)
+            .where(ScriptModel.id == script_id)
+            .values(status="processing", raw_script_json=json.dumps(generated_lines))
+        )
+        await db.commit()
+
+    if request.run_pipeline:
+        pipeline_orchestrator.start(script_id)
+
+    yield sse_event(
+        "complete",
+        {
+            "script_id": script_id,
+            "status": "processing",
+            "total_lines": saved_lines,
+        },
+    )
+
+
 @app.post("/scripts", response_model=ScriptCreateResponse, status_code=201)
-async def create_script(request: ScriptCreateRequest, db: Session = Depends(get_db)):
+async def create_script(
+    request: ScriptCreateRequest, stream: bool = False, db: Session = Depends(get_db)
+):
     """
     Create a new podcast script based on the specified format and questionnaire answers.
 
     - interview: Two-person conversation (host + single guest)
     - roundtable: Multiple-person discussion (host + multiple guests)
     - article: Discussion of an article or blog post
+
+    With ?stream=true the response is a text/event-stream: a `script` event
+    with the new script id, one `line` event per persisted line as it is
+    generated, and a final `complete` (or `error`) event.
     """
     logger.info(f"Received script creation request: {request.title}")
 
+    if stream:
+        # Reject invalid requests before any rows are written
+        try:
+            split_speakers(
+                request.format_type,
+                [speaker.dict() for speaker in request.speakers],
+                request.article_url,
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+        return StreamingResponse(
+            stream_script_events(request),
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
+
     try:
         # Convert SpeakerInfo Pydantic models to dictionaries for the script generator
         speakers_dict = [speaker.dict() for speaker in request.speakers]
@@ -77,6 +319,7 @@ async def create_script(request: ScriptCreateRequest, db: Session = Depends(get_
             questionnaire_answers=questionnaire_dict,
             length_minutes=request.length_minutes,
             article_url=request.article_url,
+            bypass_cache=request.bypass_cache,
         )
     except ValueError as e:
         logger.error(f"Script generation failed with ValueError: {e}")
@@ -92,22 +335,14 @@ async def create_script(request: ScriptCreateRequest, db: Session = Depends(get_
             status_code=500, detail="Script generation returned no lines."
         )
 
-    # Create speaker role to voice_id and name mapping
-    # Handle both frontend roles (guest) and OpenAI generated roles (guest1, guest2, etc.)
-    speaker_map = {}
-
-    # Add exact role matches
-    for speaker in request.speakers:
-        speaker_map[speaker.role] = {"voice_id": speaker.voice_id, "name": speaker.name}
-
-    # Add numbered guest mappings for OpenAI compatibility
-    guest_speakers = [s for s in request.speakers if s.role == "guest"]
-    for i, guest in enumerate(guest_speakers, 1):
-        speaker_map[f"guest{i}"] = {"voice_id": guest.voice_id, "name": guest.name}
-
-    logger.info(f"Speaker mapping created: {list(speaker_map.keys())}")
+    # Validate every line before anything is written
+    try:
+        line_rows = build_line_rows(generated_lines, build_speaker_map(request))
+    except ValueError as e:
+        logger.error(f"Generated script failed validation: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
 
-    # Persist to DB
+    # Persist the script and all of its lines in a single transaction
     db_script = ScriptModel(
         title=request.title,
         length_minutes=request.length_minutes,
@@ -118,41 +353,26 @@ async def create_script(request: ScriptCreateRequest, db: Session = Depends(get_
         ),
         status="processing",  # Mark as processing as Celery tasks will be dispatched
     )
-    db.add(db_script)
-    db.commit()
-    db.refresh(db_script)
-    logger.info(f"Script {db_script.id} created in DB.")
+    try:
+        db.add(db_script)
+        db.flush()  # Assigns db_script.id without committing
 
-    # Create script lines and save to database
-    for i, line_data in enumerate(generated_lines):
-        speaker_role = line_data.get("speaker_role")
-        speaker_name = line_data.get("speaker_name")
-        text = line_data.get("text")
-
-        # Get voice_id from our speaker mapping
-        speaker_info = speaker_map.get(speaker_role)
-        voice_id = speaker_info["voice_id"] if speaker_info else None
-
-        if not speaker_role or not text:
-            logger.warning(f"Skipping line with missing speaker or text: {line_data}")
-            continue
-        if not voice_id:
-            logger.warning(f"Skipping line for speaker '{speaker_role}' - no voice_id")
-            continue
-
-        db_line = ScriptLineModel(
-            script_id=db_script.id,
-            speaker_role=speaker_role,
-            speaker_name=speaker_name,
-            text=text,
-            voice_id=voice_id,
-            line_order=i,
+        # One executemany INSERT instead of a commit and refresh per line
+        db.execute(
+            insert(ScriptLineModel),
+            [{**row, "script_id": db_script.id} for row in line_rows],
         )
-        db.add(db_line)
-        db.commit()  # Commit each line or batch commit
-        db.refresh(db_line)
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Failed to save script: {e}")
+        raise HTTPException(status_code=500, detail=f"Failed to save script: {str(e)}")
+
+    logger.info(f"Script {db_script.id} created in DB with {len(line_rows)} lines.")
 
-        # NOTE: TTS task generation removed - will be triggered separately through Admin UI
+    # NOTE: TTS task generation removed - will be triggered separately through Admin UI
+    if request.run_pipeline and line_rows:
+        pipeline_orchestrator.start(db_script.id)
 
     return ScriptCreateResponse(
         script_id=db_script.id, title=db_script.title, status=db_script.status
@@ -164,8 +384,8 @@ async def generate_tts_for_script(script_id: int, db: Session = Depends(get_db))
     """
     Trigger TTS generation for all lines in a script.
 
-    This endpoint makes a request to the TTS service to process the script
-    lines sequentially.
+    This endpoint asks the TTS service to queue a job for the script's lines
+    and records its ID; follow it with /scripts/{script_id}/tts-job.
     """
     # First check if script exists
     db_script = db.query(ScriptModel).filter(ScriptModel.id == script_id).first()
@@ -188,14 +408,19 @@ async def generate_tts_for_script(script_id: int, db: Session = Depends(get_db))
 
             result = response.json()
 
-            # Update script status
+            # Progress is read from this job rather than inferred from lines
             db_script.status = "tts_processing"
+            db_script.tts_job_id = result["job_id"]
             db.commit()
 
             return {
                 "script_id": script_id,
                 "status": "tts_processing",
-                "message": f"TTS generation started. {result.get('processed_lines', 0)} lines processed.",
+                "tts_job_id": result["job_id"],
+                "message": (
+                    f"TTS generation queued as job {result['job_id']} "
+                    f"for {result.get('queued_lines', 0)} lines."
+                ),
             }
 
     except httpx.RequestError as e:
@@ -206,36 +431,211 @@ async def generate_tts_for_script(script_id: int, db: Session = Depends(get_db))
         )
 
 
-@app.get("/scripts", response_model=List[ScriptCreateResponse])
-async def list_scripts(status: Optional[str] = None, db: Session = Depends(get_db)):
-    """List all scripts, optionally filtered by status"""
-    query = db.query(ScriptModel)
+@app.get("/scripts/{script_id}/tts-job")
+async def get_script_tts_job(script_id: int, db: Session = Depends(get_db)):
+    """
+    Report the progress of the script's latest TTS job.
 
-    if status:
-        query = query.filter(ScriptModel.status == status)
+    The script's status follows the job: it becomes tts_complete or
+    tts_failed once the job finishes.
+    """
+    db_script = db.query(ScriptModel).filter(ScriptModel.id == script_id).first()
+    if not db_script:
+        raise HTTPException(status_code=404, detail="Script not found")
+    if db_script.tts_job_id is None:
+        raise HTTPException(
+            status_code=404, detail="TTS has not been requested for this script"
+        )
 
-    scripts = query.all()
-    return [
-        ScriptCreateResponse(
-            script_id=script.id, title=script.title, status=script.status
+    try:
+        async with httpx.AsyncClient(timeout=30.0) as client:
+            response = await client.get(
+                f"{TTS_SERVICE_URL}/tts/jobs/{db_script.tts_job_id}"
+            )
+    except httpx.RequestError as e:
+        logger.error(f"Error connecting to TTS service: {e}")
+        raise HTTPException(
+            status_code=503,
+            detail="Could not connect to TTS service. Please try again later.",
         )
-        for script in scripts
-    ]
 
+    if response.status_code != 200:
+        error_detail = response.json().get("detail", str(response.content))
+        raise HTTPException(
+            status_code=response.status_code,
+            detail=f"TTS Service error: {error_detail}",
+        )
 
-@app.get("/scripts/{script_id}", response_model=ScriptDetailsResponse)
-async def get_script_status(script_id: int, db: Session = Depends(get_db)):
-    """Get detailed information about a specific script"""
+    job = response.json()
+    if db_script.status == "tts_processing" and job["status"] in [
+        "complete",
+        "failed",
+    ]:
+        db_script.status = f"tts_{job['status']}"
+        db.commit()
+
+    return {
+        "script_id": script_id,
+        "script_status": db_script.status,
+        "tts_job_id": db_script.tts_job_id,
+        "job_status": job["status"],
+        "last_error": job["last_error"],
+        "progress": job["progress"],
+    }
+
+
+@app.post("/scripts/{script_id}/pipeline", status_code=202)
+async def start_pipeline(script_id: int, db: Session = Depends(get_db)):
+    """
+    Run a script through TTS, avatar generation and stitching.
+
+    Lines move through the stages independently (a line's avatar job starts
+    as soon as its audio is ready) and the episode is stitched when the last
+    clip lands. Lines already complete at a stage skip it, so a failed run
+    can simply be started again.
+    """
     db_script = db.query(ScriptModel).filter(ScriptModel.id == script_id).first()
     if not db_script:
         raise HTTPException(status_code=404, detail="Script not found")
 
-    lines = (
-        db.query(ScriptLineModel)
-        .filter(ScriptLineModel.script_id == script_id)
-        .order_by(ScriptLineModel.line_order)
-        .all()
-    )
+    if pipeline_orchestrator.is_running(script_id):
+        raise HTTPException(
+            status_code=409, detail=f"Pipeline already running for script {script_id}"
+        )
+
+    try:
+        run = pipeline_orchestrator.start(script_id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return run.to_dict()
+
+
+@app.get("/scripts/{script_id}/pipeline")
+async def get_pipeline_status(script_id: int):
+    """Get the progress of the latest pipeline run for a script"""
+    run = pipeline_orchestrator.runs.get(script_id)
+    if not run:
+        raise HTTPException(
+            status_code=404, detail=f"No pipeline run for script {script_id}"
+        )
+    return run.to_dict()
+
+
+@app.get(
+    "/scripts", response_model=List[ScriptListItem], response_model_exclude_none=True
+)
+async def list_scripts(
+    response: Response,
+    status: Optional[str] = None,
+    after_id: Optional[int] = None,
+    limit: int = Query(100, ge=1, le=500),
+    include_counts: bool = False,
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    List scripts in id order, optionally filtered by status.
+
+    Pages with a keyset cursor on id: pass the X-Next-Cursor response header
+    back as after_id to get the next page (no header means this is the last
+    page). Only id, title and status are loaded. With include_counts, each
+    script also carries its line count and completed TTS/avatar counts from
+    the same aggregated query.
+    """
+    columns = [ScriptModel.id, ScriptModel.title, ScriptModel.status]
+    if include_counts:
+        columns += [
+            func.count(ScriptLineModel.id),
+            func.coalesce(
+                func.sum(case((ScriptLineModel.tts_status == "complete", 1), else_=0)),
+                0,
+            ),
+            func.coalesce(
+                func.sum(
+                    case((ScriptLineModel.avatar_status == "complete", 1), else_=0)
+                ),
+                0,
+            ),
+        ]
+
+    query = select(*columns)
+    if include_counts:
+        query = query.outerjoin(
+            ScriptLineModel, ScriptLineModel.script_id == ScriptModel.id
+        ).group_by(ScriptModel.id, ScriptModel.title, ScriptModel.status)
+
+    if status:
+        query = query.where(ScriptModel.status == status)
+    if after_id is not None:
+        query = query.where(ScriptModel.id > after_id)
+
+    # Fetch one extra row to know whether another page follows
+    rows = (await db.execute(query.order_by(ScriptModel.id).limit(limit + 1))).all()
+    if len(rows) > limit:
+        rows = rows[:limit]
+        response.headers["X-Next-Cursor"] = str(rows[-1][0])
+
+    scripts = []
+    for row in rows:
+        item = ScriptListItem(script_id=row[0], title=row[1], status=row[2])
+        if include_counts:
+            item.total_lines = row[3]
+            item.tts_complete_lines = row[4]
+            item.avatar_complete_lines = row[5]
+        scripts.append(item)
+    return scripts
+
+
+def script_etag(script_id: int, version: int) -> str:
+    return f'"script-{script_id}-v{version}"'
+
+
+@app.get("/scripts/{script_id}", response_model=ScriptDetailsResponse)
+async def get_script_status(
+    script_id: int,
+    response: Response,
+    since_version: Optional[int] = None,
+    if_none_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    Get detailed information about a specific script.
+
+    The ETag tracks the script's version, which database triggers bump on any
+    change to the script or its lines. A matching If-None-Match returns 304
+    without loading the lines; since_version returns only the lines changed
+    after that version.
+    """
+    db_script = (
+        await db.execute(
+            select(
+                ScriptModel.id,
+                ScriptModel.title,
+                ScriptModel.format_type,
+                ScriptModel.status,
+                ScriptModel.length_minutes,
+                ScriptModel.version,
+                ScriptModel.tts_job_id,
+            ).where(ScriptModel.id == script_id)
+        )
+    ).first()
+    if not db_script:
+        raise HTTPException(status_code=404, detail="Script not found")
+
+    if VERSIONING_ENABLED:
+        etag = script_etag(script_id, db_script.version)
+        if if_none_match and etag in [tag.strip() for tag in if_none_match.split(",")]:
+            return Response(status_code=304, headers={"ETag": etag})
+        response.headers["ETag"] = etag
+    else:
+        # Versions are constant without the triggers, so always send everything
+        since_version = None
+
+    query = select(ScriptLineModel).where(ScriptLineModel.script_id == script_id)
+    if since_version is not None:
+        query = query.where(ScriptLineModel.row_version > since_version)
+
+    lines = (await db.scalars(query.order_by(ScriptLineModel.line_order))).all()
 
     return ScriptDetailsResponse(
         script_id=db_script.id,
@@ -243,6 +643,9 @@ async def get_script_status(script_id: int, db: Session = Depends(get_db)):
         format_type=db_script.format_type,
         status=db_script.status,
         length_minutes=db_script.length_minutes,
+        version=db_script.version if VERSIONING_ENABLED else None,
+        tts_job_id=db_script.tts_job_id,
+        since_version=since_version,
         lines=[
             {
                 "line_id": line.id,
@@ -253,8 +656,10 @@ async def get_script_status(script_id: int, db: Session = Depends(get_db)):
                 "tts_status": line.tts_status,
                 "avatar_status": line.avatar_status,
                 "audio_file_path": line.audio_file_path,
+                "audio_duration_seconds": line.audio_duration_seconds,
                 "video_file_path": line.video_file_path,
                 "speaker_image_path": line.speaker_image_path,
+                "row_version": line.row_version,
             }
             for line in lines
         ],
@@ -266,6 +671,32 @@ async def health_check():
     return {"status": "ok"}
 
 
+@app.get("/metrics")
+async def get_metrics():
+    """Report script generation counters for this process"""
+    return {
+        "llm_cache": llm_cache.stats(),
+        "llm_connections": llm_clients.stats(),
+        "response_parsing": {
+            "script": script_response_parser.stats(),
+            "outline": outline_response_parser.stats(),
+        },
+    }
+
+
+@app.on_event("startup")
+async def startup_event():
+    """Build the pooled LLM client and per-format chains once per process."""
+    llm_clients.warm_up()
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Close pooled OpenAI connections and stop running pipelines."""
+    await llm_clients.aclose()
+    await pipeline_orchestrator.aclose()
+
+
 @app.delete("/scripts/{script_id}")
 async def delete_script(script_id: int, db: Session = Depends(get_db)):
     """Delete a script and all associated script lines"""
@@ -295,6 +726,120 @@ async def delete_script(script_id: int, db: Session = Depends(get_db)):
         )
 
 
+# Columns reset when a line's text changes, so its audio and clip are redone.
+# Leases are cleared too: a worker still on the old text loses its lease, and
+# its result is dropped instead of overwriting the reset.
+LINE_ARTIFACT_RESETS = {
+    "tts_status": "pending",
+    "audio_file_path": None,
+    "audio_duration_seconds": None,
+    "audio_sample_rate": None,
+    "audio_gain_db": None,
+    "avatar_status": "pending",
+    "video_file_path": None,
+    "avatar_job_id": None,
+    "avatar_asset_id": None,
+    "tts_lease_owner": None,
+    "tts_lease_expires_at": None,
+    "avatar_lease_owner": None,
+    "avatar_lease_expires_at": None,
+}
+
+# Scripts whose lines cannot be edited while they are in these states
+LOCKED_SCRIPT_STATUSES = ["generating", "stitching"]
+
+
+def invalidate_script_output(db_script: ScriptModel) -> None:
+    """Drop a script's stitched episode after its lines change."""
+    db_script.final_video_path = None
+    if db_script.status in ["complete", "stitching_failed"]:
+        db_script.status = "processing"
+
+
+@app.patch("/scripts/{script_id}/lines", response_model=ScriptLinesPatchResponse)
+async def update_script_lines(
+    script_id: int, request: ScriptLinesPatchRequest, db: Session = Depends(get_db)
+):
+    """
+    Apply many line edits to a script in one transaction.
+
+    Only lines whose text actually changes have their audio, clip and
+    avatar job reset; the response lists exactly those lines so just they
+    are sent back through TTS and avatar generation.
+    """
+    line_ids = [edit.line_id for edit in request.edits]
+    if len(set(line_ids)) != len(line_ids):
+        raise HTTPException(status_code=400, detail="Each line may be edited once")
+
+    db_script = (
+        db.query(ScriptModel)
+        .filter(ScriptModel.id == script_id)
+        .with_for_update()
+        .first()
+    )
+    if not db_script:
+        raise HTTPException(status_code=404, detail="Script not found")
+
+    if db_script.status in LOCKED_SCRIPT_STATUSES:
+        raise HTTPException(
+            status_code=409,
+            detail=f"Script {script_id} cannot be edited while {db_script.status}",
+        )
+
+    db_lines = {
+        line.id: line
+        for line in db.query(ScriptLineModel)
+        .filter(
+            ScriptLineModel.script_id == script_id,
+            ScriptLineModel.id.in_(line_ids),
+        )
+        .with_for_update()
+    }
+    missing = [line_id for line_id in line_ids if line_id not in db_lines]
+    if missing:
+        db.rollback()
+        raise HTTPException(
+            status_code=404,
+            detail=f"Lines not found in script {script_id}: {missing}",
+        )
+
+    changed = [
+        edit for edit in request.edits if db_lines[edit.line_id].text != edit.text
+    ]
+
+    try:
+        if changed:
+            # One executemany UPDATE keyed by primary key
+            db.execute(
+                update(ScriptLineModel),
+                [
+                    {"id": edit.line_id, "text": edit.text, **LINE_ARTIFACT_RESETS}
+                    for edit in changed
+                ],
+            )
+            invalidate_script_output(db_script)
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Failed to update lines of script {script_id}: {e}")
+        raise HTTPException(
+            status_code=500, detail=f"Failed to update script lines: {str(e)}"
+        )
+
+    regenerate = sorted(
+        (db_lines[edit.line_id] for edit in changed), key=lambda line: line.line_order
+    )
+    logger.info(
+        f"Script {script_id}: {len(changed)}/{len(request.edits)} edited lines changed"
+    )
+    return ScriptLinesPatchResponse(
+        script_id=script_id,
+        message=f"Updated {len(changed)} of {len(request.edits)} lines",
+        updated_line_ids=[edit.line_id for edit in changed],
+        regenerate_line_ids=[line.id for line in regenerate],
+    )
+
+
 @app.put("/scripts/lines/{line_id}")
 async def update_script_line(line_id: int, text: str, db: Session = Depends(get_db)):
     """Update the text content of a specific script line"""
@@ -303,9 +848,20 @@ async def update_script_line(line_id: int, text: str, db: Session = Depends(get_
     if not db_line:
         raise HTTPException(status_code=404, detail="Script line not found")
 
+    if db_line.script.status in LOCKED_SCRIPT_STATUSES:
+        raise HTTPException(
+            status_code=409,
+            detail=f"Script cannot be edited while {db_line.script.status}",
+        )
+
     try:
-        # Update the text
-        db_line.text = text
+        # Update the text, invalidating the line's audio and video if it changed
+        regenerate = db_line.text != text
+        if regenerate:
+            db_line.text = text
+            for column, value in LINE_ARTIFACT_RESETS.items():
+                setattr(db_line, column, value)
+            invalidate_script_output(db_line.script)
         db.commit()
         db.refresh(db_line)
 
@@ -314,6 +870,7 @@ async def update_script_line(line_id: int, text: str, db: Session = Depends(get_
             "message": f"Script line {line_id} updated successfully",
             "line_id": line_id,
             "text": text,
+            "regenerate": regenerate,
         }
 
     except Exception as e:
@@ -1,4 +1,14 @@
-from sqlalchemy import Column, String, Integer, Text, ForeignKey
+from sqlalchemy import (
+    Column,
+    String,
+    Integer,
+    BigInteger,
+    Text,
+    ForeignKey,
+    DateTime,
+    Float,
+    Index,
+)
 from sqlalchemy.orm import relationship
 from sqlalchemy.ext.declarative import declarative_base
 from pydantic import BaseModel, Field
@@ -19,13 +29,16 @@ class ScriptModel(Base):
     raw_script_json = Column(Text)  # Stores the full JSON from OpenAI
     questionnaire_json = Column(Text, nullable=True)  # Questionnaire answers
     final_video_path = Column(String, nullable=True)  # Final video path
+    tts_job_id = Column(Integer, nullable=True)  # Latest TTS service job
+    # Bumped by database triggers on any change to the script or its lines
+    version = Column(BigInteger, nullable=False, server_default="1")
     lines = relationship("ScriptLineModel", back_populates="script")
 
 
 class ScriptLineModel(Base):
     __tablename__ = "script_lines"
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)
-    script_id = Column(Integer, ForeignKey("scripts.id"))
+    script_id = Column(Integer, ForeignKey("scripts.id"), index=True)
     speaker_role = Column(String, nullable=False)  # 'host', 'guest', etc.
     speaker_name = Column(String, nullable=False)  # Actual name of the speaker
     text = Column(Text, nullable=False)
@@ -33,13 +46,48 @@ class ScriptLineModel(Base):
     line_order = Column(Integer, nullable=False)  # To maintain order
     tts_status = Column(String, default="pending")  # TTS status
     audio_file_path = Column(String, nullable=True)  # Audio file path
+    audio_duration_seconds = Column(Float, nullable=True)  # Set by TTS
+    audio_sample_rate = Column(Integer, nullable=True)  # Set by TTS
+    audio_gain_db = Column(Float, nullable=True)  # Relative MP3 gain, set by TTS
     avatar_status = Column(String, default="pending")  # Avatar status
     speaker_image_path = Column(String, nullable=True)  # Speaker image
     video_file_path = Column(String, nullable=True)  # Video file path
-    avatar_job_id = Column(String, nullable=True)  # Hedra generation job ID
+    # Hedra generation job ID; indexed for the avatar service's webhook
+    avatar_job_id = Column(String, nullable=True, index=True)
     avatar_asset_id = Column(String, nullable=True)  # Hedra video asset ID
+    # Held by the worker processing the line; expired leases are requeued
+    tts_lease_owner = Column(String, nullable=True)
+    tts_lease_expires_at = Column(DateTime(timezone=True), nullable=True)
+    avatar_lease_owner = Column(String, nullable=True)
+    avatar_lease_expires_at = Column(DateTime(timezone=True), nullable=True)
+    row_version = Column(BigInteger, nullable=False, server_default="1")  # Triggers
     script = relationship("ScriptModel", back_populates="lines")
 
+    __table_args__ = (
+        # Serve the lease reaper, which only looks for expired leases
+        Index(
+            "ix_script_lines_tts_lease",
+            "tts_lease_expires_at",
+            postgresql_where=tts_lease_expires_at.isnot(None),
+        ),
+        Index(
+            "ix_script_lines_avatar_lease",
+            "avatar_lease_expires_at",
+            postgresql_where=avatar_lease_expires_at.isnot(None),
+        ),
+    )
+
+
+class LLMCacheModel(Base):
+    __tablename__ = "llm_response_cache"
+    cache_key = Column(String(64), primary_key=True)  # sha256 of the request
+    model = Column(String, nullable=False)
+    temperature = Column(Float, nullable=False)
+    response_json = Column(Text, nullable=False)  # Parsed script lines
+    created_at = Column(DateTime(timezone=True), nullable=False)  # For TTL
+    last_accessed_at = Column(DateTime(timezone=True), nullable=False, index=True)
+    hit_count = Column(Integer, nullable=False, default=0)
+
 
 # Pydantic Models
 class SpeakerInfo(BaseModel):
@@ -60,6 +108,8 @@ class ScriptCreateRequest(BaseModel):
     length_minutes: int = Field(..., gt=0, le=60)  # Example: 1 to 60 minutes
     questionnaire_answers: List[QuestionnaireAnswer]
     article_url: Optional[str] = None  # For article discussion format
+    bypass_cache: bool = False  # Force a fresh generation
+    run_pipeline: bool = False  # Continue through TTS, avatar and stitch
 
 
 class ScriptLineResponse(BaseModel):
@@ -74,6 +124,13 @@ class ScriptCreateResponse(BaseModel):
     status: str
 
 
+class ScriptListItem(ScriptCreateResponse):
+    # Only filled in when the listing is requested with include_counts
+    total_lines: Optional[int] = None
+    tts_complete_lines: Optional[int] = None
+    avatar_complete_lines: Optional[int] = None
+
+
 class ScriptDetailsResponse(BaseModel):
     script_id: int
     title: str
@@ -81,3 +138,22 @@ class ScriptDetailsResponse(BaseModel):
     status: str
     length_minutes: int
     lines: List[Dict[str, Any]]
+    version: Optional[int] = None  # Set when versioning is active
+    tts_job_id: Optional[int] = None  # Set once TTS has been requested
+    since_version: Optional[int] = None  # Set when lines is only the changes
+
+
+class ScriptLineEdit(BaseModel):
+    line_id: int
+    text: str = Field(..., min_length=1)
+
+
+class ScriptLinesPatchRequest(BaseModel):
+    edits: List[ScriptLineEdit] = Field(..., min_length=1)
+
+
+class ScriptLinesPatchResponse(BaseModel):
+    script_id: int
+    message: str
+    updated_line_ids: List[int]  # Lines whose text actually changed
+    regenerate_line_ids: List[int]  # Lines needing new audio and video, in order
@@ -0,0 +1,294 @@
+import os
+import time
+import asyncio
+import logging
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+from .database import SessionLocal
+from .models import ScriptLineModel
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Downstream services
+TTS_SERVICE_URL = os.getenv("TTS_SERVICE_URL", "http://tts_service:8000")
+AVATAR_SERVICE_URL = os.getenv("AVATAR_SERVICE_URL", "http://avatar_service:8000")
+STITCH_SERVICE_URL = os.getenv("STITCH_SERVICE_URL", "http://stitch_service:8000")
+
+# Per-stage concurrency limits
+PIPELINE_TTS_CONCURRENCY = int(os.getenv("PIPELINE_TTS_CONCURRENCY", "4"))
+PIPELINE_AVATAR_CONCURRENCY = int(os.getenv("PIPELINE_AVATAR_CONCURRENCY", "4"))
+
+# Lines waiting on Hedra are polled together through the batch status
+# endpoint, up to AVATAR_STATUS_BATCH_SIZE lines per request
+AVATAR_STATUS_BATCH_SIZE = 1000
+AVATAR_POLL_INTERVAL = float(os.getenv("AVATAR_POLL_INTERVAL", "10"))
+AVATAR_TIMEOUT = float(os.getenv("AVATAR_TIMEOUT", "1800"))
+
+# TTS, avatar and stitch requests only queue jobs on the other services,
+# which are then polled until their workers finish them
+PIPELINE_REQUEST_TIMEOUT = float(os.getenv("PIPELINE_REQUEST_TIMEOUT", "30"))
+JOB_POLL_INTERVAL = float(os.getenv("PIPELINE_JOB_POLL_INTERVAL", "2"))
+JOB_TIMEOUT = float(os.getenv("PIPELINE_JOB_TIMEOUT", "1800"))
+
+
+class PipelineError(Exception):
+    """A pipeline stage failed for a line or the episode."""
+
+
+class PipelineRun:
+    """Progress of one script's run through TTS, avatar and stitch."""
+
+    def __init__(self, script_id: int, line_ids: List[int]):
+        self.script_id = script_id
+        self.status = "running"
+        self.started_at = time.time()
+        self.finished_at: Optional[float] = None
+        self.total_lines = len(line_ids)
+        self.tts_complete = 0
+        self.avatar_complete = 0
+        self.failed_lines: Dict[int, str] = {}
+        self.stitch_status = "waiting"
+        self.final_video_path: Optional[str] = None
+        self.error: Optional[str] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        end = self.finished_at or time.time()
+        return {
+            "script_id": self.script_id,
+            "status": self.status,
+            "total_lines": self.total_lines,
+            "tts_complete": self.tts_complete,
+            "avatar_complete": self.avatar_complete,
+            "failed_lines": self.failed_lines,
+            "stitch_status": self.stitch_status,
+            "final_video_path": self.final_video_path,
+            "error": self.error,
+            "elapsed_seconds": round(end - self.started_at, 1),
+        }
+
+
+class PipelineOrchestrator:
+    """
+    Runs a script's lines through TTS, avatar generation and stitching as a DAG.
+
+    Every line moves independently: its avatar job starts the moment its own
+    audio is ready, while other lines are still in TTS, and the episode is
+    stitched as soon as the last clip lands. Each stage has its own
+    concurrency limit, so total latency approaches that of the slowest
+    stage instead of the sum of all of them.
+    """
+
+    def __init__(self):
+        self.runs: Dict[int, PipelineRun] = {}
+        self._tasks: Dict[int, asyncio.Task] = {}
+        self._client: Optional[httpx.AsyncClient] = None
+        self._tts_semaphore = asyncio.Semaphore(PIPELINE_TTS_CONCURRENCY)
+        self._avatar_semaphore = asyncio.Semaphore(PIPELINE_AVATAR_CONCURRENCY)
+        # Lines waiting for their clip, across runs, and the task polling them
+        self._avatar_waiters: Dict[int, asyncio.Future] = {}
+        self._avatar_poller: Optional[asyncio.Task] = None
+
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(timeout=PIPELINE_REQUEST_TIMEOUT)
+        return self._client
+
+    def is_running(self, script_id: int) -> bool:
+        task = self._tasks.get(script_id)
+        return task is not None and not task.done()
+
+    def start(self, script_id: int) -> PipelineRun:
+        """
+        Start the pipeline for a script in the background.
+
+        Raises:
+            ValueError: If the script has no lines or is already running
+        """
+        if self.is_running(script_id):
+            raise ValueError(f"Pipeline already running for script {script_id}")
+
+        db = SessionLocal()
+        try:
+            lines = (
+                db.query(
+                    ScriptLineModel.id,
+                    ScriptLineModel.tts_status,
+                    ScriptLineModel.avatar_status,
+                    ScriptLineModel.avatar_job_id,
+                )
+                .filter(ScriptLineModel.script_id == script_id)
+                .order_by(ScriptLineModel.line_order)
+                .all()
+            )
+        finally:
+            db.close()
+
+        if not lines:
+            raise ValueError(f"No lines found for script {script_id}")
+
+        run = PipelineRun(script_id, [line.id for line in lines])
+        self.runs[script_id] = run
+        self._tasks[script_id] = asyncio.create_task(self._run(run, lines))
+        return run
+
+    async def _run(self, run: PipelineRun, lines) -> None:
+        logger.info(f"Pipeline started for script {run.script_id}")
+        try:
+            await asyncio.gather(*(self._process_line(run, line) for line in lines))
+
+            if run.failed_lines:
+                raise PipelineError(
+                    f"{len(run.failed_lines)} lines failed, not stitching"
+                )
+
+            run.stitch_status = "processing"
+            job = await self._post(
+                f"{STITCH_SERVICE_URL}/stitch/process/{run.script_id}"
+            )
+            result = await self._wait_for_job(
+                f"{STITCH_SERVICE_URL}/stitch/jobs/{job['job_id']}"
+            )
+            run.stitch_status = "complete"
+            run.final_video_path = (result or {}).get("final_video_path")
+            run.status = "complete"
+            logger.info(
+                f"Pipeline complete for script {run.script_id} in "
+                f"{time.time() - run.started_at:.0f}s"
+            )
+        except Exception as e:
+            run.status = "failed"
+            run.error = str(e)
+            if run.stitch_status == "processing":
+                run.stitch_status = "failed"
+            logger.error(f"Pipeline failed for script {run.script_id}: {str(e)}")
+        finally:
+            run.finished_at = time.time()
+
+    async def _process_line(self, run: PipelineRun, line) -> None:
+        try:
+            if line.tts_status != "complete":
+                async with self._tts_semaphore:
+                    job = await self._post(
+                        f"{TTS_SERVICE_URL}/tts/process-line/{line.id}"
+                    )
+                    await self._wait_for_job(
+                        f"{TTS_SERVICE_URL}/tts/jobs/{job['job_id']}"
+                    )
+            run.tts_complete += 1
+
+            if line.avatar_status == "processing" and line.avatar_job_id:
+                # Still rendering from an earlier run; starting it again
+                # would pay Hedra for a second clip
+                await self._wait_for_avatar(line.id)
+            elif line.avatar_status != "complete":
+                async with self._avatar_semaphore:
+                    await self._generate_avatar(line.id)
+            run.avatar_complete += 1
+        except Exception as e:
+            run.failed_lines[line.id] = str(e)
+            logger.error(f"Pipeline line {line.id} failed: {str(e)}")
+
+    async def _generate_avatar(self, line_id: int) -> None:
+        """Queue an avatar job and poll it until the clip is stored."""
+        job = await self._post(f"{AVATAR_SERVICE_URL}/avatar/generate/{line_id}")
+        # The job finishes once Hedra has accepted the generation
+        await self._wait_for_job(
+            f"{AVATAR_SERVICE_URL}/avatar/jobs/{job['queue_job_id']}"
+        )
+        await self._wait_for_avatar(line_id)
+
+    async def _wait_for_avatar(self, line_id: int) -> None:
+        """Wait up to AVATAR_TIMEOUT for the status poller to see the clip."""
+        waiter = asyncio.get_running_loop().create_future()
+        self._avatar_waiters[line_id] = waiter
+        if self._avatar_poller is None or self._avatar_poller.done():
+            self._avatar_poller = asyncio.create_task(self._poll_avatar_statuses())
+        try:
+            await asyncio.wait_for(waiter, AVATAR_TIMEOUT)
+        except asyncio.TimeoutError:
+            raise PipelineError(
+                f"Avatar generation timed out after {AVATAR_TIMEOUT:.0f}s"
+            )
+        finally:
+            self._avatar_waiters.pop(line_id, None)
+
+    async def _poll_avatar_statuses(self) -> None:
+        """Poll every waiting line at once until none are left waiting."""
+        while self._avatar_waiters:
+            await asyncio.sleep(AVATAR_POLL_INTERVAL)
+            line_ids = list(self._avatar_waiters)
+            for start in range(0, len(line_ids), AVATAR_STATUS_BATCH_SIZE):
+                batch = line_ids[start : start + AVATAR_STATUS_BATCH_SIZE]
+                try:
+                    response = await self.client().post(
+                        f"{AVATAR_SERVICE_URL}/avatar/status:batch",
+                        json={"line_ids": batch},
+                    )
+                except httpx.HTTPError as e:
+                    # Transient status errors are retried on the next poll
+                    logger.warning(f"Avatar status poll failed: {str(e)}")
+                    continue
+                if response.status_code != 200:
+                    logger.warning(
+                        f"Avatar status poll returned "
+                        f"{response.status_code}: {response.text[:200]}"
+                    )
+                    continue
+
+                for line in response.json().get("lines", []):
+                    waiter = self._avatar_waiters.get(line["line_id"])
+                    if waiter is None or waiter.done():
+                        continue
+                    if line["status"] == "complete":
+                        waiter.set_result(None)
+                    elif line["status"] == "failed":
+                        waiter.set_exception(PipelineError("Avatar generation failed"))
+
+    async def _wait_for_job(self, url: str) -> Optional[Dict[str, Any]]:
+        """Poll a queued job until a worker finishes it; returns its result."""
+        deadline = time.time() + JOB_TIMEOUT
+        while time.time() < deadline:
+            await asyncio.sleep(JOB_POLL_INTERVAL)
+            response = await self.client().get(url)
+            if response.status_code != 200:
+                # Transient status errors are retried on the next poll
+                logger.warning(
+                    f"GET {url} returned {response.status_code}: "
+                    f"{response.text[:200]}"
+                )
+                continue
+
+            job = response.json()
+            if job["status"] == "complete":
+                return job.get("result")
+            if job["status"] == "failed":
+                raise PipelineError(job.get("last_error") or "Job failed")
+
+        raise PipelineError(f"Job {url} timed out after {JOB_TIMEOUT:.0f}s")
+
+    async def _post(self, url: str) -> Dict[str, Any]:
+        response = await self.client().post(url)
+        if response.status_code >= 400:
+            try:
+                detail = response.json().get("detail", response.text)
+            except ValueError:
+                detail = response.text
+            raise PipelineError(f"POST {url} returned {response.status_code}: {detail}")
+        return response.json()
+
+    async def aclose(self) -> None:
+        """Cancel running pipelines and close the HTTP client."""
+        for task in self._tasks.values():
+            task.cancel()
+        if self._avatar_poller is not None:
+            self._avatar_poller.cancel()
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+# Global orchestrator instance
+pipeline_orchestrator = PipelineOrchestrator()
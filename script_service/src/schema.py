@@ -0,0 +1,87 @@
+import logging
+
+from sqlalchemy import text
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Columns, indexes and data fixes for existing tables since they were first
+# created. create_all only creates missing tables, so these run on every
+# startup and must be safe to repeat.
+SCHEMA_UPGRADES = [
+    "ALTER TABLE scripts ADD COLUMN IF NOT EXISTS tts_job_id INTEGER",
+    # Bumped by the versioning triggers where they are installed
+    "ALTER TABLE scripts ADD COLUMN IF NOT EXISTS version BIGINT NOT NULL DEFAULT 1",
+    "ALTER TABLE script_lines "
+    "ADD COLUMN IF NOT EXISTS row_version BIGINT NOT NULL DEFAULT 1",
+    "ALTER TABLE script_lines "
+    "ADD COLUMN IF NOT EXISTS audio_duration_seconds DOUBLE PRECISION",
+    "ALTER TABLE script_lines ADD COLUMN IF NOT EXISTS audio_sample_rate INTEGER",
+    # Named audio_loudness_db at first, though it is a relative gain, not LUFS
+    """
+    DO $$
+    BEGIN
+        IF EXISTS (
+            SELECT 1 FROM information_schema.columns
+            WHERE table_name = 'script_lines' AND column_name = 'audio_loudness_db'
+        ) THEN
+            ALTER TABLE script_lines
+            RENAME COLUMN audio_loudness_db TO audio_gain_db;
+        END IF;
+        IF EXISTS (
+            SELECT 1 FROM information_schema.columns
+            WHERE table_name = 'tts_audio_cache'
+            AND column_name = 'audio_loudness_db'
+        ) THEN
+            ALTER TABLE tts_audio_cache
+            RENAME COLUMN audio_loudness_db TO audio_gain_db;
+        END IF;
+    END
+    $$
+    """,
+    "ALTER TABLE script_lines "
+    "ADD COLUMN IF NOT EXISTS audio_gain_db DOUBLE PRECISION",
+    "ALTER TABLE script_lines ADD COLUMN IF NOT EXISTS tts_lease_owner VARCHAR",
+    "ALTER TABLE script_lines "
+    "ADD COLUMN IF NOT EXISTS tts_lease_expires_at TIMESTAMP WITH TIME ZONE",
+    "ALTER TABLE script_lines ADD COLUMN IF NOT EXISTS avatar_lease_owner VARCHAR",
+    "ALTER TABLE script_lines "
+    "ADD COLUMN IF NOT EXISTS avatar_lease_expires_at TIMESTAMP WITH TIME ZONE",
+    # Lines left in processing by workers from before line leases hold no
+    # lease for the reaper to find expired, so they are requeued here. An
+    # avatar line rendering on Hedra holds no lease either and is kept.
+    "UPDATE script_lines SET tts_status = 'queued' "
+    "WHERE tts_status = 'processing' AND tts_lease_owner IS NULL",
+    "UPDATE script_lines SET avatar_status = 'queued' "
+    "WHERE avatar_status = 'processing' AND avatar_lease_owner IS NULL "
+    "AND avatar_job_id IS NULL",
+    "CREATE INDEX IF NOT EXISTS ix_script_lines_tts_lease "
+    "ON script_lines (tts_lease_expires_at) "
+    "WHERE tts_lease_expires_at IS NOT NULL",
+    "CREATE INDEX IF NOT EXISTS ix_script_lines_avatar_lease "
+    "ON script_lines (avatar_lease_expires_at) "
+    "WHERE avatar_lease_expires_at IS NOT NULL",
+    # Batch status polls select a script's lines by script_id
+    "CREATE INDEX IF NOT EXISTS ix_script_lines_script_id "
+    "ON script_lines (script_id)",
+    # Hedra callbacks find their line by generation ID
+    "CREATE INDEX IF NOT EXISTS ix_script_lines_avatar_job_id "
+    "ON script_lines (avatar_job_id)",
+]
+
+
+def upgrade_schema(engine) -> None:
+    """Bring existing tables up to the current schema (Postgres only)."""
+    if engine.dialect.name != "postgresql":
+        logger.warning(
+            f"Schema upgrades need Postgres, not {engine.dialect.name}; "
+            "recreate the tables to pick up new columns"
+        )
+        return
+
+    try:
+        with engine.begin() as conn:
+            for statement in SCHEMA_UPGRADES:
+                conn.execute(text(statement))
+    except Exception as e:
+        logger.error(f"Could not upgrade the database schema: {str(e)}")
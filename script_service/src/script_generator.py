@@ -1,9 +1,14 @@
 import os
 import json
+import math
+import asyncio
+import hashlib
 import httpx
 import logging
-from typing import List, Dict, Any
+from datetime import datetime, timedelta, timezone
+from typing import List, Dict, Any, AsyncIterator, Optional, Tuple
 from langchain.chains import LLMChain
+from langchain.prompts import ChatPromptTemplate
 from langchain_openai import ChatOpenAI
 from langchain.output_parsers import ResponseSchema, StructuredOutputParser
 
@@ -12,7 +17,24 @@ from .langchain_prompts import (
     get_interview_prompt_template,
     get_roundtable_prompt_template,
     get_article_discussion_prompt_template,
+    get_outline_prompt_template,
+    get_segment_instructions,
+    get_summary_prompt_template,
 )
+from .input_summarizer import (
+    ArticleFetchError,
+    combine_questionnaire_answers,
+    estimate_tokens,
+    fetch_article_text,
+    map_reduce_summarize,
+)
+from .script_parser import (
+    ScriptLineStreamParser,
+    script_response_parser,
+    outline_response_parser,
+)
+from .database import SessionLocal
+from .models import LLMCacheModel
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -20,31 +42,555 @@ logger = logging.getLogger(__name__)
 # Get the OpenAI API key from environment variables
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 
+# Model settings (part of the response cache key)
+LLM_MODEL = "gpt-4o"
+LLM_TEMPERATURE = 0.7
+
+# Response cache settings
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "true").lower() == "true"
+LLM_CACHE_TTL_SECONDS = int(os.getenv("LLM_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "500"))
+
+# Long scripts are planned as an outline and generated segment by segment
+SEGMENTED_MIN_MINUTES = int(os.getenv("SEGMENTED_MIN_MINUTES", "20"))
+SEGMENT_TARGET_MINUTES = int(os.getenv("SEGMENT_TARGET_MINUTES", "8"))
+SEGMENT_CONCURRENCY = int(os.getenv("SEGMENT_CONCURRENCY", "4"))
+OUTLINE_MODEL = os.getenv("OUTLINE_MODEL", "gpt-4o-mini")
+OUTLINE_TEMPERATURE = 0.3
+
+# Labels used in the base prompt for each format
+FORMAT_LABELS = {
+    "interview": "interview",
+    "roundtable": "roundtable",
+    "article": "article discussion",
+}
+
+
+# Connection pool settings for the shared OpenAI HTTP client
+OPENAI_MAX_CONNECTIONS = int(os.getenv("OPENAI_MAX_CONNECTIONS", "20"))
+OPENAI_MAX_KEEPALIVE_CONNECTIONS = int(
+    os.getenv("OPENAI_MAX_KEEPALIVE_CONNECTIONS", "10")
+)
+OPENAI_KEEPALIVE_EXPIRY = float(os.getenv("OPENAI_KEEPALIVE_EXPIRY", "120"))
+OPENAI_TIMEOUT = float(os.getenv("OPENAI_TIMEOUT", "300"))
+
+# Map-reduce summarization of long questionnaires and articles
+SUMMARY_MODEL = os.getenv("SUMMARY_MODEL", "gpt-4o-mini")
+SUMMARY_TEMPERATURE = 0.2
+SUMMARY_TRIGGER_TOKENS = int(os.getenv("SUMMARY_TRIGGER_TOKENS", "6000"))
+SUMMARY_MAX_TOKENS = int(os.getenv("SUMMARY_MAX_TOKENS", "3000"))
+SUMMARY_CHUNK_TOKENS = int(os.getenv("SUMMARY_CHUNK_TOKENS", "3000"))
+SUMMARY_CONCURRENCY = int(os.getenv("SUMMARY_CONCURRENCY", "8"))
+
+# Ask the model for schema-conforming JSON (OpenAI structured outputs)
+STRUCTURED_OUTPUT_ENABLED = (
+    os.getenv("STRUCTURED_OUTPUT_ENABLED", "true").lower() == "true"
+)
+
+# Prompt template factory, model, temperature and response parser per chain
+CHAIN_SPECS = {
+    "interview": (
+        get_interview_prompt_template,
+        LLM_MODEL,
+        LLM_TEMPERATURE,
+        script_response_parser,
+    ),
+    "roundtable": (
+        get_roundtable_prompt_template,
+        LLM_MODEL,
+        LLM_TEMPERATURE,
+        script_response_parser,
+    ),
+    "article": (
+        get_article_discussion_prompt_template,
+        LLM_MODEL,
+        LLM_TEMPERATURE,
+        script_response_parser,
+    ),
+    "outline": (
+        get_outline_prompt_template,
+        OUTLINE_MODEL,
+        OUTLINE_TEMPERATURE,
+        outline_response_parser,
+    ),
+    # Plain-text chain, no response parser
+    "summarize": (
+        get_summary_prompt_template,
+        SUMMARY_MODEL,
+        SUMMARY_TEMPERATURE,
+        None,
+    ),
+}
+
+
+class _InstrumentedTransport(httpx.AsyncHTTPTransport):
+    """HTTP transport that counts requests and newly opened connections."""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.requests = 0
+        self.new_connections = 0
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        self.requests += 1
+        request.extensions = {**request.extensions, "trace": self._trace}
+        return await super().handle_async_request(request)
+
+    async def _trace(self, event_name: str, info: Dict[str, Any]) -> None:
+        # httpcore only emits connect_tcp events when the pool opens a connection
+        if event_name == "connection.connect_tcp.complete":
+            self.new_connections += 1
+
+
+class LLMClientRegistry:
+    """
+    Process-wide registry of chat models and prompt chains.
+
+    All models share one keep-alive httpx client, so requests reuse pooled
+    TLS connections to OpenAI instead of opening a new one per generation.
+    Models are created once per (model, temperature) and chains once per
+    name in CHAIN_SPECS; everything is built lazily or by warm_up().
+    """
 
-# Initialize the LLM
-def get_llm():
-    """Returns a LangChain LLM instance."""
-    return ChatOpenAI(model="gpt-4o", temperature=0.7, api_key=OPENAI_API_KEY)
+    def __init__(
+        self,
+        max_connections: int,
+        max_keepalive_connections: int,
+        keepalive_expiry: float,
+        timeout: float,
+    ):
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self.timeout = timeout
+        self._transport: Optional[_InstrumentedTransport] = None
+        self._http_client: Optional[httpx.AsyncClient] = None
+        self._llms: Dict[Tuple[str, float], ChatOpenAI] = {}
+        self._chains: Dict[str, LLMChain] = {}
+
+    def http_client(self) -> httpx.AsyncClient:
+        """Get or create the shared keep-alive HTTP client."""
+        if self._http_client is None:
+            self._transport = _InstrumentedTransport(limits=self.limits)
+            self._http_client = httpx.AsyncClient(
+                transport=self._transport, timeout=self.timeout
+            )
+        return self._http_client
+
+    def llm(self, model: str, temperature: float) -> ChatOpenAI:
+        """Get or create the chat model for a model/temperature pair."""
+        key = (model, temperature)
+        if key not in self._llms:
+            self._llms[key] = ChatOpenAI(
+                model=model,
+                temperature=temperature,
+                api_key=OPENAI_API_KEY,
+                http_async_client=self.http_client(),
+            )
+        return self._llms[key]
+
+    def chain(self, name: str) -> LLMChain:
+        """
+        Get or create the named chain from CHAIN_SPECS.
+
+        With structured output enabled the model is bound to the parser's
+        JSON schema, so responses arrive as {list_key: [...]} objects. Chains
+        without a parser return plain text.
+        """
+        if name not in self._chains:
+            prompt_factory, model, temperature, parser = CHAIN_SPECS[name]
+            llm = self.llm(model, temperature)
+            if STRUCTURED_OUTPUT_ENABLED and parser:
+                llm = llm.bind(response_format=parser.response_format)
+            self._chains[name] = LLMChain(llm=llm, prompt=prompt_factory())
+        return self._chains[name]
+
+    def warm_up(self) -> None:
+        """Build every chain up front so requests never pay for setup."""
+        for name in CHAIN_SPECS:
+            self.chain(name)
+        logger.info(f"LLM client registry ready with chains: {list(self._chains)}")
+
+    async def aclose(self) -> None:
+        """Close pooled connections; models and chains are rebuilt on next use."""
+        if self._http_client is not None:
+            await self._http_client.aclose()
+        self._http_client = None
+        self._transport = None
+        self._llms = {}
+        self._chains = {}
+
+    def stats(self) -> Dict[str, Any]:
+        """Connection reuse counters for this process."""
+        requests = self._transport.requests if self._transport else 0
+        new_connections = self._transport.new_connections if self._transport else 0
+        reused = max(requests - new_connections, 0)
+        return {
+            "requests": requests,
+            "new_connections": new_connections,
+            "reused_requests": reused,
+            "reuse_rate": reused / requests if requests else 0.0,
+            "max_connections": self.limits.max_connections,
+            "max_keepalive_connections": self.limits.max_keepalive_connections,
+            "chains": list(self._chains),
+        }
+
+
+# Global client registry
+llm_clients = LLMClientRegistry(
+    OPENAI_MAX_CONNECTIONS,
+    OPENAI_MAX_KEEPALIVE_CONNECTIONS,
+    OPENAI_KEEPALIVE_EXPIRY,
+    OPENAI_TIMEOUT,
+)
 
 
-def format_questionnaire_summary(questionnaire_answers):
-    """Extract the direct text content from questionnaire answers."""
-    # Since the frontend now sends survey responses as direct text,
-    # just extract and return the content without formatting
-    if questionnaire_answers and len(questionnaire_answers) > 0:
-        return questionnaire_answers[0]["answer"]
-    return "No survey responses provided."
+class LLMResponseCache:
+    """
+    Persistent, content-addressed cache of parsed LLM responses.
 
+    Entries live in the llm_response_cache table so they survive restarts and
+    are shared by every worker. Keys are a sha256 over the model, temperature,
+    rendered prompt and raw inputs, so any change to a template or input
+    produces a new key. Entries expire after a TTL and the least recently used
+    entries are evicted once the table grows past max_entries.
+    """
 
-def extract_article_summary(article_url):
+    def __init__(self, session_factory, ttl_seconds: int, max_entries: int):
+        self.session_factory = session_factory
+        self.ttl = timedelta(seconds=ttl_seconds)
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.bypasses = 0
+        self.expirations = 0
+        self.evictions = 0
+        self.errors = 0
+
+    @staticmethod
+    def make_key(
+        model: str,
+        temperature: float,
+        prompt_template: ChatPromptTemplate,
+        inputs: Dict[str, str],
+    ) -> str:
+        """Hash everything that determines the model's output."""
+        rendered_prompt = [
+            {"role": message.type, "content": message.content}
+            for message in prompt_template.format_messages(**inputs)
+        ]
+        payload = json.dumps(
+            {
+                "model": model,
+                "temperature": temperature,
+                "prompt": rendered_prompt,
+                "inputs": inputs,
+            },
+            sort_keys=True,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[List[Dict[str, Any]]]:
+        """Return a cached parsed response, or None on a miss or expired entry."""
+        db = self.session_factory()
+        try:
+            entry = (
+                db.query(LLMCacheModel).filter(LLMCacheModel.cache_key == key).first()
+            )
+            if entry is None:
+                self.misses += 1
+                return None
+
+            now = datetime.now(timezone.utc)
+            if _as_utc(entry.created_at) < now - self.ttl:
+                db.delete(entry)
+                db.commit()
+                self.expirations += 1
+                self.misses += 1
+                return None
+
+            entry.last_accessed_at = now
+            entry.hit_count = (entry.hit_count or 0) + 1
+            db.commit()
+            self.hits += 1
+            return json.loads(entry.response_json)
+        except Exception as e:
+            # A broken cache must never break generation
+            db.rollback()
+            self.errors += 1
+            self.misses += 1
+            logger.error(f"LLM cache lookup failed: {e}")
+            return None
+        finally:
+            db.close()
+
+    async def aget(self, key: str) -> Optional[List[Dict[str, Any]]]:
+        """get() in a worker thread, so the lookup never blocks the event loop."""
+        return await asyncio.to_thread(self.get, key)
+
+    async def aset(
+        self,
+        key: str,
+        model: str,
+        temperature: float,
+        parsed_response: List[Dict[str, Any]],
+    ) -> None:
+        """set() in a worker thread, so the write never blocks the event loop."""
+        await asyncio.to_thread(self.set, key, model, temperature, parsed_response)
+
+    def set(
+        self,
+        key: str,
+        model: str,
+        temperature: float,
+        parsed_response: List[Dict[str, Any]],
+    ) -> None:
+        """Store a parsed response and evict expired and excess entries."""
+        db = self.session_factory()
+        try:
+            now = datetime.now(timezone.utc)
+            db.merge(
+                LLMCacheModel(
+                    cache_key=key,
+                    model=model,
+                    temperature=temperature,
+                    response_json=json.dumps(parsed_response),
+                    created_at=now,
+                    last_accessed_at=now,
+                    hit_count=0,
+                )
+            )
+            db.flush()
+
+            self.expirations += (
+                db.query(LLMCacheModel)
+                .filter(LLMCacheModel.created_at < now - self.ttl)
+                .delete(synchronize_session=False)
+            )
+
+            excess = db.query(LLMCacheModel).count() - self.max_entries
+            if excess > 0:
+                lru_keys = (
+                    db.query(LLMCacheModel.cache_key)
+                    .order_by(LLMCacheModel.last_accessed_at)
+                    .limit(excess)
+                    .subquery()
+                )
+                self.evictions += (
+                    db.query(LLMCacheModel)
+                    .filter(LLMCacheModel.cache_key.in_(lru_keys.select()))
+                    .delete(synchronize_session=False)
+                )
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            self.errors += 1
+            logger.error(f"LLM cache store failed: {e}")
+        finally:
+            db.close()
+
+    def record_bypass(self) -> None:
+        self.bypasses += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters for this process."""
+        lookups = self.hits + self.misses
+        return {
+            "enabled": LLM_CACHE_ENABLED,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "bypasses": self.bypasses,
+            "expirations": self.expirations,
+            "evictions": self.evictions,
+            "errors": self.errors,
+            "ttl_seconds": int(self.ttl.total_seconds()),
+            "max_entries": self.max_entries,
+        }
+
+
+def _as_utc(value: datetime) -> datetime:
+    # Some drivers hand back naive datetimes for timezone-aware columns
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+# Global cache instance
+llm_cache = LLMResponseCache(SessionLocal, LLM_CACHE_TTL_SECONDS, LLM_CACHE_MAX_ENTRIES)
+
+
+async def run_cached_chain(
+    chain_name: str,
+    inputs: Dict[str, str],
+    bypass_cache: bool = False,
+) -> List[Dict[str, Any]]:
     """
-    Extract and summarize the content of an article from its URL.
-    For now, we're just returning the URL as a placeholder.
-    In a production environment, you would integrate with a web scraping
-    or article extraction service.
+    Run a pooled chain and parse its response, serving identical requests from cache.
+
+    Args:
+        chain_name: Name of the chain in CHAIN_SPECS
+        inputs: Template inputs
+        bypass_cache: Skip the cache lookup (the fresh result is still stored)
+
+    Returns:
+        The parsed response
+    """
+    chain = llm_clients.chain(chain_name)
+    _, model, temperature, parser = CHAIN_SPECS[chain_name]
+
+    cache_key = None
+    if LLM_CACHE_ENABLED:
+        cache_key = llm_cache.make_key(model, temperature, chain.prompt, inputs)
+        if bypass_cache:
+            llm_cache.record_bypass()
+        else:
+            cached = await llm_cache.aget(cache_key)
+            if cached is not None:
+                logger.info(f"LLM cache hit ({cache_key[:12]}), skipping OpenAI call")
+                return cached
+
+    # Run the chain with our inputs
+    response = await chain.arun(**inputs)
+
+    logger.info(f"OpenAI Response (first 500 chars): {response[:500]}...")
+
+    parsed = parser.parse(response) if parser else response.strip()
+
+    if cache_key:
+        await llm_cache.aset(cache_key, model, temperature, parsed)
+
+    return parsed
+
+
+async def run_script_chain(
+    format_type: str,
+    inputs: Dict[str, str],
+    bypass_cache: bool = False,
+) -> List[Dict[str, str]]:
     """
-    # Placeholder - in a real implementation, you'd extract and summarize the article
-    return f"Article at {article_url}"
+    Run a format's script chain, serving identical requests from cache.
+
+    Args:
+        format_type: Type of podcast format (interview, roundtable, article)
+        inputs: Template inputs
+        bypass_cache: Skip the cache lookup (the fresh result is still stored)
+
+    Returns:
+        List of dictionaries representing script lines
+    """
+    return await run_cached_chain(format_type, inputs, bypass_cache)
+
+
+async def summarize_source(
+    text: str, source_label: str, bypass_cache: bool = False
+) -> str:
+    """
+    Fit source material into SUMMARY_MAX_TOKENS before it reaches a script prompt.
+
+    Text under SUMMARY_TRIGGER_TOKENS is passed through untouched. Larger
+    inputs are map-reduce summarized on the fast model; every chunk summary
+    goes through the LLM cache, so a repeated input costs no model calls.
+    """
+    if estimate_tokens(text) <= SUMMARY_TRIGGER_TOKENS:
+        return text
+
+    async def summarize(chunk: str, max_words: int) -> str:
+        inputs = {
+            "source_label": source_label,
+            "max_words": str(max_words),
+            "text": chunk,
+        }
+        return await run_cached_chain("summarize", inputs, bypass_cache)
+
+    return await map_reduce_summarize(
+        text,
+        summarize,
+        SUMMARY_CHUNK_TOKENS,
+        SUMMARY_MAX_TOKENS,
+        SUMMARY_CONCURRENCY,
+    )
+
+
+async def format_questionnaire_summary(questionnaire_answers, bypass_cache=False):
+    """Combine every questionnaire answer, summarizing them if they are long."""
+    combined = combine_questionnaire_answers(questionnaire_answers)
+    if not combined:
+        return "No survey responses provided."
+    return await summarize_source(combined, "survey responses", bypass_cache)
+
+
+async def extract_article_summary(article_url, bypass_cache=False):
+    """
+    Fetch the article at a URL and return its text, summarized if it is long.
+    Falls back to a reference to the URL if the article cannot be fetched.
+    """
+    try:
+        article_text = await fetch_article_text(article_url)
+    except (httpx.HTTPError, ArticleFetchError) as e:
+        logger.warning(f"Could not fetch article {article_url}: {e}")
+        return f"Article at {article_url}"
+
+    if not article_text.strip():
+        return f"Article at {article_url}"
+
+    summary = await summarize_source(article_text, "article", bypass_cache)
+    return f"Article at {article_url}:\n{summary}"
+
+
+def build_interview_inputs(
+    host_info: Dict[str, str],
+    guest_info: Dict[str, str],
+    questionnaire_summary: str,
+    length_minutes: int,
+) -> Dict[str, str]:
+    """Build the prompt inputs for the interview template."""
+    return {
+        "base_prompt": get_base_system_prompt(
+            FORMAT_LABELS["interview"], length_minutes
+        ),
+        "questionnaire_summary": questionnaire_summary,
+        "host_name": host_info["name"],
+        "guest_name": guest_info["name"],
+    }
+
+
+def build_roundtable_inputs(
+    host_info: Dict[str, str],
+    guest_infos: List[Dict[str, str]],
+    questionnaire_summary: str,
+    length_minutes: int,
+) -> Dict[str, str]:
+    """Build the prompt inputs for the roundtable template."""
+    guest_names_str = ", ".join(guest["name"] for guest in guest_infos)
+    return {
+        "base_prompt": get_base_system_prompt(
+            FORMAT_LABELS["roundtable"], length_minutes
+        ),
+        "questionnaire_summary": questionnaire_summary,
+        "host_name": host_info["name"],
+        "guest_names": guest_names_str,
+        "guest_names_list": guest_names_str,
+    }
+
+
+def build_article_discussion_inputs(
+    host_info: Dict[str, str],
+    guest_infos: List[Dict[str, str]],
+    questionnaire_summary: str,
+    article_summary: str,
+    length_minutes: int,
+) -> Dict[str, str]:
+    """Build the prompt inputs for the article discussion template."""
+    guest_names_str = ", ".join(guest["name"] for guest in guest_infos)
+    return {
+        "base_prompt": get_base_system_prompt(FORMAT_LABELS["article"], length_minutes),
+        "questionnaire_summary": questionnaire_summary,
+        "article_summary": article_summary,
+        "host_name": host_info["name"],
+        "guest_names": guest_names_str,
+        "guest_names_list": guest_names_str,
+    }
 
 
 async def generate_interview_script(
@@ -53,30 +599,23 @@ async def generate_interview_script(
     guest_info: Dict[str, str],
     questionnaire_answers: List[Dict[str, str]],
     length_minutes: int,
+    bypass_cache: bool = False,
 ) -> List[Dict[str, str]]:
     """Generate a script for a two-person interview podcast format."""
     # Format the questionnaire answers
-    questionnaire_summary = format_questionnaire_summary(questionnaire_answers)
+    questionnaire_summary = await format_questionnaire_summary(
+        questionnaire_answers, bypass_cache
+    )
 
     logger.info(f"Generating interview script: {title}")
     logger.info(f"Host: {host_info['name']}, Guest: {guest_info['name']}")
     logger.info(f"Length: {length_minutes} minutes")
     logger.info(f"Survey responses content: {questionnaire_summary[:200]}...")
 
-    # Get the prompt template for interviews
-    prompt_template = get_interview_prompt_template()
-
-    # Set up the LLM chain
-    llm = get_llm()
-    chain = LLMChain(llm=llm, prompt=prompt_template)
-
     # Prepare inputs for logging
-    inputs = {
-        "base_prompt": get_base_system_prompt("interview", length_minutes),
-        "questionnaire_summary": questionnaire_summary,
-        "host_name": host_info["name"],
-        "guest_name": guest_info["name"],
-    }
+    inputs = build_interview_inputs(
+        host_info, guest_info, questionnaire_summary, length_minutes
+    )
 
     logger.info("OpenAI Request Inputs:")
     logger.info(f"Base prompt: {inputs['base_prompt'][:300]}...")
@@ -84,36 +623,7 @@ async def generate_interview_script(
     logger.info(f"Host name: {inputs['host_name']}")
     logger.info(f"Guest name: {inputs['guest_name']}")
 
-    # Run the chain with our inputs
-    response = await chain.arun(**inputs)
-
-    logger.info(f"OpenAI Response (first 500 chars): {response[:500]}...")
-
-    # Parse the JSON response
-    try:
-        # The response might be a string representation of a JSON array
-        # or it might include some explanatory text before/after the JSON
-        script_lines = json.loads(response)
-
-        # Validate the structure
-        for line in script_lines:
-            if not all(key in line for key in ["speaker_role", "speaker_name", "text"]):
-                raise ValueError(f"Invalid line structure: {line}")
-
-        return script_lines
-    except json.JSONDecodeError:
-        # Try to find and extract the JSON array if it's embedded in text
-        import re
-
-        json_match = re.search(r"\[\s*{.*}\s*\]", response, re.DOTALL)
-        if json_match:
-            try:
-                script_lines = json.loads(json_match.group(0))
-                return script_lines
-            except json.JSONDecodeError:
-                raise ValueError(f"Could not parse JSON from response: {response}")
-        else:
-            raise ValueError(f"Could not find JSON array in response: {response}")
+    return await run_script_chain("interview", inputs, bypass_cache)
 
 
 async def generate_roundtable_script(
@@ -122,10 +632,13 @@ async def generate_roundtable_script(
     guest_infos: List[Dict[str, str]],
     questionnaire_answers: List[Dict[str, str]],
     length_minutes: int,
+    bypass_cache: bool = False,
 ) -> List[Dict[str, str]]:
     """Generate a script for a roundtable podcast format with multiple guests."""
     # Format the questionnaire answers
-    questionnaire_summary = format_questionnaire_summary(questionnaire_answers)
+    questionnaire_summary = await format_questionnaire_summary(
+        questionnaire_answers, bypass_cache
+    )
 
     # Format the guest names for the prompt
     guest_names = [guest["name"] for guest in guest_infos]
@@ -136,21 +649,10 @@ async def generate_roundtable_script(
     logger.info(f"Length: {length_minutes} minutes")
     logger.info(f"Survey responses content: {questionnaire_summary[:200]}...")
 
-    # Get the prompt template for roundtable discussions
-    prompt_template = get_roundtable_prompt_template()
-
-    # Set up the LLM chain
-    llm = get_llm()
-    chain = LLMChain(llm=llm, prompt=prompt_template)
-
     # Prepare inputs for logging
-    inputs = {
-        "base_prompt": get_base_system_prompt("roundtable", length_minutes),
-        "questionnaire_summary": questionnaire_summary,
-        "host_name": host_info["name"],
-        "guest_names": guest_names_str,
-        "guest_names_list": guest_names_str,
-    }
+    inputs = build_roundtable_inputs(
+        host_info, guest_infos, questionnaire_summary, length_minutes
+    )
 
     logger.info("OpenAI Request Inputs (Roundtable):")
     logger.info(f"Base prompt: {inputs['base_prompt'][:300]}...")
@@ -158,34 +660,7 @@ async def generate_roundtable_script(
     logger.info(f"Host name: {inputs['host_name']}")
     logger.info(f"Guest names: {inputs['guest_names']}")
 
-    # Run the chain with our inputs
-    response = await chain.arun(**inputs)
-
-    logger.info(f"OpenAI Response (first 500 chars): {response[:500]}...")
-
-    # Parse the JSON response (same as in the interview function)
-    try:
-        script_lines = json.loads(response)
-
-        # Validate the structure
-        for line in script_lines:
-            if not all(key in line for key in ["speaker_role", "speaker_name", "text"]):
-                raise ValueError(f"Invalid line structure: {line}")
-
-        return script_lines
-    except json.JSONDecodeError:
-        # Try to find and extract the JSON array if it's embedded in text
-        import re
-
-        json_match = re.search(r"\[\s*{.*}\s*\]", response, re.DOTALL)
-        if json_match:
-            try:
-                script_lines = json.loads(json_match.group(0))
-                return script_lines
-            except json.JSONDecodeError:
-                raise ValueError(f"Could not parse JSON from response: {response}")
-        else:
-            raise ValueError(f"Could not find JSON array in response: {response}")
+    return await run_script_chain("roundtable", inputs, bypass_cache)
 
 
 async def generate_article_discussion_script(
@@ -195,13 +670,16 @@ async def generate_article_discussion_script(
     questionnaire_answers: List[Dict[str, str]],
     article_url: str,
     length_minutes: int,
+    bypass_cache: bool = False,
 ) -> List[Dict[str, str]]:
     """Generate a script for a podcast discussing an article or blog post."""
     # Format the questionnaire answers
-    questionnaire_summary = format_questionnaire_summary(questionnaire_answers)
+    questionnaire_summary = await format_questionnaire_summary(
+        questionnaire_answers, bypass_cache
+    )
 
     # Get article summary
-    article_summary = extract_article_summary(article_url)
+    article_summary = await extract_article_summary(article_url, bypass_cache)
 
     # Format the guest names for the prompt
     guest_names = [guest["name"] for guest in guest_infos]
@@ -213,22 +691,10 @@ async def generate_article_discussion_script(
     logger.info(f"Length: {length_minutes} minutes")
     logger.info(f"Survey responses content: {questionnaire_summary[:200]}...")
 
-    # Get the prompt template for article discussions
-    prompt_template = get_article_discussion_prompt_template()
-
-    # Set up the LLM chain
-    llm = get_llm()
-    chain = LLMChain(llm=llm, prompt=prompt_template)
-
     # Prepare inputs for logging
-    inputs = {
-        "base_prompt": get_base_system_prompt("article discussion", length_minutes),
-        "questionnaire_summary": questionnaire_summary,
-        "article_summary": article_summary,
-        "host_name": host_info["name"],
-        "guest_names": guest_names_str,
-        "guest_names_list": guest_names_str,
-    }
+    inputs = build_article_discussion_inputs(
+        host_info, guest_infos, questionnaire_summary, article_summary, length_minutes
+    )
 
     logger.info("OpenAI Request Inputs (Article Discussion):")
     logger.info(f"Base prompt: {inputs['base_prompt'][:300]}...")
@@ -237,34 +703,180 @@ async def generate_article_discussion_script(
     logger.info(f"Host name: {inputs['host_name']}")
     logger.info(f"Guest names: {inputs['guest_names']}")
 
-    # Run the chain with our inputs
-    response = await chain.arun(**inputs)
+    return await run_script_chain("article", inputs, bypass_cache)
 
-    logger.info(f"OpenAI Response (first 500 chars): {response[:500]}...")
 
-    # Parse the JSON response (same as in the other functions)
+def split_speakers(
+    format_type: str, speakers: List[Dict[str, str]], article_url: str = None
+) -> Tuple[Dict[str, str], List[Dict[str, str]]]:
+    """
+    Validate the speaker list for a format and split it into host and guests.
+
+    Raises:
+        ValueError: If the speakers or article URL do not fit the format
+    """
+    # Extract host and guest information
+    host_info = next((s for s in speakers if s["role"] == "host"), None)
+    guest_infos = [s for s in speakers if s["role"] != "host"]
+
+    if not host_info:
+        raise ValueError("No host specified in speakers list")
+
+    if format_type == "interview":
+        if len(guest_infos) != 1:
+            raise ValueError("Interview format requires exactly one guest")
+    elif format_type == "roundtable":
+        if not guest_infos:
+            raise ValueError("Roundtable format requires at least one guest")
+    elif format_type == "article":
+        if not article_url:
+            raise ValueError("Article URL is required for article discussion format")
+    else:
+        raise ValueError(f"Unsupported format type: {format_type}")
+
+    return host_info, guest_infos
+
+
+async def build_script_inputs(
+    format_type: str,
+    speakers: List[Dict[str, str]],
+    questionnaire_answers: List[Dict[str, str]],
+    length_minutes: int,
+    article_url: str = None,
+    bypass_cache: bool = False,
+) -> Dict[str, str]:
+    """
+    Resolve the prompt inputs for a script request.
+
+    Returns:
+        Template inputs for the format's chain
+    """
+    host_info, guest_infos = split_speakers(format_type, speakers, article_url)
+    questionnaire_summary = await format_questionnaire_summary(
+        questionnaire_answers, bypass_cache
+    )
+
+    if format_type == "interview":
+        return build_interview_inputs(
+            host_info, guest_infos[0], questionnaire_summary, length_minutes
+        )
+    elif format_type == "roundtable":
+        return build_roundtable_inputs(
+            host_info, guest_infos, questionnaire_summary, length_minutes
+        )
+    else:
+        return build_article_discussion_inputs(
+            host_info,
+            guest_infos,
+            questionnaire_summary,
+            await extract_article_summary(article_url, bypass_cache),
+            length_minutes,
+        )
+
+
+async def generate_outline(
+    format_type: str,
+    title: str,
+    inputs: Dict[str, str],
+    length_minutes: int,
+    segment_count: int,
+    bypass_cache: bool = False,
+) -> List[Dict[str, str]]:
+    """
+    Plan a long episode as a list of segments with a single fast model call.
+
+    Args:
+        format_type: Type of podcast format (interview, roundtable, article)
+        title: Title of the podcast
+        inputs: The format's script prompt inputs
+        length_minutes: Desired length of the whole episode in minutes
+        segment_count: Number of segments to plan
+
+    Returns:
+        List of segment dictionaries with 'title' and 'summary'
+    """
+    guests = inputs.get("guest_names") or inputs.get("guest_name")
+    outline_inputs = {
+        "format_label": FORMAT_LABELS[format_type],
+        "length_minutes": str(length_minutes),
+        "segment_count": str(segment_count),
+        "participants": f"Host: {inputs['host_name']}; Guests: {guests}",
+        "questionnaire_summary": inputs["questionnaire_summary"],
+        "article_summary": inputs.get("article_summary", "None"),
+        "title": title,
+    }
+
+    logger.info(f"Generating {segment_count}-segment outline for: {title}")
+
+    return await run_cached_chain("outline", outline_inputs, bypass_cache)
+
+
+async def generate_segmented_script(
+    format_type: str,
+    title: str,
+    speakers: List[Dict[str, str]],
+    questionnaire_answers: List[Dict[str, str]],
+    length_minutes: int,
+    article_url: str = None,
+    bypass_cache: bool = False,
+) -> List[Dict[str, str]]:
+    """
+    Generate a long script as an outline followed by concurrently written segments.
+
+    One fast call plans the segments, then every segment is generated in
+    parallel (at most SEGMENT_CONCURRENCY at a time) with the full outline and
+    its neighbours as continuity hints, and the results are joined in order.
+    Wall-clock time therefore tracks the segment length instead of the
+    episode length. Falls back to a single call if the outline fails.
+
+    Returns:
+        List of dictionaries representing script lines
+    """
+    inputs = await build_script_inputs(
+        format_type,
+        speakers,
+        questionnaire_answers,
+        length_minutes,
+        article_url,
+        bypass_cache,
+    )
+    segment_count = max(2, math.ceil(length_minutes / SEGMENT_TARGET_MINUTES))
+
     try:
-        script_lines = json.loads(response)
-
-        # Validate the structure
-        for line in script_lines:
-            if not all(key in line for key in ["speaker_role", "speaker_name", "text"]):
-                raise ValueError(f"Invalid line structure: {line}")
-
-        return script_lines
-    except json.JSONDecodeError:
-        # Try to find and extract the JSON array if it's embedded in text
-        import re
-
-        json_match = re.search(r"\[\s*{.*}\s*\]", response, re.DOTALL)
-        if json_match:
-            try:
-                script_lines = json.loads(json_match.group(0))
-                return script_lines
-            except json.JSONDecodeError:
-                raise ValueError(f"Could not parse JSON from response: {response}")
-        else:
-            raise ValueError(f"Could not find JSON array in response: {response}")
+        outline = await generate_outline(
+            format_type, title, inputs, length_minutes, segment_count, bypass_cache
+        )
+    except Exception as e:
+        logger.warning(f"Outline generation failed, using a single call: {e}")
+        return await run_script_chain(format_type, inputs, bypass_cache)
+
+    segment_minutes = max(1, round(length_minutes / len(outline)))
+    semaphore = asyncio.Semaphore(SEGMENT_CONCURRENCY)
+
+    async def generate_segment(index: int) -> List[Dict[str, str]]:
+        segment_inputs = {
+            **inputs,
+            "base_prompt": get_base_system_prompt(
+                FORMAT_LABELS[format_type], segment_minutes
+            )
+            + get_segment_instructions(title, outline, index, segment_minutes),
+        }
+        async with semaphore:
+            logger.info(
+                f"Generating segment {index + 1}/{len(outline)}: "
+                f"{outline[index]['title']}"
+            )
+            return await run_script_chain(format_type, segment_inputs, bypass_cache)
+
+    segments = await asyncio.gather(
+        *(generate_segment(index) for index in range(len(outline)))
+    )
+
+    script_lines = [line for segment in segments for line in segment]
+    logger.info(
+        f"Stitched {len(outline)} segments into {len(script_lines)} lines for: {title}"
+    )
+    return script_lines
 
 
 async def generate_script(
@@ -274,6 +886,7 @@ async def generate_script(
     questionnaire_answers: List[Dict[str, str]],
     length_minutes: int,
     article_url: str = None,
+    bypass_cache: bool = False,
 ) -> List[Dict[str, str]]:
     """
     Generate a podcast script based on the format type and provided information.
@@ -285,32 +898,43 @@ async def generate_script(
         questionnaire_answers: List of question-answer dictionaries
         length_minutes: Desired length of the podcast in minutes
         article_url: URL of the article for article discussion format
+        bypass_cache: Skip the LLM response cache and force a fresh generation
 
     Returns:
         List of dictionaries representing script lines
     """
-    # Extract host and guest information
-    host_info = next((s for s in speakers if s["role"] == "host"), None)
-    guest_infos = [s for s in speakers if s["role"] != "host"]
+    host_info, guest_infos = split_speakers(format_type, speakers, article_url)
 
-    if not host_info:
-        raise ValueError("No host specified in speakers list")
+    if length_minutes >= SEGMENTED_MIN_MINUTES:
+        return await generate_segmented_script(
+            format_type,
+            title,
+            speakers,
+            questionnaire_answers,
+            length_minutes,
+            article_url,
+            bypass_cache,
+        )
 
     if format_type == "interview":
-        if len(guest_infos) != 1:
-            raise ValueError("Interview format requires exactly one guest")
         return await generate_interview_script(
-            title, host_info, guest_infos[0], questionnaire_answers, length_minutes
+            title,
+            host_info,
+            guest_infos[0],
+            questionnaire_answers,
+            length_minutes,
+            bypass_cache,
         )
     elif format_type == "roundtable":
-        if not guest_infos:
-            raise ValueError("Roundtable format requires at least one guest")
         return await generate_roundtable_script(
-            title, host_info, guest_infos, questionnaire_answers, length_minutes
+            title,
+            host_info,
+            guest_infos,
+            questionnaire_answers,
+            length_minutes,
+            bypass_cache,
         )
-    elif format_type == "article":
-        if not article_url:
-            raise ValueError("Article URL is required for article discussion format")
+    else:
         return await generate_article_discussion_script(
             title,
             host_info,
@@ -318,6 +942,69 @@ async def generate_script(
             questionnaire_answers,
             article_url,
             length_minutes,
+            bypass_cache,
         )
-    else:
-        raise ValueError(f"Unsupported format type: {format_type}")
+
+
+async def stream_script(
+    format_type: str,
+    title: str,
+    speakers: List[Dict[str, str]],
+    questionnaire_answers: List[Dict[str, str]],
+    length_minutes: int,
+    article_url: str = None,
+    bypass_cache: bool = False,
+) -> AsyncIterator[Dict[str, str]]:
+    """
+    Stream a podcast script line by line as the model generates it.
+
+    Takes the same arguments as generate_script, but yields each line
+    dictionary as soon as its JSON object is complete in the token stream.
+    A cached generation for the same request is replayed immediately.
+
+    Raises:
+        ValueError: If the request is invalid or the model returned no lines
+    """
+    inputs = await build_script_inputs(
+        format_type,
+        speakers,
+        questionnaire_answers,
+        length_minutes,
+        article_url,
+        bypass_cache,
+    )
+    chain = llm_clients.chain(format_type)
+    _, model, temperature, parser = CHAIN_SPECS[format_type]
+
+    logger.info(f"Streaming {format_type} script: {title}")
+    logger.info(f"Length: {length_minutes} minutes")
+
+    cache_key = None
+    if LLM_CACHE_ENABLED:
+        cache_key = llm_cache.make_key(model, temperature, chain.prompt, inputs)
+        if bypass_cache:
+            llm_cache.record_bypass()
+        else:
+            cached_lines = await llm_cache.aget(cache_key)
+            if cached_lines is not None:
+                logger.info(f"LLM cache hit ({cache_key[:12]}), replaying script")
+                for line in cached_lines:
+                    yield line
+                return
+
+    runnable = chain.prompt | chain.llm
+    scanner = ScriptLineStreamParser()
+    script_lines = []
+
+    async for chunk in runnable.astream(inputs):
+        for line in parser.validate(scanner.feed(chunk.content)):
+            script_lines.append(line)
+            yield line
+
+    if not script_lines:
+        raise ValueError("Streaming script generation returned no lines")
+
+    if cache_key:
+        await llm_cache.aset(cache_key, model, temperature, script_lines)
+
+    logger.info(f"Streamed {len(script_lines)} lines for script: {title}")
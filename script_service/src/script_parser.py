@@ -0,0 +1,223 @@
+import json
+import logging
+from typing import Any, Dict, List
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+
+class ScriptLineStreamParser:
+    """
+    Incrementally extracts script line objects from a JSON array as text arrives.
+
+    The model returns line objects inside a JSON array. While tokens are
+    streaming in, we track bracket depth and string state so every object that
+    sits directly inside an array can be parsed the moment its closing brace
+    arrives, without waiting for the rest of the response.
+    """
+
+    def __init__(self):
+        self._stack: List[str] = []
+        self._in_string = False
+        self._escaped = False
+        self._buffer: List[str] = []
+        self._capturing = False
+        self._capture_depth = 0
+
+    def feed(self, text: str) -> List[Dict[str, Any]]:
+        """
+        Feed the next chunk of model output.
+
+        Returns:
+            List of line objects completed by this chunk (may be empty)
+        """
+        completed = []
+
+        for char in text:
+            if self._capturing:
+                self._buffer.append(char)
+
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+                continue
+
+            if char == '"':
+                self._in_string = True
+            elif char in "[{":
+                # An object opening directly inside an array is a script line
+                if char == "{" and not self._capturing and self._stack[-1:] == ["["]:
+                    self._capturing = True
+                    self._capture_depth = len(self._stack)
+                    self._buffer = [char]
+                self._stack.append(char)
+            elif char in "]}":
+                if self._stack:
+                    self._stack.pop()
+                if (
+                    char == "}"
+                    and self._capturing
+                    and len(self._stack) == self._capture_depth
+                ):
+                    self._capturing = False
+                    line = self._parse_buffer()
+                    if line is not None:
+                        completed.append(line)
+
+        return completed
+
+    @property
+    def unclosed(self) -> bool:
+        """True if the text fed so far ends inside an open array or object."""
+        return bool(self._stack) or self._in_string
+
+    def _parse_buffer(self):
+        raw = "".join(self._buffer)
+        self._buffer = []
+        try:
+            line = json.loads(raw)
+        except json.JSONDecodeError:
+            logger.warning(f"Skipping unparseable streamed line: {raw[:200]}")
+            return None
+
+        if not isinstance(line, dict):
+            return None
+        return line
+
+
+def json_schema_response_format(
+    name: str, list_key: str, item_keys: List[str]
+) -> Dict[str, Any]:
+    """
+    Build an OpenAI json_schema response_format for an object holding one list.
+
+    Structured outputs require an object at the top level, so the list of
+    items is wrapped as {list_key: [...]}, with every item key a required
+    string.
+    """
+    return {
+        "type": "json_schema",
+        "json_schema": {
+            "name": name,
+            "strict": True,
+            "schema": {
+                "type": "object",
+                "properties": {
+                    list_key: {
+                        "type": "array",
+                        "items": {
+                            "type": "object",
+                            "properties": {
+                                key: {"type": "string"} for key in item_keys
+                            },
+                            "required": item_keys,
+                            "additionalProperties": False,
+                        },
+                    }
+                },
+                "required": [list_key],
+                "additionalProperties": False,
+            },
+        },
+    }
+
+
+class StructuredResponseParser:
+    """
+    Shared parsing engine for model responses that carry a list of objects.
+
+    Responses are normally exact structured output ({list_key: [...]}), but a
+    bare array, an array wrapped in prose and a response truncated mid-array
+    (e.g. at max_tokens) are all recovered locally. Recovery reuses the
+    streaming scanner, which closes any open brackets and drops a partial
+    last object, so a damaged response never costs another round-trip.
+    Counters record how often each path was needed.
+    """
+
+    def __init__(self, name: str, list_key: str, item_keys: List[str]):
+        self.name = name
+        self.list_key = list_key
+        self.item_keys = item_keys
+        self.response_format = json_schema_response_format(name, list_key, item_keys)
+        self.parsed = 0
+        self.extracted = 0
+        self.repaired = 0
+        self.failed = 0
+        self.dropped_items = 0
+
+    def parse(self, response: str) -> List[Dict[str, Any]]:
+        """
+        Parse a response into a list of validated item dictionaries.
+
+        Raises:
+            ValueError: If no valid items can be recovered
+        """
+        try:
+            data = json.loads(response)
+        except json.JSONDecodeError:
+            data = None
+
+        if isinstance(data, dict):
+            data = data.get(self.list_key)
+
+        if isinstance(data, list):
+            items = self.validate(data)
+            if items:
+                self.parsed += 1
+                return items
+
+        # Recover every complete object from prose-wrapped or truncated output
+        scanner = ScriptLineStreamParser()
+        items = self.validate(scanner.feed(response))
+
+        if not items:
+            self.failed += 1
+            raise ValueError(
+                f"Could not parse any {self.name} items from response: {response}"
+            )
+
+        if scanner.unclosed:
+            self.repaired += 1
+            logger.warning(
+                f"Repaired truncated {self.name} response, kept {len(items)} items"
+            )
+        else:
+            self.extracted += 1
+        return items
+
+    def validate(self, items: List[Any]) -> List[Dict[str, Any]]:
+        """Keep the items that have every required key."""
+        valid = []
+        for item in items:
+            if isinstance(item, dict) and all(key in item for key in self.item_keys):
+                valid.append(item)
+            else:
+                self.dropped_items += 1
+                logger.warning(f"Dropping invalid {self.name} item: {item}")
+        return valid
+
+    def stats(self) -> Dict[str, Any]:
+        """Parse path counters for this process."""
+        total = self.parsed + self.extracted + self.repaired + self.failed
+        return {
+            "responses": total,
+            "parsed": self.parsed,
+            "extracted": self.extracted,
+            "repaired": self.repaired,
+            "failed": self.failed,
+            "repair_rate": self.repaired / total if total else 0.0,
+            "dropped_items": self.dropped_items,
+        }
+
+
+# Parsers for every structured response we request
+script_response_parser = StructuredResponseParser(
+    "podcast_script", "lines", ["speaker_role", "speaker_name", "text"]
+)
+outline_response_parser = StructuredResponseParser(
+    "podcast_outline", "segments", ["title", "summary"]
+)
@@ -0,0 +1,117 @@
+import logging
+
+from sqlalchemy import text
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Every write to a script or its lines takes the next value of one sequence,
+# so scripts.version is always >= the row_version of each of its lines and a
+# client holding version N only needs the lines with row_version > N.
+# A line write locks its script row before taking its version, and holds the
+# lock until commit, so no other transaction can make a higher script version
+# visible while a lower line version is still uncommitted.
+# The TTS, avatar and stitch services update these tables directly, so the
+# bumps live in the database rather than in any one service. The version
+# columns themselves are added by schema.SCHEMA_UPGRADES, since the models
+# map them whether or not the triggers could be installed.
+VERSIONING_DDL = [
+    "CREATE SEQUENCE IF NOT EXISTS script_version_seq",
+    """
+    CREATE OR REPLACE FUNCTION bump_script_version() RETURNS trigger AS $$
+    BEGIN
+        NEW.version := nextval('script_version_seq');
+        RETURN NEW;
+    END;
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE OR REPLACE FUNCTION bump_script_line_version() RETURNS trigger AS $$
+    BEGIN
+        PERFORM 1 FROM scripts WHERE id = NEW.script_id FOR UPDATE;
+        NEW.row_version := nextval('script_version_seq');
+        RETURN NEW;
+    END;
+    $$ LANGUAGE plpgsql
+    """,
+    # Touching the parent script fires bump_script_version on it, once per
+    # statement however many lines the statement wrote
+    """
+    CREATE OR REPLACE FUNCTION touch_scripts_from_lines() RETURNS trigger AS $$
+    BEGIN
+        IF TG_OP = 'DELETE' THEN
+            UPDATE scripts SET version = version
+            WHERE id IN (SELECT DISTINCT script_id FROM old_lines);
+        ELSE
+            UPDATE scripts SET version = version
+            WHERE id IN (SELECT DISTINCT script_id FROM new_lines);
+        END IF;
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql
+    """,
+    "DROP TRIGGER IF EXISTS scripts_bump_version ON scripts",
+    """
+    CREATE TRIGGER scripts_bump_version
+    BEFORE INSERT OR UPDATE ON scripts
+    FOR EACH ROW EXECUTE FUNCTION bump_script_version()
+    """,
+    "DROP TRIGGER IF EXISTS script_lines_bump_version ON script_lines",
+    """
+    CREATE TRIGGER script_lines_bump_version
+    BEFORE INSERT OR UPDATE ON script_lines
+    FOR EACH ROW EXECUTE FUNCTION bump_script_line_version()
+    """,
+    "DROP TRIGGER IF EXISTS script_lines_touch_insert ON script_lines",
+    """
+    CREATE TRIGGER script_lines_touch_insert
+    AFTER INSERT ON script_lines REFERENCING NEW TABLE AS new_lines
+    FOR EACH STATEMENT EXECUTE FUNCTION touch_scripts_from_lines()
+    """,
+    "DROP TRIGGER IF EXISTS script_lines_touch_update ON script_lines",
+    """
+    CREATE TRIGGER script_lines_touch_update
+    AFTER UPDATE ON script_lines REFERENCING NEW TABLE AS new_lines
+    FOR EACH STATEMENT EXECUTE FUNCTION touch_scripts_from_lines()
+    """,
+    "DROP TRIGGER IF EXISTS script_lines_touch_delete ON script_lines",
+    """
+    CREATE TRIGGER script_lines_touch_delete
+    AFTER DELETE ON script_lines REFERENCING OLD TABLE AS old_lines
+    FOR EACH STATEMENT EXECUTE FUNCTION touch_scripts_from_lines()
+    """,
+]
+
+# Serializes installs when several workers start at once
+VERSIONING_LOCK_ID = 7310042
+
+
+def install_versioning(engine) -> bool:
+    """
+    Install the version sequence and triggers (Postgres only).
+
+    Safe to run on every startup. Returns True if versioning is active;
+    other databases keep the constant default versions, so callers should
+    not rely on them there.
+    """
+    if engine.dialect.name != "postgresql":
+        logger.warning(
+            f"Script versioning needs Postgres, not {engine.dialect.name}; "
+            "ETags and since_version are disabled"
+        )
+        return False
+
+    try:
+        with engine.begin() as conn:
+            conn.execute(
+                text("SELECT pg_advisory_xact_lock(:lock_id)"),
+                {"lock_id": VERSIONING_LOCK_ID},
+            )
+            for statement in VERSIONING_DDL:
+                conn.execute(text(statement))
+    except Exception as e:
+        logger.error(f"Could not install script versioning: {str(e)}")
+        return False
+
+    logger.info("Script versioning triggers installed")
+    return True
@@ -3,13 +3,16 @@ import logging
 from fastapi import FastAPI, HTTPException, Depends
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import RedirectResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from pydantic import BaseModel
 from typing import Optional
 
-from .database import get_db
-from .stitch_processor import check_stitch_readiness, perform_stitch
-from .models import ScriptModel
+from .database import get_db, get_async_db
+from .jobs import enqueue_job, job_status
+from .stitch_processor import check_stitch_readiness, check_stitch_readiness_async
+from .models import JobModel, ScriptModel
+from .worker import STITCH_QUEUE
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -39,10 +42,11 @@ class StitchResponse(BaseModel):
     total_lines: Optional[int] = None
     completed_lines: Optional[int] = None
     final_video_path: Optional[str] = None
+    job_id: Optional[int] = None
 
 
 @app.post("/stitch/check/{script_id}", response_model=StitchResponse)
-async def check_stitch_status(script_id: int, db: Session = Depends(get_db)):
+async def check_stitch_status(script_id: int, db: AsyncSession = Depends(get_async_db)):
     """
     Check if a script is ready for stitching.
 
@@ -50,7 +54,7 @@ async def check_stitch_status(script_id: int, db: Session = Depends(get_db)):
     generation and returns the readiness status.
     """
     try:
-        result = check_stitch_readiness(db=db, script_id=script_id)
+        result = await check_stitch_readiness_async(db=db, script_id=script_id)
 
         response = {"status": result.get("status"), "message": result.get("message")}
 
@@ -70,13 +74,14 @@ async def check_stitch_status(script_id: int, db: Session = Depends(get_db)):
 @app.post("/stitch/process/{script_id}", response_model=StitchResponse)
 async def stitch_script(script_id: int, db: Session = Depends(get_db)):
     """
-    Trigger video stitching for a script.
+    Queue video stitching for a script.
 
-    This endpoint will stitch all video clips for a script into a final video
-    if all avatar generation tasks are complete.
+    The script is checked for readiness here, so a script that cannot be
+    stitched is rejected straight away; a stitch worker then builds the final
+    video. Poll /stitch/jobs/{job_id} for the result.
     """
     try:
-        result = perform_stitch(db=db, script_id=script_id)
+        result = check_stitch_readiness(db=db, script_id=script_id)
 
         if result.get("status") == "error":
             raise HTTPException(status_code=400, detail=result.get("message"))
@@ -86,26 +91,40 @@ async def stitch_script(script_id: int, db: Session = Depends(get_db)):
             status_code = 409 if result.get("status") == "already_processed" else 400
             raise HTTPException(status_code=status_code, detail=result.get("message"))
 
-        response = {"status": result.get("status"), "message": result.get("message")}
-
-        if "final_video_path" in result:
-            response["final_video_path"] = result.get("final_video_path")
-
-        if "total_lines" in result:
-            response["total_lines"] = result.get("total_lines")
-
-        if "completed_lines" in result:
-            response["completed_lines"] = result.get("completed_lines")
-
-        return response
+        job = enqueue_job(
+            db,
+            STITCH_QUEUE,
+            "stitch",
+            {"script_id": script_id},
+            dedupe_key=f"stitch:{script_id}",
+        )
+
+        return {
+            "status": job.status,
+            "message": f"Stitching {job.status} for script {script_id}",
+            "total_lines": result.get("total_lines"),
+            "completed_lines": result.get("completed_lines"),
+            "job_id": job.id,
+        }
 
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Error during stitching: {str(e)}")
+        logger.error(f"Error queueing stitch: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.get("/stitch/jobs/{job_id}")
+async def get_stitch_job(job_id: int, db: AsyncSession = Depends(get_async_db)):
+    """Get the status of a stitch job"""
+    job = await db.get(JobModel, job_id)
+
+    if not job or job.queue != STITCH_QUEUE:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+
+    return job_status(job)
+
+
 @app.get("/health")
 async def health_check():
     return {"status": "ok"}
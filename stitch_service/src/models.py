@@ -1,5 +1,5 @@
 # /home/ubuntu/podcast_workflow_mvp/stitch_service/src/models.py
-from sqlalchemy import Column, String, Integer, Text, ForeignKey
+from sqlalchemy import Column, String, Integer, Text, ForeignKey, DateTime, Index, text
 from sqlalchemy.orm import relationship
 
 from .database import Base
@@ -38,3 +38,39 @@ class ScriptLineModel(Base):
     avatar_job_id = Column(String, nullable=True)  # Hedra generation job ID
     avatar_asset_id = Column(String, nullable=True)  # Hedra video asset ID
     script = relationship("ScriptModel", back_populates="lines")
+
+
+class JobModel(Base):
+    __tablename__ = "jobs"
+    # Durable work queue shared by the TTS, avatar and stitch services
+    # Mirrored from tts_service.src.models.py
+    id = Column(Integer, primary_key=True, index=True)
+    queue = Column(String, nullable=False)  # tts, avatar, stitch
+    job_type = Column(String, nullable=False)  # Handler name within the queue
+    payload = Column(Text, nullable=False, default="{}")  # JSON arguments
+    # queued, running, complete, failed
+    status = Column(String, nullable=False, default="queued")
+    priority = Column(Integer, nullable=False, default=0)  # Higher runs first
+    attempts = Column(Integer, nullable=False, default=0)
+    max_attempts = Column(Integer, nullable=False, default=5)
+    run_at = Column(DateTime(timezone=True), nullable=False)  # Not claimed before
+    locked_by = Column(String, nullable=True)  # Worker holding the lease
+    locked_until = Column(DateTime(timezone=True), nullable=True)  # Lease expiry
+    dedupe_key = Column(String, nullable=True)  # At most one live job per key
+    last_error = Column(Text, nullable=True)
+    result = Column(Text, nullable=True)  # JSON returned by the handler
+    created_at = Column(DateTime(timezone=True), nullable=False)
+    started_at = Column(DateTime(timezone=True), nullable=True)  # First claimed
+    updated_at = Column(DateTime(timezone=True), nullable=False)
+
+    __table_args__ = (
+        # Serves the claim query: next due job of a queue by priority
+        Index("ix_jobs_claim", "queue", "status", "priority", "run_at"),
+        Index(
+            "ux_jobs_live_dedupe_key",
+            "dedupe_key",
+            unique=True,
+            postgresql_where=text("status IN ('queued', 'running')"),
+            sqlite_where=text("status IN ('queued', 'running')"),
+        ),
+    )
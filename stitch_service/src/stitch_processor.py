@@ -2,7 +2,8 @@
 import os
 import logging
 import tempfile
-from sqlalchemy import update, func
+from sqlalchemy import update, func, select, case
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from moviepy import VideoFileClip, concatenate_videoclips
 
@@ -25,41 +26,17 @@ if not os.path.exists(MEDIA_FINAL_DIR):
         logger.error(f"Could not create directory {MEDIA_FINAL_DIR}: {e}")
 
 
-def check_stitch_readiness(db: Session, script_id: int) -> dict:
-    """
-    Check if a script is ready for stitching by verifying all lines are complete.
-    Returns a dictionary with status and details.
-    """
-    logger.info(f"Checking stitch readiness for script_id: {script_id}")
-
-    # Get script details
-    script = db.query(ScriptModel).filter(ScriptModel.id == script_id).first()
-    if not script:
-        return {"status": "error", "message": f"Script {script_id} not found"}
-
+def readiness_result(
+    script_id: int, script_status: str, total_lines: int, completed_lines: int
+) -> dict:
+    """Turn a script's status and line counts into a readiness result."""
     # Check if already stitched or in progress
-    if script.status in ["complete", "stitching", "stitching_failed"]:
+    if script_status in ["complete", "stitching", "stitching_failed"]:
         return {
             "status": "already_processed",
-            "message": f"Script {script_id} is already in status: {script.status}",
+            "message": f"Script {script_id} is already in status: {script_status}",
         }
 
-    # Count total lines vs completed lines
-    total_lines = (
-        db.query(func.count(ScriptLineModel.id))
-        .filter(ScriptLineModel.script_id == script_id)
-        .scalar()
-    )
-
-    completed_lines = (
-        db.query(func.count(ScriptLineModel.id))
-        .filter(
-            ScriptLineModel.script_id == script_id,
-            ScriptLineModel.avatar_status == "complete",
-        )
-        .scalar()
-    )
-
     logger.info(f"Script {script_id}: {completed_lines}/{total_lines} lines completed")
 
     if total_lines == 0:
@@ -81,6 +58,47 @@ def check_stitch_readiness(db: Session, script_id: int) -> dict:
     }
 
 
+def line_counts_query(script_id: int):
+    """Count a script's lines and completed avatar clips in one query."""
+    return select(
+        func.count(ScriptLineModel.id),
+        func.coalesce(
+            func.sum(case((ScriptLineModel.avatar_status == "complete", 1), else_=0)),
+            0,
+        ),
+    ).where(ScriptLineModel.script_id == script_id)
+
+
+def check_stitch_readiness(db: Session, script_id: int) -> dict:
+    """
+    Check if a script is ready for stitching by verifying all lines are complete.
+    Returns a dictionary with status and details.
+    """
+    logger.info(f"Checking stitch readiness for script_id: {script_id}")
+
+    # Get script details
+    script = db.query(ScriptModel).filter(ScriptModel.id == script_id).first()
+    if not script:
+        return {"status": "error", "message": f"Script {script_id} not found"}
+
+    total_lines, completed_lines = db.execute(line_counts_query(script_id)).one()
+    return readiness_result(script_id, script.status, total_lines, completed_lines)
+
+
+async def check_stitch_readiness_async(db: AsyncSession, script_id: int) -> dict:
+    """Async variant of check_stitch_readiness for request handlers."""
+    logger.info(f"Checking stitch readiness for script_id: {script_id}")
+
+    script = await db.get(ScriptModel, script_id)
+    if not script:
+        return {"status": "error", "message": f"Script {script_id} not found"}
+
+    total_lines, completed_lines = (
+        await db.execute(line_counts_query(script_id))
+    ).one()
+    return readiness_result(script_id, script.status, total_lines, completed_lines)
+
+
 def perform_stitch(db: Session, script_id: int) -> dict:
     """
     Perform the video stitching for a script using MoviePy.
@@ -0,0 +1,58 @@
+import asyncio
+import logging
+from typing import Any, Dict
+
+from sqlalchemy import update
+
+from .database import SessionLocal
+from .jobs import JobError, PermanentJobError, run_worker
+from .models import ScriptModel
+from .stitch_processor import perform_stitch
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+STITCH_QUEUE = "stitch"
+
+
+def _stitch(script_id: int) -> Dict[str, Any]:
+    db = SessionLocal()
+    try:
+        # There is only ever one live stitch job per script, so a status left
+        # behind by an earlier attempt of this job is taken over, not respected
+        db.execute(
+            update(ScriptModel)
+            .where(
+                ScriptModel.id == script_id,
+                ScriptModel.status.in_(["stitching", "stitching_failed"]),
+            )
+            .values(status="processing")
+        )
+        db.commit()
+
+        return perform_stitch(db=db, script_id=script_id)
+    finally:
+        db.close()
+
+
+async def run_stitch(payload: Dict[str, Any]) -> Dict[str, Any]:
+    result = await asyncio.to_thread(_stitch, payload["script_id"])
+
+    status = result.get("status")
+    if status == "already_processed":
+        raise PermanentJobError(result.get("message"))
+    if status != "complete":
+        # not_ready and transient errors are retried with backoff
+        raise JobError(result.get("message"))
+
+    return {"final_video_path": result.get("final_video_path")}
+
+
+JOB_HANDLERS = {
+    "stitch": run_stitch,
+}
+
+
+if __name__ == "__main__":
+    # Command: python -m src.worker
+    run_worker(STITCH_QUEUE, JOB_HANDLERS)
@@ -0,0 +1,112 @@
+"""
+Benchmark script TTS throughput against a local mock ElevenLabs server.
+
+The mock answers POST /v1/text-to-speech/{voice_id}/stream after a fixed latency and
+enforces a concurrent-request quota the way ElevenLabs does, replying 429 with
+Retry-After to requests over it. Each line also waits --upload-latency to
+stand in for the storage upload. Compares the old one-line-at-a-time loop
+with the engine at several concurrency limits:
+
+    cd tts_service
+    python -m benchmarks.bench_tts_engine --lines 100 --quota 5
+
+Runs against the mock only; no API key, database or storage is needed.
+"""
+
+import argparse
+import asyncio
+import threading
+import time
+
+import uvicorn
+from fastapi import FastAPI, Response
+
+from src.tts_engine import AsyncTTSEngine
+
+
+def make_mock_server(latency, quota, audio_bytes):
+    app = FastAPI()
+    state = {"in_flight": 0, "rejected": 0}
+
+    @app.post("/v1/text-to-speech/{voice_id}/stream")
+    async def text_to_speech(voice_id: str):
+        if state["in_flight"] >= quota:
+            state["rejected"] += 1
+            return Response(status_code=429, headers={"Retry-After": "1"})
+        state["in_flight"] += 1
+        try:
+            await asyncio.sleep(latency)
+            return Response(content=b"\xff" * audio_bytes, media_type="audio/mpeg")
+        finally:
+            state["in_flight"] -= 1
+
+    return app, state
+
+
+async def run_script(engine, lines, upload_latency, sequential=False):
+    async def one(i):
+        audio = await engine.synthesize("benchmark-voice", f"Benchmark line {i}")
+        await asyncio.sleep(upload_latency)
+        return len(audio)
+
+    start = time.perf_counter()
+    if sequential:
+        sizes = [await one(i) for i in range(lines)]
+    else:
+        sizes = await asyncio.gather(*(one(i) for i in range(lines)))
+    assert all(sizes)
+    return time.perf_counter() - start
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--lines", type=int, default=100)
+    parser.add_argument("--latency", type=float, default=0.5)
+    parser.add_argument("--upload-latency", type=float, default=0.1)
+    parser.add_argument("--quota", type=int, default=5)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[5, 10])
+    parser.add_argument("--requests-per-second", type=float, default=50.0)
+    parser.add_argument("--port", type=int, default=8790)
+    args = parser.parse_args()
+
+    app, state = make_mock_server(args.latency, args.quota, 32_000)
+    server = uvicorn.Server(
+        uvicorn.Config(app, port=args.port, log_level="error", lifespan="off")
+    )
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        await asyncio.sleep(0.05)
+
+    print(
+        f"{args.lines} lines, {args.latency}s synthesis + {args.upload_latency}s "
+        f"upload per line, quota {args.quota} concurrent requests"
+    )
+    print(f"{'concurrency':>11} {'seconds':>8} {'lines/s':>8} {'429s':>5}")
+    try:
+        # "sequential" is the old loop: one line synthesized and uploaded at a time
+        for concurrency in ["sequential"] + args.concurrency:
+            sequential = concurrency == "sequential"
+            engine = AsyncTTSEngine(
+                api_key="benchmark",
+                base_url=f"http://127.0.0.1:{args.port}",
+                concurrency=1 if sequential else concurrency,
+                requests_per_second=args.requests_per_second,
+                burst=1 if sequential else concurrency,
+            )
+            state["rejected"] = 0
+            try:
+                elapsed = await run_script(
+                    engine, args.lines, args.upload_latency, sequential
+                )
+            finally:
+                await engine.aclose()
+            print(
+                f"{concurrency:>11} {elapsed:>8.1f} {args.lines / elapsed:>8.1f} "
+                f"{state['rejected']:>5}"
+            )
+    finally:
+        server.should_exit = True
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -1,14 +1,20 @@
 # /home/ubuntu/podcast_workflow_mvp/tts_service/src/api.py
+import json
 import logging
 from fastapi import FastAPI, HTTPException, Depends
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import RedirectResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from pydantic import BaseModel
+from sqlalchemy import func, select, update
+from pydantic import BaseModel, Field
+from typing import Any, Dict, List, Optional
 
-from .database import get_db
-from .models import ScriptLineModel
-from .tts_processor import process_line_tts
+from .audio_cache import audio_cache_stats
+from .database import get_db, get_async_db
+from .jobs import enqueue_job, job_status, utcnow
+from .models import JobModel, ScriptLineModel
+from .worker import TTS_QUEUE
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -36,22 +42,49 @@ class TTSProcessResponse(BaseModel):
     script_id: int
     status: str
     message: str
-    processed_lines: int
+    job_id: int
+    queued_lines: int
+
+
+class LineStatusBatchRequest(BaseModel):
+    # Exactly one of these
+    line_ids: Optional[List[int]] = Field(None, max_length=1000)
+    script_id: Optional[int] = None
+
+
+def batch_lines_filter(request: LineStatusBatchRequest):
+    """The WHERE clause selecting the lines of a batch status request."""
+    if (request.line_ids is None) == (request.script_id is None):
+        raise HTTPException(
+            status_code=400, detail="Provide either line_ids or script_id"
+        )
+    if request.script_id is not None:
+        return ScriptLineModel.script_id == request.script_id
+    return ScriptLineModel.id.in_(request.line_ids)
+
+
+def mark_lines_queued(db: Session, line_ids: List[int]) -> None:
+    if line_ids:
+        db.execute(
+            update(ScriptLineModel)
+            .where(ScriptLineModel.id.in_(line_ids))
+            .values(tts_status="queued")
+        )
+        db.commit()
 
 
 @app.post("/tts/process-script/{script_id}", response_model=TTSProcessResponse)
 async def process_script_tts(script_id: int, db: Session = Depends(get_db)):
     """
-    Process TTS for all lines in a script sequentially.
+    Queue TTS for all lines in a script.
 
-    This endpoint will process each line one by one without using Celery tasks,
-    ensuring that the requests to ElevenLabs are not made concurrently.
+    Returns as soon as the job is queued. A worker renders the lines
+    concurrently, within the TTS engine's concurrency and rate limits; poll
+    /tts/jobs/{job_id} for progress and an ETA.
     """
-    # Check if script exists
     script_lines = (
-        db.query(ScriptLineModel)
+        db.query(ScriptLineModel.id, ScriptLineModel.tts_status)
         .filter(ScriptLineModel.script_id == script_id)
-        .order_by(ScriptLineModel.line_order)
         .all()
     )
 
@@ -60,56 +93,128 @@ async def process_script_tts(script_id: int, db: Session = Depends(get_db)):
             status_code=404, detail=f"No lines found for script {script_id}"
         )
 
-    # Process each line sequentially
-    processed_count = 0
-    for line in script_lines:
-        # Skip lines that are already complete or in processing
-        if line.tts_status in ["complete", "processing"]:
-            continue
+    # The job covers every line without audio; lines already being processed
+    # keep their status until the worker reaches them
+    job_line_ids = [line.id for line in script_lines if line.tts_status != "complete"]
+    pending_line_ids = [
+        line.id
+        for line in script_lines
+        if line.tts_status not in ["complete", "processing"]
+    ]
 
-        # Process the line
-        success = process_line_tts(
-            db=db, line_id=line.id, voice_id=line.voice_id, text=line.text
-        )
-
-        if success:
-            processed_count += 1
+    job = enqueue_job(
+        db,
+        TTS_QUEUE,
+        "tts_script",
+        {"script_id": script_id, "line_ids": job_line_ids},
+        dedupe_key=f"tts_script:{script_id}",
+    )
+    if job.status == "queued":
+        mark_lines_queued(db, pending_line_ids)
 
     return TTSProcessResponse(
         script_id=script_id,
-        status="complete",
-        message=f"Processed {processed_count} lines for script {script_id}",
-        processed_lines=processed_count,
+        status=job.status,
+        message=f"Queued TTS for {len(pending_line_ids)} lines of script {script_id}",
+        job_id=job.id,
+        queued_lines=len(pending_line_ids),
     )
 
 
 @app.post("/tts/process-line/{line_id}")
-async def process_single_line_tts(line_id: int, db: Session = Depends(get_db)):
-    """Process TTS for a single script line"""
+async def process_single_line_tts(
+    line_id: int, bypass_cache: bool = False, db: Session = Depends(get_db)
+):
+    """
+    Queue TTS for a single script line.
+
+    Set bypass_cache to render a fresh take even if this voice has already
+    rendered the same text.
+    """
     # Get the line
     line = db.query(ScriptLineModel).filter(ScriptLineModel.id == line_id).first()
 
     if not line:
         raise HTTPException(status_code=404, detail=f"Line {line_id} not found")
 
-    # Process the line
-    success = process_line_tts(
-        db=db, line_id=line.id, voice_id=line.voice_id, text=line.text
+    # Single lines jump ahead of whole scripts
+    job = enqueue_job(
+        db,
+        TTS_QUEUE,
+        "tts_line",
+        {"line_id": line_id, "bypass_cache": bypass_cache},
+        priority=10,
+        dedupe_key=f"tts_line:{line_id}",
     )
+    if job.status == "queued":
+        mark_lines_queued(db, [line_id])
+
+    return {
+        "message": f"Line {line_id} {job.status} for TTS",
+        "status": job.status,
+        "job_id": job.id,
+    }
 
-    if success:
-        return {
-            "message": f"Line {line_id} processed successfully",
-            "status": "complete",
-        }
-    else:
-        raise HTTPException(status_code=500, detail=f"Failed to process line {line_id}")
+
+async def tts_job_progress(db: AsyncSession, job: JobModel) -> Dict[str, Any]:
+    """
+    Count a job's lines by TTS status and estimate when it will finish.
+
+    Throughput is lines completed per second since the job was first
+    claimed, so the ETA also covers retries and rate-limit pauses.
+    """
+    payload = json.loads(job.payload or "{}")
+    line_ids = payload.get("line_ids") or (
+        [payload["line_id"]] if "line_id" in payload else []
+    )
+    counts = dict(
+        (
+            await db.execute(
+                select(ScriptLineModel.tts_status, func.count())
+                .where(ScriptLineModel.id.in_(line_ids))
+                .group_by(ScriptLineModel.tts_status)
+            )
+        ).all()
+    )
+    completed = counts.get("complete", 0)
+    failed = counts.get("failed", 0)
+    remaining = len(line_ids) - completed - failed
+
+    throughput = None
+    eta_seconds = None
+    if job.started_at and completed:
+        end = job.updated_at if job.status in ["complete", "failed"] else utcnow()
+        elapsed = (end - job.started_at).total_seconds()
+        if elapsed > 0:
+            throughput = completed / elapsed
+            if job.status in ["queued", "running"]:
+                eta_seconds = remaining / throughput
+
+    return {
+        "total_lines": len(line_ids),
+        "completed_lines": completed,
+        "failed_lines": failed,
+        "remaining_lines": remaining,
+        "lines_per_second": throughput,
+        "eta_seconds": eta_seconds,
+    }
+
+
+@app.get("/tts/jobs/{job_id}")
+async def get_tts_job(job_id: int, db: AsyncSession = Depends(get_async_db)):
+    """Get the status of a TTS job, with progress through its lines"""
+    job = await db.get(JobModel, job_id)
+
+    if not job or job.queue != TTS_QUEUE:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+
+    return {**job_status(job), "progress": await tts_job_progress(db, job)}
 
 
 @app.get("/tts/line-status/{line_id}")
-async def get_line_tts_status(line_id: int, db: Session = Depends(get_db)):
+async def get_line_tts_status(line_id: int, db: AsyncSession = Depends(get_async_db)):
     """Get TTS status for a specific line"""
-    line = db.query(ScriptLineModel).filter(ScriptLineModel.id == line_id).first()
+    line = await db.get(ScriptLineModel, line_id)
 
     if not line:
         raise HTTPException(status_code=404, detail=f"Line {line_id} not found")
@@ -121,10 +226,44 @@ async def get_line_tts_status(line_id: int, db: Session = Depends(get_db)):
     }
 
 
+@app.post("/tts/line-status:batch")
+async def get_lines_tts_status(
+    request: LineStatusBatchRequest, db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Get TTS status for many lines, by line IDs or for a whole script.
+
+    One query answers the whole batch, so a page polls once for all of its
+    lines. Unknown line IDs are left out of the response.
+    """
+    lines = (
+        await db.execute(
+            select(
+                ScriptLineModel.id,
+                ScriptLineModel.tts_status,
+                ScriptLineModel.audio_file_path,
+            )
+            .where(batch_lines_filter(request))
+            .order_by(ScriptLineModel.line_order)
+        )
+    ).all()
+
+    return {
+        "lines": [
+            {
+                "line_id": line.id,
+                "tts_status": line.tts_status,
+                "audio_file_path": line.audio_file_path,
+            }
+            for line in lines
+        ]
+    }
+
+
 @app.get("/tts/audio/{line_id}")
-async def get_line_audio(line_id: int, db: Session = Depends(get_db)):
+async def get_line_audio(line_id: int, db: AsyncSession = Depends(get_async_db)):
     """Redirect to audio file URL in Supabase Storage"""
-    line = db.query(ScriptLineModel).filter(ScriptLineModel.id == line_id).first()
+    line = await db.get(ScriptLineModel, line_id)
 
     if not line:
         raise HTTPException(status_code=404, detail=f"Line {line_id} not found")
@@ -139,3 +278,9 @@ async def get_line_audio(line_id: int, db: Session = Depends(get_db)):
 @app.get("/health")
 async def health_check():
     return {"status": "ok"}
+
+
+@app.get("/metrics")
+async def get_metrics(db: AsyncSession = Depends(get_async_db)):
+    """Report TTS audio cache counters across all workers"""
+    return {"tts_audio_cache": await audio_cache_stats(db)}
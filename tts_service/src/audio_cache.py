@@ -0,0 +1,186 @@
+import os
+import json
+import uuid
+import hashlib
+import logging
+import unicodedata
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+
+from sqlalchemy import func, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .models import TTSAudioCacheModel
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Intros, outros, sponsor reads and re-created scripts render the same text
+# with the same voice over and over; identical requests reuse the stored clip
+TTS_AUDIO_CACHE_ENABLED = os.getenv("TTS_AUDIO_CACHE_ENABLED", "true").lower() == "true"
+
+
+def normalize_text(text: str) -> str:
+    """Canonical form of a line's text: NFC with whitespace collapsed."""
+    return " ".join(unicodedata.normalize("NFC", text).split())
+
+
+def audio_cache_key(
+    voice_id: str,
+    model_id: str,
+    voice_settings: Optional[Dict[str, Any]],
+    text: str,
+) -> str:
+    """Hash everything that determines the rendered audio."""
+    payload = json.dumps(
+        {
+            "voice_id": voice_id,
+            "model_id": model_id,
+            "voice_settings": voice_settings or {},
+            "text": normalize_text(text),
+        },
+        sort_keys=True,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def audio_object_name(cache_key: str) -> str:
+    """
+    Name a new render of a cache key.
+
+    Audio is uploaded while it is still being synthesized, before its content
+    hash is known, so every render gets a fresh name under its key instead.
+    Objects are never overwritten: a fresh take gets a new object and the
+    lines already pointing at the old one keep it.
+    """
+    return f"tts/{cache_key}/{uuid.uuid4().hex}.mp3"
+
+
+async def lookup_cached_audio(
+    db: AsyncSession, cache_key: str
+) -> Optional[Dict[str, Any]]:
+    """
+    Return cached audio, counting the hit, or None.
+
+    The result holds the public URL and the audio's measurements under
+    their script_lines column names.
+    """
+    try:
+        cached = (
+            (
+                await db.execute(
+                    update(TTSAudioCacheModel)
+                    .where(TTSAudioCacheModel.cache_key == cache_key)
+                    .values(
+                        hit_count=TTSAudioCacheModel.hit_count + 1,
+                        last_hit_at=datetime.now(timezone.utc),
+                    )
+                    .returning(
+                        TTSAudioCacheModel.public_url,
+                        TTSAudioCacheModel.audio_duration_seconds,
+                        TTSAudioCacheModel.audio_sample_rate,
+                        TTSAudioCacheModel.audio_gain_db,
+                    )
+                )
+            )
+            .mappings()
+            .one_or_none()
+        )
+        await db.commit()
+        return dict(cached) if cached else None
+    except Exception as e:
+        # A broken cache must never break synthesis
+        await db.rollback()
+        logger.error(f"TTS audio cache lookup failed: {e}")
+        return None
+
+
+async def store_cached_audio(
+    db: AsyncSession,
+    cache_key: str,
+    voice_id: str,
+    model_id: str,
+    text: str,
+    object_name: str,
+    public_url: str,
+    metadata: Dict[str, Any],
+) -> None:
+    """Point a cache key at freshly rendered audio and its measurements."""
+    now = datetime.now(timezone.utc)
+    # A bypassed lookup re-renders an existing key; newer audio replaces it
+    update_existing = (
+        update(TTSAudioCacheModel)
+        .where(TTSAudioCacheModel.cache_key == cache_key)
+        .values(
+            object_name=object_name,
+            public_url=public_url,
+            render_count=TTSAudioCacheModel.render_count + 1,
+            **metadata,
+        )
+    )
+    try:
+        if (await db.execute(update_existing)).rowcount == 0:
+            db.add(
+                TTSAudioCacheModel(
+                    cache_key=cache_key,
+                    voice_id=voice_id,
+                    model_id=model_id,
+                    object_name=object_name,
+                    public_url=public_url,
+                    characters=len(normalize_text(text)),
+                    **metadata,
+                    render_count=1,
+                    hit_count=0,
+                    created_at=now,
+                )
+            )
+        await db.commit()
+    except IntegrityError:
+        # Another worker stored the same key first
+        await db.rollback()
+        await db.execute(update_existing)
+        await db.commit()
+    except Exception as e:
+        await db.rollback()
+        logger.error(f"TTS audio cache store failed: {e}")
+
+
+async def audio_cache_stats(db: AsyncSession) -> Dict[str, Any]:
+    """
+    Cache counters across every worker, from the table itself.
+
+    Each render counts as a miss and each reuse as a hit; saved characters
+    are the ones ElevenLabs would have billed for the hits.
+    """
+    entries, hits, renders, saved, rendered = (
+        await db.execute(
+            select(
+                func.count(),
+                func.coalesce(func.sum(TTSAudioCacheModel.hit_count), 0),
+                func.coalesce(func.sum(TTSAudioCacheModel.render_count), 0),
+                func.coalesce(
+                    func.sum(
+                        TTSAudioCacheModel.hit_count * TTSAudioCacheModel.characters
+                    ),
+                    0,
+                ),
+                func.coalesce(
+                    func.sum(
+                        TTSAudioCacheModel.render_count * TTSAudioCacheModel.characters
+                    ),
+                    0,
+                ),
+            )
+        )
+    ).one()
+    lookups = hits + renders
+    return {
+        "enabled": TTS_AUDIO_CACHE_ENABLED,
+        "entries": entries,
+        "hits": hits,
+        "misses": renders,
+        "hit_rate": hits / lookups if lookups else 0.0,
+        "saved_characters": saved,
+        "rendered_characters": rendered,
+    }
@@ -0,0 +1,200 @@
+from typing import Any, AsyncIterator, Dict, Optional
+
+# MPEG audio version (header bits 19-20) -> index into the tables below;
+# 1 is reserved
+MPEG_VERSIONS = {3: 0, 2: 1, 0: 2}  # MPEG-1, MPEG-2, MPEG-2.5
+
+# Layer III bitrates in kbit/s by bitrate index, for MPEG-1 and MPEG-2/2.5
+LAYER3_BITRATES = (
+    (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320),
+    (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+)
+
+SAMPLE_RATES = (
+    (44100, 48000, 32000),
+    (22050, 24000, 16000),
+    (11025, 12000, 8000),
+)
+
+# Global gain is a power of two in quarter steps: 1.5 dB per step, with 210
+# as unity gain
+GAIN_STEP_DB = 1.5
+UNITY_GLOBAL_GAIN = 210
+
+
+class BitReader:
+    def __init__(self, data: bytes):
+        self.data = data
+        self.position = 0
+
+    def read(self, bits: int) -> int:
+        value = 0
+        for _ in range(bits):
+            byte = self.data[self.position >> 3]
+            value = (value << 1) | ((byte >> (7 - (self.position & 7))) & 1)
+            self.position += 1
+        return value
+
+    def skip(self, bits: int) -> None:
+        self.position += bits
+
+
+class MP3Stats:
+    """
+    Measures an MP3 from its frame headers as the bytes go by.
+
+    Only headers and Layer III side info are read; nothing is decoded and
+    no more than one frame's header is buffered, so feeding a stream costs
+    next to nothing. Gives the duration, the sample rate and the mean global
+    gain of the granules that carry sound, in dB relative to unity gain. The
+    gain tracks loudness between lines of one output format but is not an
+    integrated loudness (LUFS), which would need the audio decoded.
+    """
+
+    def __init__(self):
+        self._buffer = bytearray()
+        self._skip = 0  # Bytes of the current frame or tag still to pass over
+        self._at_start = True
+        self.frames = 0
+        self.samples = 0
+        self.sample_rate: Optional[int] = None
+        self._gain_sum = 0
+        self._gain_count = 0
+
+    def feed(self, chunk: bytes) -> None:
+        # Bytes of a frame already measured are dropped without copying
+        if self._skip >= len(chunk):
+            self._skip -= len(chunk)
+            return
+        self._buffer += chunk[self._skip :]
+        self._skip = 0
+
+        while True:
+            if self._skip:
+                skipped = min(self._skip, len(self._buffer))
+                del self._buffer[:skipped]
+                self._skip -= skipped
+                if self._skip:
+                    # The rest of this frame is still to come
+                    return
+            if not self._parse_next():
+                # Whatever is left is the start of a header still arriving
+                return
+
+    def _parse_next(self) -> bool:
+        """Consume one tag, frame or stray byte; False if more data is needed."""
+        buffer = self._buffer
+        if self._at_start:
+            if len(buffer) < 10:
+                return False
+            self._at_start = False
+            if buffer[:3] == b"ID3":
+                # Size is syncsafe: 7 bits per byte, plus a footer if flagged
+                size = 0
+                for byte in buffer[6:10]:
+                    size = (size << 7) | (byte & 0x7F)
+                self._skip = 10 + size + (10 if buffer[5] & 0x10 else 0)
+                return True
+
+        if len(buffer) < 4:
+            return False
+        header = self._frame_header(buffer)
+        if header is None:
+            # Not at a frame: resynchronize one byte on
+            del buffer[:1]
+            return True
+
+        frame_length, side_info_start, side_info_length = header
+        info_end = side_info_start + side_info_length
+        needed = min(frame_length, info_end + 4)
+        if len(buffer) < needed:
+            return False
+
+        # The Xing/Info/VBRI frame an encoder puts first holds no audio
+        tag = bytes(buffer[info_end : info_end + 4])
+        vbri = bytes(buffer[side_info_start + 32 : side_info_start + 36])
+        if not (self.frames == 0 and (tag in (b"Xing", b"Info") or vbri == b"VBRI")):
+            self._count_frame(buffer, side_info_start)
+
+        self._skip = frame_length
+        return True
+
+    def _frame_header(self, buffer: bytearray):
+        if buffer[0] != 0xFF or buffer[1] & 0xE0 != 0xE0:
+            return None
+        version = MPEG_VERSIONS.get((buffer[1] >> 3) & 3)
+        layer = (buffer[1] >> 1) & 3
+        bitrate_index = buffer[2] >> 4
+        sample_rate_index = (buffer[2] >> 2) & 3
+        if (
+            version is None
+            or layer != 1  # Layer III
+            or bitrate_index in (0, 15)
+            or sample_rate_index == 3
+        ):
+            return None
+
+        mpeg1 = version == 0
+        bitrate = LAYER3_BITRATES[0 if mpeg1 else 1][bitrate_index] * 1000
+        sample_rate = SAMPLE_RATES[version][sample_rate_index]
+        padding = (buffer[2] >> 1) & 1
+        frame_length = (144 if mpeg1 else 72) * bitrate // sample_rate + padding
+
+        mono = buffer[3] >> 6 == 3
+        side_info_start = 4 if buffer[1] & 1 else 6  # After the CRC, if any
+        if mpeg1:
+            side_info_length = 17 if mono else 32
+        else:
+            side_info_length = 9 if mono else 17
+        return frame_length, side_info_start, side_info_length
+
+    def _count_frame(self, buffer: bytearray, side_info_start: int) -> None:
+        mpeg1 = (buffer[1] >> 3) & 3 == 3
+        channels = 1 if buffer[3] >> 6 == 3 else 2
+        self.sample_rate = SAMPLE_RATES[MPEG_VERSIONS[(buffer[1] >> 3) & 3]][
+            (buffer[2] >> 2) & 3
+        ]
+        self.frames += 1
+        self.samples += 1152 if mpeg1 else 576
+
+        reader = BitReader(bytes(buffer[side_info_start : side_info_start + 32]))
+        if mpeg1:
+            reader.skip(9 + (5 if channels == 1 else 3) + 4 * channels)
+            granules = 2
+        else:
+            reader.skip(8 + (1 if channels == 1 else 2))
+            granules = 1
+
+        for _ in range(granules * channels):
+            reader.skip(12)  # part2_3_length
+            big_values = reader.read(9)
+            global_gain = reader.read(8)
+            # scalefac_compress, block layout and the trailing flags (MPEG-2
+            # has a wider scalefac_compress and no preflag)
+            reader.skip(4 + 1 + 22 + 3 if mpeg1 else 9 + 1 + 22 + 2)
+            if big_values:
+                self._gain_sum += global_gain
+                self._gain_count += 1
+
+    def metadata(self) -> Dict[str, Any]:
+        """Measurements as script_lines column values; None where unknown."""
+        return {
+            "audio_duration_seconds": (
+                self.samples / self.sample_rate if self.sample_rate else None
+            ),
+            "audio_sample_rate": self.sample_rate,
+            "audio_gain_db": (
+                GAIN_STEP_DB * (self._gain_sum / self._gain_count - UNITY_GLOBAL_GAIN)
+                if self._gain_count
+                else None
+            ),
+        }
+
+
+async def measure_chunks(
+    chunks: AsyncIterator[bytes], stats: MP3Stats
+) -> AsyncIterator[bytes]:
+    """Pass an MP3 stream through unchanged, measuring it on the way."""
+    async for chunk in chunks:
+        stats.feed(chunk)
+        yield chunk
@@ -1,6 +1,8 @@
 # /home/ubuntu/podcast_workflow_mvp/tts_service/src/database.py
 import os
+from uuid import uuid4
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 
@@ -15,6 +17,48 @@ engine = create_engine(DATABASE_URL)
 # Create session factory
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+
+def get_async_database_url(url: str) -> str:
+    """Point a synchronous DATABASE_URL at the matching async driver."""
+    for prefix, async_prefix in (
+        ("postgresql+psycopg2://", "postgresql+asyncpg://"),
+        ("postgresql://", "postgresql+asyncpg://"),
+        ("postgres://", "postgresql+asyncpg://"),
+        ("sqlite://", "sqlite+aiosqlite://"),
+    ):
+        if url.startswith(prefix):
+            url = async_prefix + url[len(prefix) :]
+            break
+    # asyncpg takes "ssl" where libpq takes "sslmode"
+    return url.replace("sslmode=", "ssl=")
+
+
+ASYNC_DATABASE_URL = get_async_database_url(DATABASE_URL)
+
+# Async engine for endpoints, so queries never block the event loop.
+# Supabase's pooler (pgbouncer in transaction mode) cannot keep prepared
+# statements across transactions, so neither asyncpg nor SQLAlchemy caches
+# them, and each gets a unique name so clients sharing a server connection
+# never collide.
+async_engine = create_async_engine(
+    ASYNC_DATABASE_URL,
+    pool_pre_ping=True,
+    connect_args=(
+        {
+            "statement_cache_size": 0,
+            "prepared_statement_cache_size": 0,
+            "prepared_statement_name_func": lambda: f"__asyncpg_{uuid4()}__",
+        }
+        if ASYNC_DATABASE_URL.startswith("postgresql+asyncpg")
+        else {}
+    ),
+)
+
+# Create async session factory
+AsyncSessionLocal = async_sessionmaker(
+    async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+)
+
 # Create base class for models
 Base = declarative_base()
 
@@ -28,6 +72,12 @@ def get_db():
         db.close()
 
 
+async def get_async_db():
+    """Dependency to get an async DB session for FastAPI"""
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
 def get_db_session():
     """Get a database session directly (for non-dependency injection contexts)"""
     return SessionLocal()
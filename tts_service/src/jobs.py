@@ -0,0 +1,420 @@
+# Mirrored in avatar_service.src.jobs.py and stitch_service.src.jobs.py;
+# each service builds on its own, so a fix here must be copied to both.
+import os
+import json
+import random
+import signal
+import socket
+import asyncio
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Any, Awaitable, Callable, Dict, Optional, Sequence
+
+from sqlalchemy import and_, or_, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from .database import SessionLocal
+from .models import JobModel
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# A claimed job is leased to its worker and the lease is renewed while the
+# handler runs; if the worker dies the lease lapses and another worker takes
+# the job back.
+JOB_LEASE_SECONDS = int(os.getenv("JOB_LEASE_SECONDS", "60"))
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "5"))
+
+# Retry delay doubles with every attempt, from the base up to the cap
+JOB_RETRY_BASE_SECONDS = float(os.getenv("JOB_RETRY_BASE_SECONDS", "10"))
+JOB_RETRY_MAX_SECONDS = float(os.getenv("JOB_RETRY_MAX_SECONDS", "900"))
+
+# Jobs each worker process runs at once, and how often an idle slot polls
+WORKER_CONCURRENCY = int(os.getenv("WORKER_CONCURRENCY", "2"))
+WORKER_POLL_INTERVAL = float(os.getenv("WORKER_POLL_INTERVAL", "2"))
+
+LIVE_JOB_STATUSES = ["queued", "running"]
+
+JobHandler = Callable[[Dict[str, Any]], Awaitable[Optional[Dict[str, Any]]]]
+BackgroundTask = Callable[[], Awaitable[None]]
+
+
+class JobError(Exception):
+    """A job attempt failed; the job is retried until it runs out of attempts."""
+
+
+class PermanentJobError(JobError):
+    """A job can never succeed, so it fails without further retries."""
+
+
+def utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def retry_delay(attempts: int) -> float:
+    """Backoff before the next attempt, with jitter so retries spread out."""
+    delay = min(JOB_RETRY_MAX_SECONDS, JOB_RETRY_BASE_SECONDS * 2 ** (attempts - 1))
+    return delay * random.uniform(0.5, 1.0)
+
+
+def live_job(db: Session, dedupe_key: str) -> Optional[JobModel]:
+    """The queued or running job holding a dedupe key, if any."""
+    return (
+        db.query(JobModel)
+        .filter(
+            JobModel.dedupe_key == dedupe_key,
+            JobModel.status.in_(LIVE_JOB_STATUSES),
+        )
+        .first()
+    )
+
+
+def enqueue_job(
+    db: Session,
+    queue: str,
+    job_type: str,
+    payload: Dict[str, Any],
+    priority: int = 0,
+    dedupe_key: Optional[str] = None,
+    max_attempts: int = JOB_MAX_ATTEMPTS,
+) -> JobModel:
+    """
+    Add a job to a queue and commit it.
+
+    When dedupe_key is set and a queued or running job already holds it, that
+    job is returned instead, so repeated requests for the same work collapse
+    into one job.
+    """
+    if dedupe_key:
+        existing = live_job(db, dedupe_key)
+        if existing:
+            return existing
+
+    now = utcnow()
+    job = JobModel(
+        queue=queue,
+        job_type=job_type,
+        payload=json.dumps(payload),
+        status="queued",
+        priority=priority,
+        attempts=0,
+        max_attempts=max_attempts,
+        run_at=now,
+        dedupe_key=dedupe_key,
+        created_at=now,
+        updated_at=now,
+    )
+    db.add(job)
+    try:
+        db.commit()
+    except IntegrityError:
+        # Another request enqueued the same key between the check and insert
+        db.rollback()
+        existing = live_job(db, dedupe_key) if dedupe_key else None
+        if existing is None:
+            raise
+        return existing
+
+    db.refresh(job)
+    logger.info(f"Enqueued {queue}/{job_type} job {job.id}: {job.payload}")
+    return job
+
+
+def claim_job(
+    db: Session, queue: str, worker_id: str, lease_seconds: int = JOB_LEASE_SECONDS
+) -> Optional[JobModel]:
+    """
+    Lease the next due job of a queue to a worker, or return None.
+
+    Queued jobs are taken by priority, then by run_at. Running jobs whose
+    lease has lapsed belong to a dead worker and are taken back. The row is
+    selected FOR UPDATE SKIP LOCKED, so any number of workers can poll the
+    same queue without blocking on, or double-claiming, each other's jobs.
+    """
+    while True:
+        now = utcnow()
+        job = (
+            db.query(JobModel)
+            .filter(
+                JobModel.queue == queue,
+                or_(
+                    and_(JobModel.status == "queued", JobModel.run_at <= now),
+                    and_(JobModel.status == "running", JobModel.locked_until < now),
+                ),
+            )
+            .order_by(JobModel.priority.desc(), JobModel.run_at, JobModel.id)
+            .with_for_update(skip_locked=True)
+            .first()
+        )
+
+        if job is None:
+            db.commit()
+            return None
+
+        if job.status == "running" and job.attempts >= job.max_attempts:
+            # The final attempt died with its worker
+            logger.error(f"Job {job.id} lost its last lease ({job.locked_by})")
+            job.status = "failed"
+            job.last_error = f"Lease held by {job.locked_by} expired"
+            job.locked_by = None
+            job.locked_until = None
+            job.updated_at = now
+            db.commit()
+            continue
+
+        if job.status == "running":
+            logger.warning(f"Reclaiming job {job.id} from {job.locked_by}")
+
+        job.status = "running"
+        job.attempts += 1
+        job.started_at = job.started_at or now
+        job.locked_by = worker_id
+        job.locked_until = now + timedelta(seconds=lease_seconds)
+        job.updated_at = now
+        db.commit()
+        db.refresh(job)
+        return job
+
+
+def extend_lease(
+    db: Session, job_id: int, worker_id: str, lease_seconds: int = JOB_LEASE_SECONDS
+) -> bool:
+    """Renew a worker's lease on a job. Returns False if the lease was lost."""
+    now = utcnow()
+    result = db.execute(
+        update(JobModel)
+        .where(
+            JobModel.id == job_id,
+            JobModel.status == "running",
+            JobModel.locked_by == worker_id,
+        )
+        .values(locked_until=now + timedelta(seconds=lease_seconds), updated_at=now)
+    )
+    db.commit()
+    return result.rowcount == 1
+
+
+def complete_job(
+    db: Session, job_id: int, worker_id: str, result: Optional[Dict[str, Any]] = None
+) -> bool:
+    """Mark a job complete. Returns False if the worker no longer held it."""
+    updated = db.execute(
+        update(JobModel)
+        .where(
+            JobModel.id == job_id,
+            JobModel.status == "running",
+            JobModel.locked_by == worker_id,
+        )
+        .values(
+            status="complete",
+            result=json.dumps(result) if result is not None else None,
+            last_error=None,
+            locked_by=None,
+            locked_until=None,
+            updated_at=utcnow(),
+        )
+    )
+    db.commit()
+    return updated.rowcount == 1
+
+
+def fail_job(
+    db: Session, job_id: int, worker_id: str, error: str, retry: bool = True
+) -> Optional[str]:
+    """
+    Record a failed attempt and requeue the job with backoff, or fail it for
+    good once it is out of attempts.
+
+    Returns the job's new status, or None if the worker no longer held it.
+    """
+    job = (
+        db.query(JobModel)
+        .filter(
+            JobModel.id == job_id,
+            JobModel.status == "running",
+            JobModel.locked_by == worker_id,
+        )
+        .with_for_update()
+        .first()
+    )
+    if job is None:
+        db.commit()
+        return None
+
+    now = utcnow()
+    if retry and job.attempts < job.max_attempts:
+        job.status = "queued"
+        job.run_at = now + timedelta(seconds=retry_delay(job.attempts))
+    else:
+        job.status = "failed"
+    job.last_error = error
+    job.locked_by = None
+    job.locked_until = None
+    job.updated_at = now
+    status = job.status
+    db.commit()
+    return status
+
+
+def job_status(job: JobModel) -> Dict[str, Any]:
+    """The public view of a job, as returned by the jobs endpoints."""
+    return {
+        "job_id": job.id,
+        "queue": job.queue,
+        "job_type": job.job_type,
+        "status": job.status,
+        "payload": json.loads(job.payload or "{}"),
+        "attempts": job.attempts,
+        "max_attempts": job.max_attempts,
+        "run_at": job.run_at,
+        "last_error": job.last_error,
+        "result": json.loads(job.result) if job.result else None,
+        "created_at": job.created_at,
+        "started_at": job.started_at,
+        "updated_at": job.updated_at,
+    }
+
+
+def _with_session(fn, *args):
+    db = SessionLocal()
+    try:
+        return fn(db, *args)
+    finally:
+        db.close()
+
+
+class JobWorker:
+    """
+    Runs the jobs of one queue, a fixed number at a time.
+
+    Worker processes only coordinate through the jobs table, so a stage
+    scales out by starting more of them. Database calls run in threads to
+    keep the event loop free for the handlers. Background tasks, such as
+    housekeeping loops, run alongside the slots until the worker stops.
+    """
+
+    def __init__(
+        self,
+        queue: str,
+        handlers: Dict[str, JobHandler],
+        concurrency: int = WORKER_CONCURRENCY,
+        background: Sequence[BackgroundTask] = (),
+    ):
+        self.queue = queue
+        self.handlers = handlers
+        self.concurrency = concurrency
+        self.background = background
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        self._stopping = asyncio.Event()
+
+    def stop(self) -> None:
+        """Stop claiming jobs; jobs already running are finished first."""
+        logger.info(f"Worker {self.worker_id} stopping")
+        self._stopping.set()
+
+    async def run(self) -> None:
+        logger.info(
+            f"Worker {self.worker_id} running {self.concurrency} slots "
+            f"on queue '{self.queue}'"
+        )
+        background = [asyncio.create_task(task()) for task in self.background]
+        try:
+            await asyncio.gather(
+                *(self._slot(slot) for slot in range(self.concurrency))
+            )
+        finally:
+            for task in background:
+                task.cancel()
+
+    async def _slot(self, slot: int) -> None:
+        worker_id = f"{self.worker_id}:{slot}"
+        while not self._stopping.is_set():
+            try:
+                job = await asyncio.to_thread(
+                    _with_session, claim_job, self.queue, worker_id
+                )
+            except Exception as e:
+                logger.error(f"Worker {worker_id} could not claim a job: {str(e)}")
+                job = None
+
+            if job is None:
+                try:
+                    await asyncio.wait_for(
+                        self._stopping.wait(), timeout=WORKER_POLL_INTERVAL
+                    )
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            await self._execute(job, worker_id)
+
+    async def _execute(self, job: JobModel, worker_id: str) -> None:
+        label = f"{job.queue}/{job.job_type} job {job.id}"
+        handler = self.handlers.get(job.job_type)
+        heartbeat = asyncio.create_task(self._heartbeat(job.id, worker_id))
+        logger.info(f"Running {label} (attempt {job.attempts}/{job.max_attempts})")
+
+        error, retry, result = None, True, None
+        try:
+            if handler is None:
+                raise PermanentJobError(f"No handler for job type '{job.job_type}'")
+            result = await handler(json.loads(job.payload or "{}"))
+        except Exception as e:
+            error = str(e) or e.__class__.__name__
+            retry = not isinstance(e, PermanentJobError)
+        finally:
+            heartbeat.cancel()
+
+        try:
+            if error is None:
+                if await asyncio.to_thread(
+                    _with_session, complete_job, job.id, worker_id, result
+                ):
+                    logger.info(f"Completed {label}")
+                else:
+                    logger.warning(f"Finished {label} after losing its lease")
+            else:
+                status = await asyncio.to_thread(
+                    _with_session, fail_job, job.id, worker_id, error, retry
+                )
+                logger.error(f"{label} failed ({status}): {error}")
+        except Exception as e:
+            # The lease lapses and the job is picked up again
+            logger.error(f"Could not record the outcome of {label}: {str(e)}")
+
+    async def _heartbeat(self, job_id: int, worker_id: str) -> None:
+        while True:
+            await asyncio.sleep(JOB_LEASE_SECONDS / 3)
+            try:
+                held = await asyncio.to_thread(
+                    _with_session, extend_lease, job_id, worker_id
+                )
+                if not held:
+                    logger.warning(f"Worker {worker_id} lost the lease on job {job_id}")
+                    return
+            except Exception as e:
+                logger.error(f"Could not extend lease on job {job_id}: {str(e)}")
+
+
+def run_worker(
+    queue: str,
+    handlers: Dict[str, JobHandler],
+    background: Sequence[BackgroundTask] = (),
+    on_shutdown: Sequence[BackgroundTask] = (),
+) -> None:
+    """Run a worker for a queue until SIGINT or SIGTERM, then run on_shutdown."""
+    logging.basicConfig(level=logging.INFO)
+
+    async def main():
+        worker = JobWorker(queue, handlers, background=background)
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, worker.stop)
+        try:
+            await worker.run()
+        finally:
+            for hook in on_shutdown:
+                await hook()
+
+    asyncio.run(main())
@@ -0,0 +1,145 @@
+# Mirrored in avatar_service.src.line_leases.py; each service builds on its
+# own, so a fix here must be copied there.
+import os
+import uuid
+import socket
+import asyncio
+import logging
+from datetime import timedelta
+from typing import Any, Dict
+
+from sqlalchemy import and_, case, or_, update
+
+from .database import AsyncSessionLocal, SessionLocal
+from .jobs import utcnow
+from .models import ScriptLineModel
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# A line being processed is leased to the worker doing it, and the lease is
+# renewed while the work goes on. If the worker dies the lease lapses and the
+# reaper marks the line queued again; the job that was running it is taken
+# back on its own lease (JOB_LEASE_SECONDS) and retried by another worker.
+LINE_LEASE_SECONDS = int(os.getenv("LINE_LEASE_SECONDS", "60"))
+LINE_REAPER_INTERVAL = float(os.getenv("LINE_REAPER_INTERVAL", "30"))
+
+# Stage -> (status column, lease owner column, lease expiry column)
+LINE_LEASE_STAGES = {
+    "tts": ("tts_status", "tts_lease_owner", "tts_lease_expires_at"),
+    "avatar": ("avatar_status", "avatar_lease_owner", "avatar_lease_expires_at"),
+}
+
+
+def new_lease_owner() -> str:
+    """A name for one lease, unique even across retries in one process."""
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+def take_lease_values(stage: str, owner: str) -> Dict[str, Any]:
+    """Column values that move a line to processing under a lease."""
+    status, owner_column, expires_column = LINE_LEASE_STAGES[stage]
+    return {
+        status: "processing",
+        owner_column: owner,
+        expires_column: utcnow() + timedelta(seconds=LINE_LEASE_SECONDS),
+    }
+
+
+def lease_available(stage: str):
+    """Condition for lines whose lease is free to take: unheld or lapsed."""
+    _, owner_column, expires_column = LINE_LEASE_STAGES[stage]
+    return or_(
+        getattr(ScriptLineModel, owner_column).is_(None),
+        getattr(ScriptLineModel, expires_column) < utcnow(),
+    )
+
+
+def lease_held(stage: str, owner: str):
+    """Condition for lines whose lease is still held by this owner."""
+    _, owner_column, _ = LINE_LEASE_STAGES[stage]
+    return getattr(ScriptLineModel, owner_column) == owner
+
+
+def release_lease_values(stage: str) -> Dict[str, Any]:
+    """Column values that drop a line's lease, to go with its new status."""
+    _, owner_column, expires_column = LINE_LEASE_STAGES[stage]
+    return {owner_column: None, expires_column: None}
+
+
+async def renew_line_lease(stage: str, line_id: int, owner: str) -> None:
+    """Keep a line's lease alive until cancelled or the lease is lost."""
+    _, _, expires_column = LINE_LEASE_STAGES[stage]
+    while True:
+        await asyncio.sleep(LINE_LEASE_SECONDS / 3)
+        try:
+            async with AsyncSessionLocal() as db:
+                result = await db.execute(
+                    update(ScriptLineModel)
+                    .where(ScriptLineModel.id == line_id, lease_held(stage, owner))
+                    .values(
+                        {
+                            expires_column: utcnow()
+                            + timedelta(seconds=LINE_LEASE_SECONDS)
+                        }
+                    )
+                )
+                await db.commit()
+            if result.rowcount == 0:
+                logger.warning(f"Lost the {stage} lease on line {line_id}")
+                return
+        except Exception as e:
+            logger.error(f"Could not renew the {stage} lease on line {line_id}: {e}")
+
+
+def reap_expired_line_leases() -> int:
+    """
+    Requeue every line whose lease has expired, in one UPDATE.
+
+    Covers all stages at once: each stage's status and lease are only
+    touched on the rows where that stage's lease is the one that expired.
+    Returns the number of lines requeued.
+    """
+    now = utcnow()
+    values = {}
+    expired_conditions = []
+    for status, owner_column, expires_column in LINE_LEASE_STAGES.values():
+        expired = and_(
+            getattr(ScriptLineModel, status) == "processing",
+            getattr(ScriptLineModel, expires_column) < now,
+        )
+        expired_conditions.append(expired)
+        values[status] = case(
+            (expired, "queued"), else_=getattr(ScriptLineModel, status)
+        )
+        values[owner_column] = case(
+            (expired, None), else_=getattr(ScriptLineModel, owner_column)
+        )
+        values[expires_column] = case(
+            (expired, None), else_=getattr(ScriptLineModel, expires_column)
+        )
+
+    db = SessionLocal()
+    try:
+        result = db.execute(
+            update(ScriptLineModel)
+            .where(or_(*expired_conditions))
+            .values(values)
+            .execution_options(synchronize_session=False)
+        )
+        db.commit()
+        return result.rowcount
+    finally:
+        db.close()
+
+
+async def run_line_reaper() -> None:
+    """Requeue lines left behind by dead workers, every LINE_REAPER_INTERVAL."""
+    while True:
+        try:
+            reaped = await asyncio.to_thread(reap_expired_line_leases)
+            if reaped:
+                logger.warning(f"Requeued {reaped} lines whose worker went away")
+        except Exception as e:
+            logger.error(f"Line lease reaper failed: {str(e)}")
+        await asyncio.sleep(LINE_REAPER_INTERVAL)
@@ -1,5 +1,15 @@
 # /home/ubuntu/podcast_workflow_mvp/tts_service/src/models.py
-from sqlalchemy import Column, String, Integer, Text, ForeignKey
+from sqlalchemy import (
+    Column,
+    String,
+    Integer,
+    Float,
+    Text,
+    ForeignKey,
+    DateTime,
+    Index,
+    text,
+)
 
 from .database import Base
 
@@ -20,6 +30,10 @@ class ScriptLineModel(Base):
         String, default="pending"
     )  # e.g., pending, processing, complete, failed
     audio_file_path = Column(String, nullable=True)  # Path to the generated audio
+    # Measured from the MP3 frame headers when the audio is rendered
+    audio_duration_seconds = Column(Float, nullable=True)
+    audio_sample_rate = Column(Integer, nullable=True)
+    audio_gain_db = Column(Float, nullable=True)  # Mean MP3 global gain; not LUFS
     # Fields for avatar and stitch service
     avatar_status = Column(String, default="pending")
     speaker_image_path = Column(
@@ -28,6 +42,11 @@ class ScriptLineModel(Base):
     video_file_path = Column(String, nullable=True)
     avatar_job_id = Column(String, nullable=True)  # Hedra job ID
     avatar_asset_id = Column(String, nullable=True)  # Hedra video asset ID
+    # Held by the worker processing the line; expired leases are requeued
+    tts_lease_owner = Column(String, nullable=True)
+    tts_lease_expires_at = Column(DateTime(timezone=True), nullable=True)
+    avatar_lease_owner = Column(String, nullable=True)
+    avatar_lease_expires_at = Column(DateTime(timezone=True), nullable=True)
 
 
 class VoiceModel(Base):
@@ -37,3 +56,56 @@ class VoiceModel(Base):
     voice_id = Column(String, unique=True, index=True, nullable=False)
     name = Column(String, nullable=False)
     image_path = Column(String, nullable=True)  # Changed from image_url to image_path
+
+
+class JobModel(Base):
+    __tablename__ = "jobs"
+    # Durable work queue shared by the TTS, avatar and stitch services
+    id = Column(Integer, primary_key=True, index=True)
+    queue = Column(String, nullable=False)  # tts, avatar, stitch
+    job_type = Column(String, nullable=False)  # Handler name within the queue
+    payload = Column(Text, nullable=False, default="{}")  # JSON arguments
+    # queued, running, complete, failed
+    status = Column(String, nullable=False, default="queued")
+    priority = Column(Integer, nullable=False, default=0)  # Higher runs first
+    attempts = Column(Integer, nullable=False, default=0)
+    max_attempts = Column(Integer, nullable=False, default=5)
+    run_at = Column(DateTime(timezone=True), nullable=False)  # Not claimed before
+    locked_by = Column(String, nullable=True)  # Worker holding the lease
+    locked_until = Column(DateTime(timezone=True), nullable=True)  # Lease expiry
+    dedupe_key = Column(String, nullable=True)  # At most one live job per key
+    last_error = Column(Text, nullable=True)
+    result = Column(Text, nullable=True)  # JSON returned by the handler
+    created_at = Column(DateTime(timezone=True), nullable=False)
+    started_at = Column(DateTime(timezone=True), nullable=True)  # First claimed
+    updated_at = Column(DateTime(timezone=True), nullable=False)
+
+    __table_args__ = (
+        # Serves the claim query: next due job of a queue by priority
+        Index("ix_jobs_claim", "queue", "status", "priority", "run_at"),
+        Index(
+            "ux_jobs_live_dedupe_key",
+            "dedupe_key",
+            unique=True,
+            postgresql_where=text("status IN ('queued', 'running')"),
+            sqlite_where=text("status IN ('queued', 'running')"),
+        ),
+    )
+
+
+class TTSAudioCacheModel(Base):
+    __tablename__ = "tts_audio_cache"
+    cache_key = Column(String(64), primary_key=True)  # sha256 of the TTS request
+    voice_id = Column(String, nullable=False, index=True)
+    model_id = Column(String, nullable=False)
+    object_name = Column(String, nullable=False)  # Storage path of the audio
+    public_url = Column(String, nullable=False)
+    characters = Column(Integer, nullable=False)  # Length of the rendered text
+    # Copied onto the lines that reuse the audio
+    audio_duration_seconds = Column(Float, nullable=True)
+    audio_sample_rate = Column(Integer, nullable=True)
+    audio_gain_db = Column(Float, nullable=True)
+    render_count = Column(Integer, nullable=False, default=1)  # Cache misses
+    hit_count = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime(timezone=True), nullable=False)
+    last_hit_at = Column(DateTime(timezone=True), nullable=True)
@@ -1,6 +1,8 @@
 import os
 import logging
-from typing import Optional
+from typing import AsyncIterator, Optional
+
+import httpx
 from supabase import create_client, Client
 
 logger = logging.getLogger(__name__)
@@ -9,6 +11,9 @@ logger = logging.getLogger(__name__)
 SUPABASE_URL = os.getenv("SUPABASE_URL")
 SUPABASE_KEY = os.getenv("SUPABASE_KEY")
 
+# Streamed uploads wait this long for the next chunk or the server's reply
+STORAGE_UPLOAD_TIMEOUT = float(os.getenv("STORAGE_UPLOAD_TIMEOUT", "120"))
+
 
 class SupabaseStorage:
     def __init__(self):
@@ -17,6 +22,7 @@ class SupabaseStorage:
 
         self.supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
         self.bucket_name = "podcast-audio"
+        self._http: Optional[httpx.AsyncClient] = None
 
     def upload_file(
         self, file_content: bytes, file_name: str, content_type: str = "audio/mpeg"
@@ -46,6 +52,55 @@ class SupabaseStorage:
             logger.error(f"Error uploading {file_name} to Supabase: {str(e)}")
             return None
 
+    async def upload_stream(
+        self,
+        chunks: AsyncIterator[bytes],
+        file_name: str,
+        content_type: str = "audio/mpeg",
+        upsert: bool = False,
+    ) -> Optional[str]:
+        """
+        Upload a file to Supabase Storage while its content is still arriving.
+
+        The chunks are sent as a chunked request body straight to the storage
+        REST API, so the upload overlaps with whatever produces them and
+        memory stays at one chunk however long the file is.
+        Returns the public URL if successful, None if storage refuses the
+        upload. Errors producing the chunks or reaching storage are raised,
+        so the caller's retry sees the real cause.
+        """
+        if self._http is None:
+            self._http = httpx.AsyncClient(
+                base_url=f"{SUPABASE_URL.rstrip('/')}/storage/v1",
+                headers={
+                    "Authorization": f"Bearer {SUPABASE_KEY}",
+                    "apikey": SUPABASE_KEY,
+                },
+                timeout=STORAGE_UPLOAD_TIMEOUT,
+            )
+
+        response = await self._http.post(
+            f"/object/{self.bucket_name}/{file_name}",
+            content=chunks,
+            headers={
+                "Content-Type": content_type,
+                "x-upsert": "true" if upsert else "false",
+            },
+        )
+
+        if response.status_code == 200:
+            public_url = self.supabase.storage.from_(self.bucket_name).get_public_url(
+                file_name
+            )
+            logger.info(f"Successfully streamed {file_name} to Supabase Storage")
+            return public_url
+        else:
+            logger.error(
+                f"Failed to upload {file_name}: "
+                f"{response.status_code} {response.text[:200]}"
+            )
+            return None
+
     def delete_file(self, file_name: str) -> bool:
         """
         Delete a file from Supabase Storage
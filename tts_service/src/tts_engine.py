@@ -0,0 +1,217 @@
+import os
+import json
+import time
+import random
+import asyncio
+import logging
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, Optional
+
+import httpx
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Environment Variables
+ELEVEN_API_KEY = os.getenv("ELEVEN_API_KEY")
+ELEVEN_API_URL = os.getenv("ELEVEN_API_URL", "https://api.elevenlabs.io")
+TTS_MODEL_ID = os.getenv("TTS_MODEL_ID", "eleven_multilingual_v2")
+TTS_OUTPUT_FORMAT = os.getenv("TTS_OUTPUT_FORMAT", "mp3_44100_128")
+# Optional JSON object, e.g. {"stability": 0.5, "similarity_boost": 0.75}
+TTS_VOICE_SETTINGS = json.loads(os.getenv("TTS_VOICE_SETTINGS") or "null")
+
+# Requests in flight at once. ElevenLabs caps concurrent requests per plan,
+# and the cap is account-wide: with several TTS workers, give each its share.
+TTS_CONCURRENCY = int(os.getenv("TTS_CONCURRENCY", "4"))
+
+# Token bucket for request starts: a sustained rate plus a burst allowance
+TTS_REQUESTS_PER_SECOND = float(os.getenv("TTS_REQUESTS_PER_SECOND", "4"))
+TTS_BURST = int(os.getenv("TTS_BURST", "4"))
+
+# Retries for 429s, 5xx responses and connection errors
+TTS_MAX_RETRIES = int(os.getenv("TTS_MAX_RETRIES", "5"))
+TTS_RETRY_BASE_SECONDS = float(os.getenv("TTS_RETRY_BASE_SECONDS", "1"))
+TTS_REQUEST_TIMEOUT = float(os.getenv("TTS_REQUEST_TIMEOUT", "120"))
+
+
+class TTSError(Exception):
+    """ElevenLabs rejected a request or kept failing after retries."""
+
+
+class TokenBucket:
+    """
+    Async token bucket: acquire() waits until a request may start.
+
+    Tokens refill at `rate` per second up to `capacity`. pause() empties the
+    bucket for a while, which is how a 429 slows every caller down at once
+    rather than just the request that hit it.
+    """
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = asyncio.Lock()
+
+    def pause(self, seconds: float) -> None:
+        self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+        self._tokens = 0.0
+
+    async def acquire(self) -> None:
+        # Waiters queue on the lock, so tokens are handed out in arrival order
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self._paused_until:
+                    await asyncio.sleep(self._paused_until - now)
+                    continue
+
+                self._tokens = min(
+                    self.capacity, self._tokens + (now - self._updated) * self.rate
+                )
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+def retry_after_seconds(response: httpx.Response) -> Optional[float]:
+    """Read a Retry-After header given in seconds or as an HTTP date."""
+    value = response.headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+class AsyncTTSEngine:
+    """
+    Synthesizes speech through the ElevenLabs API with bounded concurrency.
+
+    At most `concurrency` requests are in flight and new ones start no faster
+    than the token bucket allows. A 429 pauses the bucket for the server's
+    Retry-After (or an exponential backoff) before the request is retried.
+    """
+
+    def __init__(
+        self,
+        api_key: Optional[str] = ELEVEN_API_KEY,
+        base_url: str = ELEVEN_API_URL,
+        model_id: str = TTS_MODEL_ID,
+        voice_settings: Optional[Dict[str, Any]] = TTS_VOICE_SETTINGS,
+        concurrency: int = TTS_CONCURRENCY,
+        requests_per_second: float = TTS_REQUESTS_PER_SECOND,
+        burst: int = TTS_BURST,
+        max_retries: int = TTS_MAX_RETRIES,
+    ):
+        if not api_key:
+            raise ValueError("ELEVEN_API_KEY not configured for TTS service.")
+
+        self.model_id = model_id
+        self.voice_settings = voice_settings
+        self.max_retries = max_retries
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._bucket = TokenBucket(requests_per_second, burst)
+        self._client = httpx.AsyncClient(
+            base_url=base_url,
+            headers={"xi-api-key": api_key},
+            timeout=TTS_REQUEST_TIMEOUT,
+            limits=httpx.Limits(max_connections=concurrency),
+        )
+
+    @asynccontextmanager
+    async def stream(
+        self, voice_id: str, text: str
+    ) -> AsyncIterator[AsyncIterator[bytes]]:
+        """
+        Render one line to MP3, yielding the audio chunks as they arrive.
+
+        Retries happen before the first chunk; once audio flows, a broken
+        stream raises to the consumer. The request holds a concurrency slot
+        until the context exits.
+
+        Raises:
+            TTSError: If the request is rejected or retries run out
+        """
+        body: Dict[str, Any] = {"text": text, "model_id": self.model_id}
+        if self.voice_settings:
+            body["voice_settings"] = self.voice_settings
+        request = self._client.build_request(
+            "POST",
+            f"/v1/text-to-speech/{voice_id}/stream",
+            params={"output_format": TTS_OUTPUT_FORMAT},
+            json=body,
+        )
+
+        for attempt in range(self.max_retries + 1):
+            await self._bucket.acquire()
+            async with self._semaphore:
+                try:
+                    response = await self._client.send(request, stream=True)
+                except httpx.TransportError as e:
+                    error = f"{e.__class__.__name__}: {str(e)}"
+                    delay = None
+                    rate_limited = False
+                else:
+                    try:
+                        if response.status_code == 200:
+                            yield response.aiter_bytes()
+                            return
+
+                        await response.aread()
+                        error = (
+                            f"ElevenLabs returned {response.status_code}: "
+                            f"{response.text[:200]}"
+                        )
+                    finally:
+                        await response.aclose()
+
+                    if response.status_code != 429 and response.status_code < 500:
+                        raise TTSError(error)
+                    delay = retry_after_seconds(response)
+                    rate_limited = response.status_code == 429
+
+            if attempt == self.max_retries:
+                break
+
+            if delay is None:
+                delay = TTS_RETRY_BASE_SECONDS * 2**attempt * random.uniform(0.5, 1.0)
+            if rate_limited:
+                # Over the plan's quota: hold back every request, not just this one
+                self._bucket.pause(delay)
+            logger.warning(f"{error}; retrying voice {voice_id} in {delay:.1f}s")
+            await asyncio.sleep(delay)
+
+        raise TTSError(f"Giving up after {self.max_retries + 1} attempts: {error}")
+
+    async def synthesize(self, voice_id: str, text: str) -> bytes:
+        """Render one line to MP3 in memory."""
+        async with self.stream(voice_id, text) as chunks:
+            return b"".join([chunk async for chunk in chunks])
+
+    async def aclose(self) -> None:
+        await self._client.aclose()
+
+
+# Global engine instance, created on first use
+tts_engine: Optional[AsyncTTSEngine] = None
+
+
+def get_tts_engine() -> AsyncTTSEngine:
+    """Get or create the engine shared by everything in this process"""
+    global tts_engine
+    if tts_engine is None:
+        tts_engine = AsyncTTSEngine()
+    return tts_engine
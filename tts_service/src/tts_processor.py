@@ -1,95 +1,200 @@
 # /home/ubuntu/podcast_workflow_mvp/tts_service/src/tts_processor.py
-import os
+import asyncio
 import logging
-from sqlalchemy import update
-from sqlalchemy.orm import Session
-from elevenlabs.client import ElevenLabs
-
+from typing import Any, Dict, List, Optional, Sequence
+
+from sqlalchemy import select, update
+
+from .audio_cache import (
+    TTS_AUDIO_CACHE_ENABLED,
+    audio_cache_key,
+    audio_object_name,
+    lookup_cached_audio,
+    normalize_text,
+    store_cached_audio,
+)
+from .audio_metadata import MP3Stats, measure_chunks
+from .database import AsyncSessionLocal
+from .line_leases import (
+    lease_available,
+    lease_held,
+    new_lease_owner,
+    release_lease_values,
+    renew_line_lease,
+    take_lease_values,
+)
 from .models import ScriptLineModel, VoiceModel
 from .storage import get_storage
+from .tts_engine import AsyncTTSEngine, get_tts_engine
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
-# Environment Variables
-ELEVEN_API_KEY = os.getenv("ELEVEN_API_KEY")
-
 
-def process_line_tts(db: Session, line_id: int, voice_id: str, text: str) -> bool:
-    """Process TTS for a single line synchronously"""
-    logger.info(f"Processing TTS for line_id: {line_id}, voice_id: {voice_id}")
+# Renders in flight in this process, so lines repeating the same text share
+# one ElevenLabs request
+_renders: Dict[str, "asyncio.Task[Dict[str, Any]]"] = {}
 
-    try:
-        # Update line status to processing
-        db.execute(
-            update(ScriptLineModel)
-            .where(ScriptLineModel.id == line_id)
-            .values(tts_status="processing")
-        )
-        db.commit()
 
-        if not ELEVEN_API_KEY:
-            raise ValueError("ELEVEN_API_KEY not configured for TTS service.")
+async def render_audio(
+    engine: AsyncTTSEngine, cache_key: str, voice_id: str, text: str
+) -> Dict[str, Any]:
+    """
+    Synthesize, store, measure and cache a line's audio.
 
-        client = ElevenLabs(api_key=ELEVEN_API_KEY)
+    Returns the public URL and the audio's measurements, keyed by their
+    script_lines column names.
+    """
+    object_name = audio_object_name(cache_key)
+    stats = MP3Stats()
 
-        # Use ElevenLabs SDK to convert text to speech and stream
-        audio_stream = client.text_to_speech.stream(
-            text=text, voice_id=voice_id, model_id="eleven_multilingual_v2"
+    # Chunks go to storage as ElevenLabs produces them, so the upload overlaps
+    # synthesis and no clip is ever held in memory whole. The frame headers
+    # are measured on the way through.
+    async with engine.stream(voice_id, normalize_text(text)) as chunks:
+        public_url = await get_storage().upload_stream(
+            measure_chunks(chunks, stats), object_name, "audio/mpeg"
         )
 
-        # Collect audio data
-        audio_data = bytearray()
-        for chunk in audio_stream:
-            if isinstance(chunk, bytes):
-                audio_data.extend(chunk)
-
-        # Upload to Supabase Storage
-        filename = f"{line_id}.mp3"
-        storage = get_storage()
-        public_url = storage.upload_file(bytes(audio_data), filename, "audio/mpeg")
-
-        if not public_url:
-            raise Exception("Failed to upload audio to Supabase Storage")
+    if not public_url:
+        raise Exception("Failed to upload audio to Supabase Storage")
+    logger.info(f"Audio streamed to Supabase: {object_name}")
+
+    metadata = stats.metadata()
+    if TTS_AUDIO_CACHE_ENABLED:
+        async with AsyncSessionLocal() as db:
+            await store_cached_audio(
+                db,
+                cache_key,
+                voice_id,
+                engine.model_id,
+                text,
+                object_name,
+                public_url,
+                metadata,
+            )
+    return {"public_url": public_url, **metadata}
+
+
+async def get_line_audio(
+    engine: AsyncTTSEngine, voice_id: str, text: str, bypass_cache: bool
+) -> Dict[str, Any]:
+    """Serve a line's audio from the cache, or render it once per process"""
+    cache_key = audio_cache_key(voice_id, engine.model_id, engine.voice_settings, text)
+
+    if TTS_AUDIO_CACHE_ENABLED and not bypass_cache:
+        async with AsyncSessionLocal() as db:
+            cached = await lookup_cached_audio(db, cache_key)
+        if cached:
+            logger.info(f"TTS audio cache hit for voice {voice_id}")
+            return cached
+
+    render = _renders.get(cache_key)
+    if render is None:
+        render = asyncio.create_task(render_audio(engine, cache_key, voice_id, text))
+        _renders[cache_key] = render
+        render.add_done_callback(lambda _: _renders.pop(cache_key, None))
+    # Shielded so one cancelled line does not cancel the render for the others
+    return await asyncio.shield(render)
+
+
+async def process_line_tts(
+    line_id: int,
+    voice_id: str,
+    text: str,
+    engine: Optional[AsyncTTSEngine] = None,
+    bypass_cache: bool = False,
+) -> str:
+    """
+    Process TTS for a single line through the shared TTS engine.
+
+    Text this voice has already rendered reuses the stored audio unless
+    bypass_cache is set, in which case a fresh take is rendered and cached.
+    Returns "complete" or "failed", or "skipped" for a line another worker
+    holds the lease on, which is left to that worker.
+    """
+    logger.info(f"Processing TTS for line_id: {line_id}, voice_id: {voice_id}")
 
-        logger.info(f"Audio for line {line_id} uploaded to Supabase: {filename}")
+    lease_owner = new_lease_owner()
+    async with AsyncSessionLocal() as db:
+        try:
+            # Move the line to processing under a lease, renewed while we work
+            result = await db.execute(
+                update(ScriptLineModel)
+                .where(ScriptLineModel.id == line_id, lease_available("tts"))
+                .values(take_lease_values("tts", lease_owner))
+            )
+            await db.commit()
+            if result.rowcount == 0:
+                logger.info(f"Line {line_id} is leased to another worker, skipping")
+                return "skipped"
 
-        # Update line status to complete
-        db.execute(
-            update(ScriptLineModel)
-            .where(ScriptLineModel.id == line_id)
-            .values(tts_status="complete", audio_file_path=public_url)
-        )
-        db.commit()
+            heartbeat = asyncio.create_task(
+                renew_line_lease("tts", line_id, lease_owner)
+            )
+            try:
+                audio = await get_line_audio(
+                    engine or get_tts_engine(), voice_id, text, bypass_cache
+                )
+            finally:
+                heartbeat.cancel()
+
+            # Get speaker image if available
+            speaker_image_path = await db.scalar(
+                select(VoiceModel.image_path).where(VoiceModel.voice_id == voice_id)
+            )
 
-        # Get speaker image if available
-        voice_record = (
-            db.query(VoiceModel).filter(VoiceModel.voice_id == voice_id).first()
-        )
-        speaker_image_path = None
-        if voice_record and voice_record.image_path:
-            speaker_image_path = voice_record.image_path
-
-        # Mark as ready for avatar generation
-        db.execute(
-            update(ScriptLineModel)
-            .where(ScriptLineModel.id == line_id)
-            .values(
-                avatar_status="ready_for_processing",
-                speaker_image_path=speaker_image_path,
+            # Mark complete and ready for avatar generation, unless the lease
+            # was lost meanwhile (the line was edited or requeued)
+            result = await db.execute(
+                update(ScriptLineModel)
+                .where(ScriptLineModel.id == line_id, lease_held("tts", lease_owner))
+                .values(
+                    tts_status="complete",
+                    audio_file_path=audio["public_url"],
+                    audio_duration_seconds=audio["audio_duration_seconds"],
+                    audio_sample_rate=audio["audio_sample_rate"],
+                    audio_gain_db=audio["audio_gain_db"],
+                    avatar_status="ready_for_processing",
+                    speaker_image_path=speaker_image_path,
+                    **release_lease_values("tts"),
+                )
             )
+            await db.commit()
+            if result.rowcount == 0:
+                # The retry picks the line up again if it still needs audio
+                logger.warning(f"Lost the tts lease on line {line_id}, result dropped")
+                return "failed"
+            logger.info(f"Line {line_id} marked ready for avatar generation")
+
+            return "complete"
+        except Exception as e:
+            logger.error(f"Error during TTS processing for line {line_id}: {e}")
+            await db.rollback()
+            # Update line status to failed
+            await db.execute(
+                update(ScriptLineModel)
+                .where(ScriptLineModel.id == line_id, lease_held("tts", lease_owner))
+                .values(tts_status="failed", **release_lease_values("tts"))
+            )
+            await db.commit()
+            return "failed"
+
+
+async def process_lines_tts(
+    lines: Sequence[ScriptLineModel], engine: Optional[AsyncTTSEngine] = None
+) -> List[str]:
+    """
+    Process TTS for many lines at once.
+
+    Lines run concurrently within the engine's concurrency and rate limits,
+    so a script takes about lines / concurrency round trips instead of one
+    per line. Results are returned in the order of the lines.
+    """
+    engine = engine or get_tts_engine()
+    return await asyncio.gather(
+        *(
+            process_line_tts(line.id, line.voice_id, line.text, engine=engine)
+            for line in lines
         )
-        db.commit()
-        logger.info(f"Line {line_id} marked ready for avatar generation")
-
-        return True
-    except Exception as e:
-        logger.error(f"Error during TTS processing for line {line_id}: {e}")
-        # Update line status to failed
-        db.execute(
-            update(ScriptLineModel)
-            .where(ScriptLineModel.id == line_id)
-            .values(tts_status="failed")
-        )
-        db.commit()
-        return False
+    )
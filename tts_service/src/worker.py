@@ -0,0 +1,73 @@
+import logging
+from typing import Any, Dict
+
+from sqlalchemy import select
+
+from .database import AsyncSessionLocal
+from .jobs import JobError, PermanentJobError, run_worker
+from .line_leases import run_line_reaper
+from .models import ScriptLineModel
+from .tts_processor import process_line_tts, process_lines_tts
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+TTS_QUEUE = "tts"
+
+
+async def run_tts_line(payload: Dict[str, Any]) -> None:
+    line_id = payload["line_id"]
+    async with AsyncSessionLocal() as db:
+        line = await db.get(ScriptLineModel, line_id)
+    if not line:
+        raise PermanentJobError(f"Line {line_id} not found")
+
+    result = await process_line_tts(
+        line.id,
+        line.voice_id,
+        line.text,
+        bypass_cache=payload.get("bypass_cache", False),
+    )
+    if result == "failed":
+        raise JobError(f"TTS failed for line {line_id}")
+
+
+async def run_tts_script(payload: Dict[str, Any]) -> Dict[str, Any]:
+    script_id = payload["script_id"]
+    query = select(ScriptLineModel).where(ScriptLineModel.script_id == script_id)
+    if "line_ids" in payload:
+        # Only the lines the job was queued for, so its progress adds up
+        query = query.where(ScriptLineModel.id.in_(payload["line_ids"]))
+    async with AsyncSessionLocal() as db:
+        script_lines = (
+            await db.scalars(query.order_by(ScriptLineModel.line_order))
+        ).all()
+    if not script_lines and "line_ids" not in payload:
+        raise PermanentJobError(f"No lines found for script {script_id}")
+
+    # A retry only picks up the lines that are not complete
+    pending_lines = [line for line in script_lines if line.tts_status != "complete"]
+    results = await process_lines_tts(pending_lines)
+
+    failed_count = results.count("failed")
+    if failed_count:
+        raise JobError(
+            f"{failed_count} of {len(pending_lines)} lines failed for "
+            f"script {script_id}"
+        )
+    # Lines leased to another worker are rendered by that worker's job
+    return {
+        "processed_lines": results.count("complete"),
+        "skipped_lines": results.count("skipped"),
+    }
+
+
+JOB_HANDLERS = {
+    "tts_line": run_tts_line,
+    "tts_script": run_tts_script,
+}
+
+
+if __name__ == "__main__":
+    # Command: python -m src.worker
+    run_worker(TTS_QUEUE, JOB_HANDLERS, background=[run_line_reaper])
@@ -3,17 +3,20 @@ from typing import List, Annotated, Optional
 
 from fastapi import FastAPI, File, Form, UploadFile, HTTPException, Depends
 from fastapi.middleware.cors import CORSMiddleware
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 # Import from our modules
 from .models import (
     Base,
+    HedraImageAssetModel,
     VoiceModel,
     VoiceCreateResponse,
     VoiceListResponse,
     VoiceImageResponse,
 )
-from .database import engine, get_db
+from .database import engine, get_db, get_async_db
 from .utils import (
     ensure_media_directories,
     save_audio_files_temp,
@@ -177,8 +180,12 @@ async def upload_voice_image(
         # Save new speaker image
         new_image_path = save_speaker_image(speaker_image, voice_id)
 
-        # Update database
+        # Update database; the image is stored under the same name, so the
+        # Hedra assets uploaded from the old one are dropped rather than reused
         db_voice.image_path = new_image_path
+        db.query(HedraImageAssetModel).filter(
+            HedraImageAssetModel.voice_id == voice_id
+        ).delete(synchronize_session=False)
         db.commit()
 
         # Clean up old image after successful update
@@ -198,8 +205,8 @@ async def upload_voice_image(
 
 
 @app.get("/voices", response_model=List[VoiceListResponse])
-async def list_voices(db: Session = Depends(get_db)):
-    voices = db.query(VoiceModel).all()
+async def list_voices(db: AsyncSession = Depends(get_async_db)):
+    voices = (await db.scalars(select(VoiceModel))).all()
     return voices
 
 
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Integer
+from sqlalchemy import Column, String, Integer, DateTime, UniqueConstraint
 from sqlalchemy.ext.declarative import declarative_base
 from pydantic import BaseModel
 from typing import Optional
@@ -16,6 +16,25 @@ class VoiceModel(Base):
     image_path = Column(String, nullable=True)  # Path to speaker image
 
 
+class HedraImageAssetModel(Base):
+    __tablename__ = "hedra_image_assets"
+    # Mirrored from avatar_service.src.models.py; dropped here when a voice's
+    # image is replaced so the avatar service uploads the new one
+    id = Column(Integer, primary_key=True, index=True)
+    voice_id = Column(String, nullable=False, index=True)
+    content_hash = Column(String(64), nullable=False)  # sha256 of the image bytes
+    hedra_asset_id = Column(String, nullable=False)
+    use_count = Column(Integer, nullable=False, default=0)  # Lines that reused it
+    created_at = Column(DateTime(timezone=True), nullable=False)
+    last_used_at = Column(DateTime(timezone=True), nullable=True)
+
+    __table_args__ = (
+        UniqueConstraint(
+            "voice_id", "content_hash", name="ux_hedra_image_assets_voice_hash"
+        ),
+    )
+
+
 # Pydantic Models
 class VoiceCreateResponse(BaseModel):
     voice_id: str